@@ -0,0 +1,742 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import { BaseStrategy } from "@yearnvaults/contracts/BaseStrategy.sol";
+import { SafeERC20, SafeMath, IERC20 } from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+import "../interfaces/idle/IIdleCDO.sol";
+import "../interfaces/idle/ILiquidityGaugeV3.sol";
+import "../interfaces/idle/IDistributorProxy.sol";
+import "../interfaces/uniswap/IUniswapV2Router02.sol";
+import "../interfaces/yswap/ITradeFactory.sol";
+import "../interfaces/IERC20Metadata.sol";
+import "../interfaces/IWETH.sol";
+
+/// @title Multi Tranche Strategy
+/// @author bakuchi
+/// @dev spreads `want` across several IdleCDOs with `want` as underlying token.
+/// - new `want` is invested toward the target weights of the positions
+/// - positions are rebalanced only when they drift from their targets by more than `rebalanceThreshold`
+/// - `liquidatePosition` redeems from the position with the lowest APR first
+/// - tranches are staked if the position has a gauge
+/// positions are added by governance. to remove a position,
+/// set its weight to zero, `divest` it and then call `removePosition`
+/// dual tranche: add the AA and BB tranches of the same IdleCDO
+contract MultiTrancheStrategy is BaseStrategy {
+    /// @dev `tranche` have fixed 18 decimals regardless of the underlying
+    uint256 internal constant EXP_SCALE = 1e18;
+
+    uint256 internal constant MAX_BPS = 10_000;
+
+    uint256 public constant MAX_POSITIONS = 10;
+
+    IWETH internal constant WETH = IWETH(0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2);
+
+    struct Position {
+        IIdleCDO idleCDO;
+        IERC20 tranche;
+        bool isAATranche;
+        // can be zero address. tranches are not staked then
+        ILiquidityGaugeV3 gauge;
+        // target weight out of `MAX_BPS`
+        uint256 weight;
+    }
+
+    Position[] internal positions;
+
+    /// @notice uniswap-v2 compatible router
+    /// @dev router is used to provide an accurate conversion ETH to want
+    IUniswapV2Router02 public router;
+
+    /// @notice IDLE distributor contract
+    IDistributorProxy public distributorProxy;
+
+    /// @notice yswap ref
+    address public tradeFactory;
+
+    /// @dev reward tokens to swap for the want through yswap i.e trade factory
+    IERC20[] internal rewardTokens;
+
+    /// @notice drift out of `MAX_BPS` above which harvests rebalance the positions. zero: no rebalancing
+    uint256 public rebalanceThreshold;
+
+    /// @notice if true, targets are proportional to the APR of the positions with a non-zero weight
+    bool public aprWeighted;
+
+    event AddPosition(address indexed idleCDO, address indexed tranche, address gauge);
+    event RemovePosition(address indexed idleCDO, address indexed tranche);
+    event UpdateWeights(uint256[] weights);
+    event UpdateGauge(address indexed tranche, address gauge);
+    event UpdateRebalanceThreshold(uint256 _rebalanceThreshold);
+    event UpdateAprWeighted(bool _aprWeighted);
+    event Rebalance(uint256 drift);
+
+    /**
+     * @notice
+     *  Initializes the Strategy, this is called only once, when the
+     *  contract is deployed. Positions are added with `addPosition`.
+     * @param _vault The address of the Vault responsible for this Strategy.
+     * @param _strategist The address to assign as `strategist`.
+     * @param _rewards  The address to use for pulling rewards.
+     * @param _keeper The adddress of the _keeper.
+     * @param _router  The address to the uni-v2 style router
+     * @param _rewardTokens  The address to be swapped for the want
+     * @param _dp  The address of IDLE distributorProxy
+     * @param _healthCheck  The address to use for health check
+     */
+    constructor(
+        address _vault,
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        IUniswapV2Router02 _router,
+        IERC20[] memory _rewardTokens,
+        IDistributorProxy _dp,
+        address _healthCheck
+    ) public BaseStrategy(_vault) {
+        require(address(_router) != address(0) || _healthCheck != address(0), "strat/zero-address");
+
+        router = _router;
+        rewardTokens = _rewardTokens;
+        distributorProxy = _dp;
+        healthCheck = _healthCheck;
+
+        // BaseStrategy
+        strategist = _strategist;
+        rewards = _rewards;
+        keeper = _keeper;
+    }
+
+    // ******** PERMISSIONED METHODS ************
+
+    /// @notice add a position with a zero weight. see `setWeights`
+    /// @param _idleCDO IdleCDO with `want` as underlying token
+    /// @param _isAATranche tranche AA or BB
+    /// @param _gauge gauge of the tranche. can be zero address
+    function addPosition(
+        IIdleCDO _idleCDO,
+        bool _isAATranche,
+        ILiquidityGaugeV3 _gauge
+    ) external onlyGovernance {
+        uint256 length = positions.length;
+        require(length < MAX_POSITIONS, "strat/too-many-positions");
+        require(_idleCDO.token() == address(want), "strat/cdo-want");
+
+        IERC20Metadata _tranche = IERC20Metadata(_isAATranche ? _idleCDO.AATranche() : _idleCDO.BBTranche());
+        require(_tranche.decimals() == 18, "strat/decimals-18");
+
+        for (uint256 i; i < length; i++) {
+            require(address(positions[i].tranche) != address(_tranche), "strat/duplicated-position");
+        }
+
+        positions.push(
+            Position({ idleCDO: _idleCDO, tranche: _tranche, isAATranche: _isAATranche, gauge: _gauge, weight: 0 })
+        );
+
+        // AA and BB of the same IdleCDO
+        if (want.allowance(address(this), address(_idleCDO)) == 0) {
+            want.safeApprove(address(_idleCDO), type(uint256).max);
+        }
+        if (address(_gauge) != address(0)) {
+            _tranche.approve(address(_gauge), type(uint256).max);
+        }
+
+        emit AddPosition(address(_idleCDO), address(_tranche), address(_gauge));
+    }
+
+    /// @notice remove an empty position with a zero weight
+    /// @dev the last position takes the index of the removed one
+    function removePosition(uint256 _index) external onlyGovernance {
+        Position memory position = positions[_index];
+        require(position.weight == 0 && _positionTranches(position) == 0, "strat/position-not-empty");
+
+        if (address(position.gauge) != address(0)) {
+            position.tranche.approve(address(position.gauge), 0);
+        }
+
+        positions[_index] = positions[positions.length - 1];
+        positions.pop();
+
+        emit RemovePosition(address(position.idleCDO), address(position.tranche));
+    }
+
+    /// @notice set target weights of the positions
+    /// @param _weights weights out of 10_000 in the order of `getPositions()`. sum must be 10_000
+    function setWeights(uint256[] calldata _weights) external onlyVaultManagers {
+        uint256 length = positions.length;
+        require(_weights.length == length, "strat/invalid-length");
+
+        uint256 sum;
+        for (uint256 i; i < length; i++) {
+            positions[i].weight = _weights[i];
+            sum = sum.add(_weights[i]);
+        }
+        require(sum == MAX_BPS, "strat/invalid-weights");
+
+        emit UpdateWeights(_weights);
+    }
+
+    /// @notice set the drift above which harvests rebalance the positions
+    /// @param _rebalanceThreshold out of 10_000. zero disables rebalancing
+    function setRebalanceThreshold(uint256 _rebalanceThreshold) external onlyVaultManagers {
+        require(_rebalanceThreshold <= MAX_BPS, "strat/invalid-threshold");
+        rebalanceThreshold = _rebalanceThreshold;
+
+        emit UpdateRebalanceThreshold(_rebalanceThreshold);
+    }
+
+    /// @notice target the positions in proportion to their APR instead of `weight`
+    function setAprWeighted(bool _aprWeighted) external onlyVaultManagers {
+        aprWeighted = _aprWeighted;
+
+        emit UpdateAprWeighted(_aprWeighted);
+    }
+
+    /// @notice set gauge of a position
+    /// @dev staked tranches are withdrawn from the old gauge and staked to the new one
+    function setGauge(uint256 _index, ILiquidityGaugeV3 _gauge) external onlyGovernance {
+        Position storage position = positions[_index];
+        IERC20 _tranche = position.tranche;
+
+        ILiquidityGaugeV3 _oldGauge = position.gauge;
+        position.gauge = _gauge;
+
+        if (address(_oldGauge) != address(0)) {
+            uint256 bal = _oldGauge.balanceOf(address(this));
+            if (bal != 0) {
+                _oldGauge.withdraw(bal, true);
+            }
+            _tranche.approve(address(_oldGauge), 0);
+        }
+
+        if (address(_gauge) != address(0)) {
+            uint256 trancheBal = _balance(_tranche);
+            _tranche.approve(address(_gauge), type(uint256).max);
+
+            if (trancheBal != 0) {
+                _gauge.deposit(trancheBal, address(this), false);
+            }
+        }
+
+        emit UpdateGauge(address(_tranche), address(_gauge));
+    }
+
+    /// @notice set IDLE distributor contract
+    function setDistributorProxy(IDistributorProxy _dp) external onlyGovernance {
+        distributorProxy = _dp;
+    }
+
+    /// @notice set reward tokens
+    function setRewardTokens(IERC20[] memory _rewardTokens) external onlyVaultManagers {
+        bool useTradeFactory = tradeFactory != address(0);
+
+        if (useTradeFactory) {
+            _revokeTradeFactoryPermissions();
+        }
+
+        rewardTokens = _rewardTokens; // set
+
+        if (useTradeFactory) {
+            _approveTradeFactory();
+        }
+    }
+
+    /// @dev this strategy must be granted STRATEGY role if `_newTradeFactory` is non-zero address
+    ///      to revoke tradeFactory pass address(0) as the parameter
+    function updateTradeFactory(address _newTradeFactory) public onlyGovernance {
+        if (tradeFactory != address(0)) {
+            _revokeTradeFactoryPermissions();
+        }
+
+        tradeFactory = _newTradeFactory; // set
+
+        if (_newTradeFactory != address(0)) {
+            _approveTradeFactory();
+        }
+    }
+
+    /// @notice setup tradeFactory
+    /// @dev assume tradeFactory is not zero address
+    function _approveTradeFactory() internal {
+        IERC20[] memory _rewardTokens = rewardTokens;
+        address _want = address(want);
+        ITradeFactory tf = ITradeFactory(tradeFactory);
+
+        uint256 length = _rewardTokens.length;
+        for (uint256 i; i < length; i++) {
+            _rewardTokens[i].safeApprove(address(tf), type(uint256).max);
+            tf.enable(address(_rewardTokens[i]), _want);
+        }
+    }
+
+    /// @notice remove tradeFactory
+    /// @dev assume tradeFactory is not zero address
+    function _revokeTradeFactoryPermissions() internal {
+        IERC20[] memory _rewardTokens = rewardTokens;
+        address _tradeFactory = tradeFactory;
+
+        uint256 length = _rewardTokens.length;
+        for (uint256 i; i < length; i++) {
+            _rewardTokens[i].safeApprove(_tradeFactory, 0);
+        }
+    }
+
+    // ******** External Invest/Divest methods ************
+
+    function invest(uint256 _index, uint256 _wantAmount) external onlyVaultManagers {
+        _invest(positions[_index], _wantAmount);
+    }
+
+    function divest(uint256 _index, uint256 _trancheAmount) external onlyVaultManagers {
+        _divest(positions[_index], _trancheAmount);
+    }
+
+    function claimRewards() external onlyVaultManagers {
+        _claimRewards();
+    }
+
+    /// @notice move the positions to their targets regardless of `rebalanceThreshold`
+    function rebalance() external onlyKeepers {
+        _rebalance();
+
+        uint256 wantBal = _balance(want);
+        uint256 debtOutstanding = vault.debtOutstanding();
+        if (wantBal > debtOutstanding) {
+            _allocate(wantBal - debtOutstanding); // no underflow
+        }
+    }
+
+    // ******** VIEW METHODS ************
+
+    function name() external view override returns (string memory) {
+        return "StrategyMultiTranche";
+    }
+
+    function getPositions() external view returns (Position[] memory) {
+        return positions;
+    }
+
+    function getRewardTokens() external view returns (IERC20[] memory) {
+        return rewardTokens;
+    }
+
+    /// @notice value in `want` of each position, in the order of `getPositions()`
+    function positionValues() public view returns (uint256[] memory values) {
+        Position[] memory _positions = positions;
+        uint256 length = _positions.length;
+
+        values = new uint256[](length);
+        for (uint256 i; i < length; i++) {
+            values[i] = _tranchesInWant(_positions[i], _positionTranches(_positions[i]));
+        }
+    }
+
+    function estimatedTotalAssets() public view override returns (uint256 total) {
+        uint256[] memory values = positionValues();
+        uint256 length = values.length;
+
+        total = _balance(want);
+        for (uint256 i; i < length; i++) {
+            total = total.add(values[i]);
+        }
+    }
+
+    /// @notice target weights out of `MAX_BPS`, in the order of `getPositions()`
+    /// @dev if `aprWeighted`, proportional to `getApr` of the positions with a non-zero weight.
+    /// falls back to `weight` if all of them are zero
+    function targetWeights() public view returns (uint256[] memory weights) {
+        Position[] memory _positions = positions;
+        uint256 length = _positions.length;
+
+        weights = new uint256[](length);
+        if (aprWeighted) {
+            uint256 sum;
+            for (uint256 i; i < length; i++) {
+                if (_positions[i].weight == 0) continue;
+                weights[i] = _positions[i].idleCDO.getApr(address(_positions[i].tranche));
+                sum = sum.add(weights[i]);
+            }
+            if (sum != 0) {
+                for (uint256 i; i < length; i++) {
+                    weights[i] = weights[i].mul(MAX_BPS).div(sum);
+                }
+                return weights;
+            }
+        }
+        for (uint256 i; i < length; i++) {
+            weights[i] = _positions[i].weight;
+        }
+    }
+
+    /// @notice largest distance of a position to its target, out of `MAX_BPS` of the value of all positions
+    function drift() public view returns (uint256) {
+        return _drift(positionValues(), targetWeights());
+    }
+
+    /// @notice position indexes by ascending APR. liquidation order
+    function liquidationOrder() public view returns (uint256[] memory order) {
+        Position[] memory _positions = positions;
+        uint256 length = _positions.length;
+
+        uint256[] memory aprs = new uint256[](length);
+        order = new uint256[](length);
+        for (uint256 i; i < length; i++) {
+            aprs[i] = _positions[i].idleCDO.getApr(address(_positions[i].tranche));
+            order[i] = i;
+        }
+
+        // insertion sort. at most `MAX_POSITIONS`
+        for (uint256 i = 1; i < length; i++) {
+            uint256 idx = order[i];
+            uint256 j = i;
+            while (j > 0 && aprs[order[j - 1]] > aprs[idx]) {
+                order[j] = order[j - 1];
+                j--;
+            }
+            order[j] = idx;
+        }
+    }
+
+    // ******** BaseStrategy ************
+
+    function prepareReturn(uint256 _debtOutstanding)
+        internal
+        override
+        returns (
+            uint256 _profit,
+            uint256 _loss,
+            uint256 _debtPayment
+        )
+    {
+        uint256 totalDebt = vault.strategies(address(this)).totalDebt;
+        uint256 totalAssets = estimatedTotalAssets();
+
+        _profit = totalAssets > totalDebt ? totalAssets - totalDebt : 0; // no underflow
+
+        uint256 toFree = _debtOutstanding.add(_profit);
+
+        uint256 freed;
+        (freed, _loss) = liquidatePosition(toFree);
+
+        _debtPayment = _debtOutstanding >= freed ? freed : _debtOutstanding; // min
+
+        // net out PnL
+        if (_profit > _loss) {
+            _profit = _profit - _loss; // no underflow
+            _loss = 0;
+        } else {
+            _loss = _loss - _profit; // no underflow
+            _profit = 0;
+        }
+
+        // withdrawals paused: the profit not freed is left to the next harvest
+        if (_profit > freed - _debtPayment) _profit = freed - _debtPayment; // no underflow
+    }
+
+    function adjustPosition(uint256 _debtOutstanding) internal override {
+        // nothing to re-invest during emergency exit. rewards can be claimed manually
+        if (emergencyExit) return;
+
+        _claimRewards();
+
+        uint256 wantBal = _balance(want);
+
+        if (wantBal > _debtOutstanding) {
+            _allocate(wantBal - _debtOutstanding); // no underflow
+        }
+
+        // skip IdleCDO withdraw/deposit while the positions are close enough to their targets
+        uint256 threshold = rebalanceThreshold;
+        if (threshold != 0 && drift() > threshold) {
+            _rebalance();
+
+            wantBal = _balance(want);
+            if (wantBal > _debtOutstanding) {
+                _allocate(wantBal - _debtOutstanding); // no underflow
+            }
+        }
+    }
+
+    /// @dev redeem from the position with the lowest APR first.
+    /// positions whose IdleCDO withdrawals are paused are skipped: their value is locked, not lost
+    function liquidatePosition(uint256 _amountNeeded)
+        internal
+        override
+        returns (uint256 _liquidatedAmount, uint256 _loss)
+    {
+        uint256 wantBal = _balance(want);
+
+        if (_amountNeeded > wantBal) {
+            uint256 toWithdraw = _amountNeeded - wantBal; // no underflow
+            uint256 withdrawn;
+            uint256 locked;
+
+            uint256[] memory order = liquidationOrder();
+            uint256 length = order.length;
+            for (uint256 i; i < length && withdrawn < toWithdraw; i++) {
+                Position memory position = positions[order[i]];
+
+                uint256 value = _tranchesInWant(position, _positionTranches(position));
+                if (value == 0) continue;
+                if (!_withdrawalsAllowed(position)) {
+                    locked = locked.add(value);
+                    continue;
+                }
+
+                uint256 remaining = toWithdraw - withdrawn; // no underflow
+                uint256 toRedeem =
+                    remaining >= value ? _positionTranches(position) : _wantsInTranche(position, remaining);
+                withdrawn = withdrawn.add(_divest(position, toRedeem));
+            }
+
+            if (withdrawn < toWithdraw) {
+                uint256 shortfall = toWithdraw - withdrawn; // no underflow
+                _loss = shortfall > locked ? shortfall - locked : 0; // no underflow
+                // locked value: the debt not paid stays outstanding
+                return (wantBal.add(withdrawn), _loss);
+            }
+        }
+
+        _liquidatedAmount = _amountNeeded.sub(_loss);
+    }
+
+    /// @dev positions whose IdleCDO withdrawals are paused are skipped so the others can exit.
+    /// their value is reported as a loss and comes back as a profit from a later harvest
+    function liquidateAllPositions() internal override returns (uint256 amountFreed) {
+        Position[] memory _positions = positions;
+        uint256 length = _positions.length;
+
+        for (uint256 i; i < length; i++) {
+            if (!_withdrawalsAllowed(_positions[i])) continue;
+            _divest(_positions[i], _positionTranches(_positions[i]));
+        }
+        amountFreed = _balance(want);
+    }
+
+    function prepareMigration(address _newStrategy) internal override {
+        _claimRewards();
+
+        Position[] memory _positions = positions;
+        uint256 length = _positions.length;
+
+        for (uint256 i; i < length; i++) {
+            Position memory position = _positions[i];
+            if (address(position.gauge) != address(0)) {
+                uint256 stakedBal = position.gauge.balanceOf(address(this));
+                if (stakedBal != 0) position.gauge.withdraw(stakedBal, false);
+            }
+            uint256 trancheBal = _balance(position.tranche);
+            if (trancheBal != 0) position.tranche.safeTransfer(_newStrategy, trancheBal);
+        }
+
+        IERC20[] memory _rewardTokens = rewardTokens;
+        length = _rewardTokens.length;
+        for (uint256 i; i < length; i++) {
+            uint256 bal = _balance(_rewardTokens[i]);
+            if (bal != 0) _rewardTokens[i].safeTransfer(_newStrategy, bal);
+        }
+    }
+
+    function protectedTokens() internal view override returns (address[] memory protected) {
+        // gov can sweep *any token excluding `want`*
+        if (msg.sender == governance()) {
+            return protected;
+        }
+
+        IERC20[] memory _rewardTokens = rewardTokens;
+        uint256 rewardLength = _rewardTokens.length;
+        uint256 length = positions.length;
+
+        protected = new address[](length + rewardLength);
+        for (uint256 i; i < length; i++) {
+            protected[i] = address(positions[i].tranche);
+        }
+        for (uint256 i; i < rewardLength; i++) {
+            protected[length + i] = address(_rewardTokens[i]);
+        }
+    }
+
+    /// @notice see `TrancheStrategy.ethToWant`
+    function ethToWant(uint256 _amount) public view override returns (uint256) {
+        if (_amount == 0) {
+            return 0;
+        }
+
+        address WETH_ADDRESS = address(WETH);
+        address _want = address(want);
+
+        if (_want == WETH_ADDRESS) {
+            return _amount;
+        }
+
+        address[] memory path = new address[](2);
+        path[0] = WETH_ADDRESS;
+        path[1] = _want;
+
+        uint256[] memory amounts = router.getAmountsOut(_amount, path);
+        return amounts[amounts.length - 1];
+    }
+
+    /* **** Internal Mutative functions **** */
+
+    /// @dev invest `_amount` toward the target weights. positions below their target get
+    /// `want` in proportion to how far below they are
+    function _allocate(uint256 _amount) internal {
+        Position[] memory _positions = positions;
+        uint256 length = _positions.length;
+        if (length == 0 || _amount == 0) return;
+
+        uint256[] memory values = positionValues();
+        uint256[] memory weights = targetWeights();
+        uint256 total = _amount;
+        for (uint256 i; i < length; i++) {
+            total = total.add(values[i]);
+        }
+
+        // weights sum to `MAX_BPS`: deficits sum to at least `_amount`
+        uint256[] memory deficits = new uint256[](length);
+        uint256 sumDeficits;
+        for (uint256 i; i < length; i++) {
+            uint256 target = total.mul(weights[i]).div(MAX_BPS);
+            if (target > values[i]) {
+                deficits[i] = target - values[i]; // no underflow
+                sumDeficits = sumDeficits.add(deficits[i]);
+            }
+        }
+        if (sumDeficits == 0) return;
+
+        for (uint256 i; i < length; i++) {
+            // IdleCDO paused: deposits revert. the share of the position stays idle until the next harvest
+            if (deficits[i] == 0 || _positions[i].idleCDO.paused()) continue;
+            _invest(_positions[i], _amount.mul(deficits[i]).div(sumDeficits));
+        }
+    }
+
+    /// @dev redeem the positions above their target. `_allocate` invests the `want` freed
+    function _rebalance() internal {
+        Position[] memory _positions = positions;
+        uint256 length = _positions.length;
+
+        uint256[] memory values = positionValues();
+        uint256[] memory weights = targetWeights();
+        uint256 total;
+        for (uint256 i; i < length; i++) {
+            total = total.add(values[i]);
+        }
+
+        emit Rebalance(_drift(values, weights));
+
+        for (uint256 i; i < length; i++) {
+            uint256 target = total.mul(weights[i]).div(MAX_BPS);
+            if (values[i] > target && _withdrawalsAllowed(_positions[i])) {
+                _divest(_positions[i], _wantsInTranche(_positions[i], values[i] - target)); // no underflow
+            }
+        }
+    }
+
+    /// @notice deposit `want` to the IdleCDO of `position` and stake the tranches minted
+    function _invest(Position memory position, uint256 _wantAmount) internal returns (uint256 trancheMinted) {
+        if (_wantAmount == 0) return 0;
+
+        function(uint256) external returns (uint256) _depositXX =
+            position.isAATranche ? position.idleCDO.depositAA : position.idleCDO.depositBB;
+
+        trancheMinted = _depositXX(_wantAmount);
+
+        if (address(position.gauge) != address(0) && trancheMinted != 0) {
+            position.gauge.deposit(trancheMinted, address(this), false);
+        }
+    }
+
+    /// @notice unstake and redeem `_trancheAmount` tranches of `position`
+    function _divest(Position memory position, uint256 _trancheAmount) internal returns (uint256 wantRedeemed) {
+        if (_trancheAmount == 0) return 0;
+
+        uint256 trancheBal = _balance(position.tranche);
+
+        if (_trancheAmount > trancheBal && address(position.gauge) != address(0)) {
+            uint256 stakedBal = position.gauge.balanceOf(address(this));
+            uint256 toUnstake = _trancheAmount - trancheBal; // no underflow
+            toUnstake = toUnstake > stakedBal ? stakedBal : toUnstake; // min
+
+            if (toUnstake != 0) position.gauge.withdraw(toUnstake, false);
+            trancheBal = trancheBal.add(toUnstake);
+        }
+        _trancheAmount = _trancheAmount > trancheBal ? trancheBal : _trancheAmount; // min
+        if (_trancheAmount == 0) return 0;
+
+        function(uint256) external returns (uint256) _withdrawXX =
+            position.isAATranche ? position.idleCDO.withdrawAA : position.idleCDO.withdrawBB;
+
+        wantRedeemed = _withdrawXX(_trancheAmount);
+    }
+
+    /// @notice claim liquidity mining rewards of every gauge
+    function _claimRewards() internal {
+        IDistributorProxy _dp = distributorProxy;
+        Position[] memory _positions = positions;
+        uint256 length = _positions.length;
+
+        for (uint256 i; i < length; i++) {
+            ILiquidityGaugeV3 _gauge = _positions[i].gauge;
+            if (address(_gauge) == address(0)) continue;
+
+            _gauge.claim_rewards(address(this), address(this));
+            if (address(_dp) != address(0)) {
+                _dp.distribute(address(_gauge));
+            }
+        }
+    }
+
+    /* **** Internal Helper functions **** */
+    function _balance(IERC20 _token) internal view returns (uint256 balance) {
+        balance = _token.balanceOf(address(this));
+    }
+
+    /// @dev largest `|value - target|` out of `MAX_BPS` of the sum of `values`
+    function _drift(uint256[] memory values, uint256[] memory weights) internal pure returns (uint256 maxDrift) {
+        uint256 length = values.length;
+        uint256 total;
+        for (uint256 i; i < length; i++) {
+            total = total.add(values[i]);
+        }
+        if (total == 0) return 0;
+
+        for (uint256 i; i < length; i++) {
+            uint256 target = total.mul(weights[i]).div(MAX_BPS);
+            uint256 distance = values[i] > target ? values[i] - target : target - values[i];
+            distance = distance.mul(MAX_BPS).div(total);
+            if (distance > maxDrift) maxDrift = distance;
+        }
+    }
+
+    /// @dev true if the tranches of `position` can be redeemed: IdleCDO not paused or withdrawals of the tranche allowed
+    function _withdrawalsAllowed(Position memory position) internal view returns (bool) {
+        IIdleCDO _idleCDO = position.idleCDO;
+        return
+            !_idleCDO.paused() || (position.isAATranche ? _idleCDO.allowAAWithdraw() : _idleCDO.allowBBWithdraw());
+    }
+
+    /// @dev staked + unstaked tranches of `position`
+    function _positionTranches(Position memory position) internal view returns (uint256 tranches) {
+        tranches = _balance(position.tranche);
+        if (address(position.gauge) != address(0)) {
+            tranches = tranches.add(position.gauge.balanceOf(address(this)));
+        }
+    }
+
+    /// @dev convert `tranches` of `position` to `want`
+    function _tranchesInWant(Position memory position, uint256 trancheAmount) internal view returns (uint256) {
+        if (trancheAmount == 0) return 0;
+        // price has the same decimals as underlying
+        uint256 price = position.idleCDO.virtualPrice(address(position.tranche));
+        return trancheAmount.mul(price).div(EXP_SCALE);
+    }
+
+    /// @dev convert `wantAmount` to tranches of `position`
+    function _wantsInTranche(Position memory position, uint256 wantAmount) internal view returns (uint256) {
+        if (wantAmount == 0) return 0;
+        return wantAmount.mul(EXP_SCALE).div(position.idleCDO.virtualPrice(address(position.tranche)));
+    }
+}
@@ -12,47 +12,58 @@ import "../interfaces/curve/IStEthStableSwap.sol";
 
 /// @title StETH Tranche Strategy
 /// @author bakuchi
-contract StEthTrancheStrategy is TrancheStrategy {
-    IStEthStableSwap public constant stableSwapSTETH = IStEthStableSwap(0xDC24316b9AE028F1497c275EB9192a3Ea0f67022);
+/// @dev Lido / Curve / WETH addresses are passed to the constructor so that the strategy logic
+/// can be deployed against mock protocols on a local chain.
+/// `StEthTrancheStrategy` below is the mainnet deployment.
+/// in case of emergency,
+/// - call `setEmergencyExit()` and `harvest()`. no need to call `setApprovalUnsafePrice`
+/// if stETH depegs or the Curve pool is imbalanced, call `setUnwindInKind(true)` to keep redeemed stETH
+/// instead of swapping it on Curve:
+/// - emergency exit: no price feed check nor swap. the stETH held is reported as a loss
+///   and comes back as a gain from a harvest after `setUnwindInKind(false)`. governance can sweep it
+/// - revoke and `harvest()`: the stETH held is valued by the price feed, only its discount is reported as a loss
+/// once the pool recovers, call `setUnwindInKind(false)`: the next withdrawal or harvest swaps the stETH held
+abstract contract BaseStEthTrancheStrategy is TrancheStrategy {
+    struct Protocol {
+        IWETH weth;
+        IStETH stETH;
+        IStEthStableSwap stableSwap;
+        IStEthPriceFeed priceFeed;
+    }
+
+    IStEthStableSwap public immutable stableSwapSTETH;
+
+    IStEthPriceFeed public immutable priceFeed;
 
-    IStEthPriceFeed public constant priceFeed = IStEthPriceFeed(0xAb55Bf4DfBf469ebfe082b7872557D1F87692Fe6);
+    IStETH public immutable stETH;
 
-    IStETH public constant stETH = IStETH(0xae7ab96520DE3A18E5e111B5EaAb095312D7fE84);
+    IWETH internal immutable weth;
 
     uint256 private constant DENOMINATOR = 10_000;
+    uint256 private constant STETH_DUST = 2;
     address private constant REFERRAL = 0xFb3bD022D5DAcF95eE28a6B07825D4Ff9C5b3814; // Idle finance Treasury League multisig
     int128 private constant WETHID = 0;
     int128 private constant STETHID = 1;
 
+    /// @notice stETH => ETH swaps fill at most `maximumSlippage` below the fair value of the price feed
     uint256 public maximumSlippage = 50; // out of 10000. 50 = 0.5%
 
     bool public isAllowedUnsafePrice;
 
+    /// @notice if true, redeemed stETH is kept instead of swapped for ETH
+    bool public unwindInKind;
+
     event UpdateMaxSlippage(uint256 _oldSlippage, uint256 _newSlippage);
     event UpdateApprovalUnsafePrice(bool _isAllowedUnsafePrice);
+    event UpdateUnwindInKind(bool _unwindInKind);
 
     receive() external payable {
-        require(msg.sender == address(WETH) || msg.sender == address(stableSwapSTETH), "strat/recieve-eth");
+        require(msg.sender == address(weth) || msg.sender == address(stableSwapSTETH), "strat/recieve-eth");
     }
 
     /**
-     * @notice
-     *  Initializes the Strategy, this is called only once, when the
-     *  contract is deployed.
-     * @dev `_vault` should implement `VaultAPI`.
-     * @param _vault The address of the Vault responsible for this Strategy.
-     * @param _strategist The address to assign as `strategist`.
-     * The strategist is able to change the reward address
-     * @param _rewards  The address to use for pulling rewards.
-     * @param _keeper The adddress of the _keeper. _keeper
-     * can harvest and tend a strategy.
-     * @param _idleCDO  The address of IdleCDO
-     * @param _isAATranche  tranche AA or BB
-     * @param _router  The address to the uni-v2 style router
-     * @param _rewardTokens  The address to be swapped for the want
-     * @param _gauge  The address to the Idle gauge
-     * @param _dp  The address of IDLE distributorProxy
-     * @param _healthCheck  The address to use for health check
+     * @param _protocol  The addresses of WETH, stETH, Curve stETH pool and stETH price feed
+     * see `StEthTrancheStrategy` for the other parameters.
      */
     constructor(
         address _vault,
@@ -65,9 +76,10 @@ contract StEthTrancheStrategy is TrancheStrategy {
         IERC20[] memory _rewardTokens,
         ILiquidityGaugeV3 _gauge,
         IDistributorProxy _dp,
-        address _healthCheck
+        address _healthCheck,
+        Protocol memory _protocol
     )
-        public
+        internal
         TrancheStrategy(
             _vault,
             _strategist,
@@ -82,62 +94,165 @@ contract StEthTrancheStrategy is TrancheStrategy {
             _healthCheck
         )
     {
-        require(address(want) == address(WETH), "strat/want-ne-weth");
-        require(_idleCDO.token() == address(stETH), "strat/cdo-steth");
+        require(address(want) == address(_protocol.weth), "strat/want-ne-weth");
+        require(_idleCDO.token() == address(_protocol.stETH), "strat/cdo-steth");
 
-        WETH.approve(address(stETH), type(uint256).max);
-        stETH.approve(address(_idleCDO), type(uint256).max);
-        stETH.approve(address(stableSwapSTETH), type(uint256).max);
+        weth = _protocol.weth;
+        stETH = _protocol.stETH;
+        stableSwapSTETH = _protocol.stableSwap;
+        priceFeed = _protocol.priceFeed;
+
+        _protocol.weth.approve(address(_protocol.stETH), type(uint256).max);
+        _protocol.stETH.approve(address(_idleCDO), type(uint256).max);
+        _protocol.stETH.approve(address(_protocol.stableSwap), type(uint256).max);
+    }
+
+    /// @notice Initializes a clone of the Strategy
+    /// @dev Lido / Curve / WETH addresses are immutables shared with the original strategy
+    function initialize(
+        address _vault,
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        IIdleCDO _idleCDO,
+        bool _isAATranche,
+        IUniswapV2Router02 _router,
+        IERC20[] memory _rewardTokens,
+        ILiquidityGaugeV3 _gauge,
+        IDistributorProxy _dp,
+        address _healthCheck
+    ) public override {
+        super.initialize(
+            _vault,
+            _strategist,
+            _rewards,
+            _keeper,
+            _idleCDO,
+            _isAATranche,
+            _router,
+            _rewardTokens,
+            _gauge,
+            _dp,
+            _healthCheck
+        );
+
+        IWETH _weth = weth;
+        IStETH _stETH = stETH;
+
+        require(address(want) == address(_weth), "strat/want-ne-weth");
+        require(_idleCDO.token() == address(_stETH), "strat/cdo-steth");
+
+        maximumSlippage = 50;
+
+        _weth.approve(address(_stETH), type(uint256).max);
+        _stETH.approve(address(_idleCDO), type(uint256).max);
+        _stETH.approve(address(stableSwapSTETH), type(uint256).max);
     }
 
     /// @notice deposit steth to idleCDO and mint tranche
     /// @param _amount eth amount to invest
-    function _depositTranche(uint256 _amount) internal override {
-        uint256 _stEthBalanceBefore = _balance(stETH);
-
+    /// @return trancheMinted : tranches minted
+    function _depositTranche(uint256 _amount) internal override returns (uint256 trancheMinted) {
         // weth => eth
-        WETH.withdraw(_amount);
+        weth.withdraw(_amount);
 
         // eth => steth
         // test if we should buy instead of mint
         uint256 out = stableSwapSTETH.get_dy(WETHID, STETHID, _amount);
+        uint256 amountIn;
         if (out < _amount) {
+            // `submit` returns stETH shares, not stETH. minted 1:1 with eth
             stETH.submit{ value: _amount }(REFERRAL);
+            amountIn = _amount;
         } else {
-            stableSwapSTETH.exchange{ value: _amount }(WETHID, STETHID, _amount, _amount);
+            amountIn = stableSwapSTETH.exchange{ value: _amount }(WETHID, STETHID, _amount, _amount);
         }
-        uint256 amountIn = _balance(stETH).sub(_stEthBalanceBefore);
+        amountIn = _stEthHeld(amountIn);
 
         // deposit steth to idle
-        super._depositTranche(amountIn);
+        trancheMinted = super._depositTranche(amountIn);
     }
 
     /// @notice redeem tranches and get steth
-    /// @param _trancheAmount tranche amount to redeem
-    function _withdrawTranche(uint256 _trancheAmount) internal override {
-        uint256 _stEthBalanceBefore = _balance(stETH);
-        uint256 _trancheBalance = _balance(tranche);
-
-        // fix rounding error
-        if (_trancheBalance < _trancheAmount) {
-            _trancheAmount = _trancheBalance;
-        }
-
+    /// @dev the stETH held from an unwind in kind is swapped with the stETH redeemed
+    /// @param _trancheAmount tranche amount to redeem. not more than held: see `_divest` and `liquidateAllPositions`
+    /// @return wantRedeemed : weth redeemed. zero on unwind in kind
+    function _withdrawTranche(uint256 _trancheAmount) internal override returns (uint256 wantRedeemed) {
         // withraw tranche and get steth
         super._withdrawTranche(_trancheAmount);
 
-        uint256 _amountIn = _balance(stETH).sub(_stEthBalanceBefore);
+        // unwind in kind: keep redeemed steth. it is valued in `estimatedTotalAssets`
+        if (unwindInKind) return 0;
+
+        // stETH transfers can deliver 1-2 wei less than the amount sent: dust is left
+        uint256 _amountIn = _balance(stETH);
+        if (_amountIn <= STETH_DUST) return 0;
 
         // steth => eth
-        uint256 slippageAllowance = _amountIn.mul(DENOMINATOR.sub(maximumSlippage)).div(DENOMINATOR);
-        // emit LogUint(_amountIn);
-        // emit LogUint(slippageAllowance);
-        // uint256 out = stableSwapSTETH.get_dy(STETHID, WETHID, _amountIn);
-        // emit LogUint(out);
-        stableSwapSTETH.exchange(STETHID, WETHID, _amountIn, slippageAllowance);
+        uint256 quote = stableSwapSTETH.get_dy(STETHID, WETHID, _amountIn);
+        require(quote >= _minEthOut(_amountIn), "strat/slippage");
+        // same transaction: the swap fills at the quote
+        stableSwapSTETH.exchange(STETHID, WETHID, _amountIn, quote);
 
         // eth => weth
-        WETH.deposit{ value: address(this).balance }();
+        wantRedeemed = address(this).balance;
+        weth.deposit{ value: wantRedeemed }();
+    }
+
+    /// @dev lowest ETH accepted for `_amountIn` stETH: `maximumSlippage` below the fair value given by the price feed.
+    /// emergency exit does not query the price feed: `maximumSlippage` below 1:1
+    function _minEthOut(uint256 _amountIn) internal view returns (uint256) {
+        uint256 fairValue = _amountIn;
+        if (!emergencyExit) {
+            (uint256 stEthPrice, bool isSafe) = priceFeed.current_price();
+            require(isSafe || isAllowedUnsafePrice, "strat/price-unsafe");
+            fairValue = _amountIn.mul(stEthPrice).div(EXP_SCALE);
+        }
+        return fairValue.mul(DENOMINATOR.sub(maximumSlippage)).div(DENOMINATOR);
+    }
+
+    /// @dev `_amount` of stETH received, capped at the stETH held:
+    /// stETH transfers can deliver 1-2 wei less than the amount sent because of the share rounding
+    function _stEthHeld(uint256 _amount) internal view returns (uint256) {
+        uint256 stEthBal = _balance(stETH);
+        return _amount > stEthBal ? stEthBal : _amount; // min
+    }
+
+    /// @dev value of `_amount` stETH in `want`: price feed price, 1:1 in emergency exit as in `_minEthOut`
+    function _stEthInWant(uint256 _amount) internal view returns (uint256) {
+        if (_amount <= STETH_DUST || emergencyExit) return _amount;
+
+        (uint256 stEthPrice, bool isSafe) = priceFeed.current_price();
+        require(isSafe || isAllowedUnsafePrice, "strat/price-unsafe");
+        return _amount.mul(stEthPrice).div(EXP_SCALE);
+    }
+
+    /// @notice tranches and `want` (see `TrancheStrategy`) plus the stETH held from an unwind in kind
+    function estimatedTotalAssets() public view override returns (uint256) {
+        return super.estimatedTotalAssets().add(_stEthInWant(_balance(stETH)));
+    }
+
+    /// @dev unwind in kind: the shortfall held as stETH is not a loss. it is paid once the stETH is swapped
+    function liquidatePosition(uint256 _amountNeeded)
+        internal
+        override
+        returns (uint256 _liquidatedAmount, uint256 _loss)
+    {
+        (_liquidatedAmount, _loss) = super.liquidatePosition(_amountNeeded);
+        if (!unwindInKind) return (_liquidatedAmount, _loss);
+
+        uint256 stEthValue = _stEthInWant(_balance(stETH));
+        _loss = _loss > stEthValue ? _loss - stEthValue : 0; // no underflow
+        uint256 wantBal = _balance(want);
+        _liquidatedAmount = wantBal > _amountNeeded ? _amountNeeded : wantBal; // min
+    }
+
+    /// @dev the stETH held from an unwind in kind goes to the new strategy
+    function prepareMigration(address _newStrategy) internal override {
+        super.prepareMigration(_newStrategy);
+
+        uint256 stEthBal = _balance(stETH);
+        if (stEthBal != 0) IERC20(address(stETH)).safeTransfer(_newStrategy, stEthBal);
     }
 
     /// @dev NOTE: Unreliable price
@@ -148,6 +263,9 @@ contract StEthTrancheStrategy is TrancheStrategy {
     /// @dev convert `tranches` denominated in `want`
     /// @notice Usually idleCDO.underlyingToken is equal to the `want`
     function _tranchesInWant(IERC20 _tranche, uint256 trancheAmount) internal view override returns (uint256) {
+        // skip the price feed when nothing is invested. e.g after emergency exit
+        if (trancheAmount == 0) return 0;
+
         (uint256 stEthPrice, bool isSafe) = priceFeed.current_price();
         require(isSafe || isAllowedUnsafePrice, "strat/price-unsafe");
 
@@ -155,6 +273,13 @@ contract StEthTrancheStrategy is TrancheStrategy {
         return amountsInStEth.mul(stEthPrice).div(EXP_SCALE);
     }
 
+    /// @dev Curve quote of the swap in `_withdrawTranche`. reverts on the same slippage check
+    function _quoteUnderlyingToWant(uint256 stEthAmount) internal view override returns (uint256 quote) {
+        if (unwindInKind || stEthAmount == 0) return 0;
+        quote = stableSwapSTETH.get_dy(STETHID, WETHID, stEthAmount);
+        require(quote >= _minEthOut(stEthAmount), "strat/slippage");
+    }
+
     /// @dev for debugging
     function wantBal() external view returns (uint256) {
         return _balance(want);
@@ -187,4 +312,70 @@ contract StEthTrancheStrategy is TrancheStrategy {
 
         emit UpdateApprovalUnsafePrice(_isAllowedUnsafePrice);
     }
+
+    /// @notice set unwind in kind mode
+    /// @dev if true, redeemed stETH is kept instead of swapped on Curve, emergency exit included
+    function setUnwindInKind(bool _unwindInKind) external onlyVaultManagers {
+        unwindInKind = _unwindInKind;
+
+        emit UpdateUnwindInKind(_unwindInKind);
+    }
+}
+
+/// @title StETH Tranche Strategy
+/// @author bakuchi
+contract StEthTrancheStrategy is BaseStEthTrancheStrategy {
+    /**
+     * @notice
+     *  Initializes the Strategy, this is called only once, when the
+     *  contract is deployed.
+     * @dev `_vault` should implement `VaultAPI`.
+     * @param _vault The address of the Vault responsible for this Strategy.
+     * @param _strategist The address to assign as `strategist`.
+     * The strategist is able to change the reward address
+     * @param _rewards  The address to use for pulling rewards.
+     * @param _keeper The adddress of the _keeper. _keeper
+     * can harvest and tend a strategy.
+     * @param _idleCDO  The address of IdleCDO
+     * @param _isAATranche  tranche AA or BB
+     * @param _router  The address to the uni-v2 style router
+     * @param _rewardTokens  The address to be swapped for the want
+     * @param _gauge  The address to the Idle gauge
+     * @param _dp  The address of IDLE distributorProxy
+     * @param _healthCheck  The address to use for health check
+     */
+    constructor(
+        address _vault,
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        IIdleCDO _idleCDO,
+        bool _isAATranche,
+        IUniswapV2Router02 _router,
+        IERC20[] memory _rewardTokens,
+        ILiquidityGaugeV3 _gauge,
+        IDistributorProxy _dp,
+        address _healthCheck
+    )
+        public
+        BaseStEthTrancheStrategy(
+            _vault,
+            _strategist,
+            _rewards,
+            _keeper,
+            _idleCDO,
+            _isAATranche,
+            _router,
+            _rewardTokens,
+            _gauge,
+            _dp,
+            _healthCheck,
+            Protocol({
+                weth: WETH,
+                stETH: IStETH(0xae7ab96520DE3A18E5e111B5EaAb095312D7fE84),
+                stableSwap: IStEthStableSwap(0xDC24316b9AE028F1497c275EB9192a3Ea0f67022),
+                priceFeed: IStEthPriceFeed(0xAb55Bf4DfBf469ebfe082b7872557D1F87692Fe6)
+            })
+        )
+    {}
 }
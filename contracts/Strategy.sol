@@ -2,7 +2,7 @@
 pragma solidity 0.6.12;
 pragma experimental ABIEncoderV2;
 
-import { BaseStrategy } from "@yearnvaults/contracts/BaseStrategy.sol";
+import { BaseStrategy, HealthCheck } from "@yearnvaults/contracts/BaseStrategy.sol";
 import { SafeERC20, SafeMath, IERC20 } from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
 
 import "../interfaces/idle/IIdleCDO.sol";
@@ -22,6 +22,8 @@ import "../interfaces/IWETH.sol";
 /// Migrations
 /// set `checkStakedBeforeMigrating` false by calling `SetCheckStakedBeforeMigrating`
 /// and then `migrate()`
+/// if the new strategy stakes to the same gauge (see `canReceiveStaked`),
+/// staked tranches and reward tokens are handed over without unstaking
 /// it is possible for vault manageres to mannually invest/dinvest/claimRewards
 /// mannually claiming rewards can bypass `enabledStake` flag check
 
@@ -31,12 +33,20 @@ contract TrancheStrategy is BaseStrategy {
 
     IWETH internal constant WETH = IWETH(0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2);
 
-    IERC20Metadata public immutable tranche;
+    /// @dev not immutable: clones share the bytecode of the original strategy
+    IERC20Metadata public tranche;
 
-    IIdleCDO public immutable idleCDO;
+    IIdleCDO public idleCDO;
 
     /// @notice junior or senior
-    bool public immutable isAATranche;
+    bool public isAATranche;
+
+    /// @notice false for clones. only the original strategy can clone itself
+    bool public isOriginal = true;
+
+    /// @dev revert data of `harvestDryRun`
+    bytes4 private constant HARVEST_DRY_RUN =
+        bytes4(keccak256("HarvestDryRun(uint256,uint256,uint256,uint256,bool)"));
 
     /// @notice uniswap-v2 compatible router
     /// @dev router is used to provide an accurate conversion ETH to want
@@ -58,14 +68,33 @@ contract TrancheStrategy is BaseStrategy {
     /// @dev we assume gauge address is not zero address if this flag is true.
     bool public enabledStake;
 
+    /// @notice tranches staked to `gauge`, tracked by the strategy instead of reading `gauge.balanceOf`
+    /// @dev see `reconcileStaked`
+    uint256 public stakedTranches;
+
     /// @notice yswap ref
     address public tradeFactory;
 
     /// @dev reward tokens to swap for the want through yswap i.e trade factory
     IERC20[] internal rewardTokens;
 
+    /// @notice depositors allowed to use `depositAndInvest`
+    mapping(address => bool) public zapDepositors;
+
+    /// @notice timestamp of the last `vault.report` sent by `depositAndInvest`
+    uint256 public lastZapReport;
+
+    /// @dev timestamp of the last report before the zap reports, see `lastHarvest`
+    uint256 internal harvestReport;
+
     event UpdateCheckStakedBeforeMigrating(bool _checkStakedBeforeMigrating);
 
+    event UpdateZapDepositor(address indexed _depositor, bool _allowed);
+
+    event ReconcileStaked(uint256 _stakedTranches, uint256 _gaugeBalance);
+
+    event Cloned(address indexed clone);
+
     /**
      * @notice
      *  Initializes the Strategy, this is called only once, when the
@@ -98,7 +127,115 @@ contract TrancheStrategy is BaseStrategy {
         IDistributorProxy _dp,
         address _healthCheck
     ) public BaseStrategy(_vault) {
+        _initializeStrat(
+            _strategist,
+            _rewards,
+            _keeper,
+            _idleCDO,
+            _isAATranche,
+            _router,
+            _rewardTokens,
+            _gauge,
+            _dp,
+            _healthCheck
+        );
+    }
+
+    /**
+     * @notice
+     *  Initializes a clone of the Strategy. see `cloneTrancheStrategy`
+     * @dev the parameters are the same as the constructor
+     */
+    function initialize(
+        address _vault,
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        IIdleCDO _idleCDO,
+        bool _isAATranche,
+        IUniswapV2Router02 _router,
+        IERC20[] memory _rewardTokens,
+        ILiquidityGaugeV3 _gauge,
+        IDistributorProxy _dp,
+        address _healthCheck
+    ) public virtual {
+        // reverts if `want` is already set
+        _initialize(_vault, _strategist, _rewards, _keeper);
+        _initializeStrat(
+            _strategist,
+            _rewards,
+            _keeper,
+            _idleCDO,
+            _isAATranche,
+            _router,
+            _rewardTokens,
+            _gauge,
+            _dp,
+            _healthCheck
+        );
+    }
+
+    /// @notice deploy an EIP-1167 minimal proxy of this strategy and initialize it
+    /// @dev the parameters are the same as the constructor
+    /// @return newStrategy : address of the clone
+    function cloneTrancheStrategy(
+        address _vault,
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        IIdleCDO _idleCDO,
+        bool _isAATranche,
+        IUniswapV2Router02 _router,
+        IERC20[] memory _rewardTokens,
+        ILiquidityGaugeV3 _gauge,
+        IDistributorProxy _dp,
+        address _healthCheck
+    ) external returns (address newStrategy) {
+        require(isOriginal, "strat/not-original");
+
+        // Copied from https://github.com/optionality/clone-factory/blob/master/contracts/CloneFactory.sol
+        bytes20 addressBytes = bytes20(address(this));
+        assembly {
+            // EIP-1167 bytecode
+            let clone_code := mload(0x40)
+            mstore(clone_code, 0x3d602d80600a3d3981f3363d3d373d3d3d363d73000000000000000000000000)
+            mstore(add(clone_code, 0x14), addressBytes)
+            mstore(add(clone_code, 0x28), 0x5af43d82803e903d91602b57fd5bf30000000000000000000000000000000000)
+            newStrategy := create(0, clone_code, 0x37)
+        }
+        require(newStrategy != address(0), "strat/clone-failed");
+
+        TrancheStrategy(newStrategy).initialize(
+            _vault,
+            _strategist,
+            _rewards,
+            _keeper,
+            _idleCDO,
+            _isAATranche,
+            _router,
+            _rewardTokens,
+            _gauge,
+            _dp,
+            _healthCheck
+        );
+
+        emit Cloned(newStrategy);
+    }
+
+    function _initializeStrat(
+        address _strategist,
+        address _rewards,
+        address _keeper,
+        IIdleCDO _idleCDO,
+        bool _isAATranche,
+        IUniswapV2Router02 _router,
+        IERC20[] memory _rewardTokens,
+        ILiquidityGaugeV3 _gauge,
+        IDistributorProxy _dp,
+        address _healthCheck
+    ) internal {
         require(address(_router) != address(0) || _healthCheck != address(0), "strat/zero-address");
+        require(address(tranche) == address(0), "strat/already-initialized");
 
         idleCDO = _idleCDO;
         isAATranche = _isAATranche;
@@ -112,6 +249,7 @@ contract TrancheStrategy is BaseStrategy {
         distributorProxy = _dp;
 
         healthCheck = _healthCheck;
+        checkStakedBeforeMigrating = true;
 
         // BaseStrategy
         strategist = _strategist;
@@ -147,12 +285,31 @@ contract TrancheStrategy is BaseStrategy {
         enabledStake = true;
     }
 
-    /// @notice withdraw staked and disable staking
-    /// @dev to revoke Gauge contract use `setGauge` method
+    /// @notice disable staking. staked tranches stay in the gauge
+    /// @dev to revoke Gauge contract use `setGauge` method. `stakedTranches` is unchanged
     function disableStaking() external onlyVaultManagers {
         enabledStake = false; // reset
     }
 
+    /// @notice set `stakedTranches` to the gauge balance of the strategy
+    /// @dev e.g. tranches staked or unstaked on behalf of the strategy.
+    /// callable by the strategies of the vault: the old strategy hands over its staked tranches on migration
+    function reconcileStaked() external {
+        require(
+            msg.sender == governance() ||
+                msg.sender == vault.management() ||
+                vault.strategies(msg.sender).activation != 0,
+            "strat/not-allowed"
+        );
+
+        ILiquidityGaugeV3 _gauge = gauge;
+        uint256 gaugeBal = address(_gauge) != address(0) ? _gauge.balanceOf(address(this)) : 0;
+
+        emit ReconcileStaked(stakedTranches, gaugeBal);
+
+        stakedTranches = gaugeBal;
+    }
+
     /// @notice set gauge contract
     /// @dev revoke or approve gauge contract
     function setGauge(ILiquidityGaugeV3 _gauge) external onlyGovernance {
@@ -169,6 +326,7 @@ contract TrancheStrategy is BaseStrategy {
             }
             // revoke
             _tranche.approve(address(_oldGauge), 0);
+            stakedTranches = 0;
         }
 
         // approve & stake
@@ -179,6 +337,7 @@ contract TrancheStrategy is BaseStrategy {
             // stake
             if (enabledStake && trancheBal != 0) {
                 _gauge.deposit(trancheBal, address(this), false);
+                stakedTranches = trancheBal;
             }
         }
     }
@@ -297,14 +456,48 @@ contract TrancheStrategy is BaseStrategy {
 
     /// @notice return staked tranches + tranche balance that this contract holds
     function totalTranches() public view returns (uint256) {
-        ILiquidityGaugeV3 _gauge = gauge;
-        uint256 stakedBal;
+        return stakedTranches.add(_balance(tranche));
+    }
 
-        if (address(_gauge) != address(0)) {
-            stakedBal = stakedBal.add(_gauge.balanceOf(address(this)));
-        }
+    /// @notice true if `tranche` can be redeemed from IdleCDO: not paused, or withdrawals of the tranche allowed
+    function withdrawalsAllowed() public view returns (bool) {
+        IIdleCDO _idleCDO = idleCDO;
+        return !_idleCDO.paused() || (isAATranche ? _idleCDO.allowAAWithdraw() : _idleCDO.allowBBWithdraw());
+    }
+
+    /// @notice quote `liquidatePosition(_amountNeeded)`. e.g. before `vault.withdraw`
+    /// @dev reverts where `liquidatePosition` would revert on the price or slippage check (see `StEthTrancheStrategy`)
+    /// @param _amountNeeded amount of `want` to free
+    /// @return trancheRedeemed : tranches redeemed from IdleCDO
+    /// @return underlyingOut : IdleCDO underlying tokens out
+    /// @return quote : `want` out of the swap from the underlying. equal to `underlyingOut` if no swap
+    /// @return liquidatedAmount : `want` made available. the difference with `_amountNeeded` is a loss,
+    /// unless withdrawals from IdleCDO are paused (see `withdrawalsAllowed`)
+    function previewLiquidate(uint256 _amountNeeded)
+        external
+        view
+        returns (
+            uint256 trancheRedeemed,
+            uint256 underlyingOut,
+            uint256 quote,
+            uint256 liquidatedAmount
+        )
+    {
+        IERC20 _tranche = tranche;
+        uint256 wantBal = _balance(want);
+
+        if (_amountNeeded <= wantBal) return (0, 0, 0, _amountNeeded);
+        if (!withdrawalsAllowed()) return (0, 0, 0, wantBal);
+
+        uint256 toWithdraw = _amountNeeded - wantBal; // no underflow
+        uint256 totalTranches = totalTranches();
+
+        trancheRedeemed = _wantsInTranche(_tranche, toWithdraw);
+        trancheRedeemed = trancheRedeemed > totalTranches ? totalTranches : trancheRedeemed; // min
+        underlyingOut = _tranchesInUnderlyingToken(_tranche, trancheRedeemed);
+        quote = _quoteUnderlyingToWant(underlyingOut);
 
-        return stakedBal.add(_balance(tranche));
+        liquidatedAmount = wantBal.add(quote > toWithdraw ? toWithdraw : quote);
     }
 
     /**
@@ -369,6 +562,9 @@ contract TrancheStrategy is BaseStrategy {
             _loss = _loss - _profit; // no underflow
             _profit = 0;
         }
+
+        // withdrawals paused: the profit not freed is left to the next harvest
+        if (_profit > freed - _debtPayment) _profit = freed - _debtPayment; // no underflow
     }
 
     /**
@@ -384,10 +580,16 @@ contract TrancheStrategy is BaseStrategy {
         // TODO: Do something to invest excess `want` tokens (from the Vault) into your positions
         // NOTE: Try to adjust positions so that `_debtOutstanding` can be freed up on *next* harvest (not immediately)
 
+        // nothing to re-invest during emergency exit. rewards can be claimed manually
+        if (emergencyExit) return;
+
         if (enabledStake) {
             _claimRewards();
         }
 
+        // IdleCDO paused: deposits revert. `want` stays idle until the next harvest
+        if (idleCDO.paused()) return;
+
         uint256 wantBal = _balance(want);
 
         if (wantBal > _debtOutstanding) {
@@ -407,6 +609,7 @@ contract TrancheStrategy is BaseStrategy {
      */
     function liquidatePosition(uint256 _amountNeeded)
         internal
+        virtual
         override
         returns (uint256 _liquidatedAmount, uint256 _loss)
     {
@@ -418,6 +621,10 @@ contract TrancheStrategy is BaseStrategy {
         uint256 wantBal = _balance(want);
 
         if (_amountNeeded > wantBal) {
+            // IdleCDO paused: serve from idle `want`. the shortfall is locked, not lost: no loss is reported
+            // and the debt not paid stays outstanding
+            if (!withdrawalsAllowed()) return (wantBal, 0);
+
             uint256 toWithdraw = _amountNeeded - wantBal; // no underflow
             uint256 withdrawn = _divest(_wantsInTranche(_tranche, toWithdraw));
             if (withdrawn < toWithdraw) {
@@ -434,13 +641,65 @@ contract TrancheStrategy is BaseStrategy {
      * liquidate all of the Strategy's positions back to the Vault.
      *
      * @dev `amountFeed` is total balance held by the strategy incl. any prior balance
+     * emergency fast path: unstake everything without claiming rewards and redeem
+     * all tranches without any valuation.
+     * IdleCDO paused: only the idle `want` is freed and the tranches stay staked. their value is reported
+     * as a loss and comes back as a gain from a harvest once withdrawals are allowed
      */
     function liquidateAllPositions() internal override returns (uint256 amountFreed) {
-        // TODO: Liquidate all positions and return the amount freed.
-        _divest(totalTranches());
+        if (!withdrawalsAllowed()) return _balance(want);
+
+        ILiquidityGaugeV3 _gauge = gauge;
+
+        // the gauge balance: no valuation to rely on in an emergency
+        if (address(_gauge) != address(0)) {
+            uint256 stakedBal = _gauge.balanceOf(address(this));
+            if (stakedBal != 0) _gauge.withdraw(stakedBal, false);
+            stakedTranches = 0;
+        }
+
+        _withdrawTranche(_balance(tranche));
         amountFreed = _balance(want);
     }
 
+    /// @notice simulate `harvest()` with `eth_call`. always reverts
+    /// @dev runs the same steps as `harvest()` (`prepareReturn`, `vault.report`, `adjustPosition`)
+    /// and reverts with `HarvestDryRun(profit, loss, debtPayment, debtOutstanding, healthCheckPassed)`
+    /// encoded like a custom error. see `scripts/harvest_dry_run.py` to decode it
+    function harvestDryRun() external onlyKeepers {
+        uint256 profit;
+        uint256 loss;
+        uint256 debtPayment;
+        uint256 debtOutstanding = vault.debtOutstanding();
+
+        if (emergencyExit) {
+            // same as `BaseStrategy.harvest()`
+            uint256 amountFreed = liquidateAllPositions();
+            if (amountFreed < debtOutstanding) {
+                loss = debtOutstanding.sub(amountFreed);
+            } else if (amountFreed > debtOutstanding) {
+                profit = amountFreed.sub(debtOutstanding);
+            }
+            debtPayment = debtOutstanding.sub(loss);
+        } else {
+            (profit, loss, debtPayment) = prepareReturn(debtOutstanding);
+        }
+
+        uint256 totalDebt = vault.strategies(address(this)).totalDebt;
+        debtOutstanding = vault.report(profit, loss, debtPayment);
+        adjustPosition(debtOutstanding);
+
+        bool passed = !doHealthCheck ||
+            healthCheck == address(0) ||
+            HealthCheck(healthCheck).check(profit, loss, debtPayment, debtOutstanding, totalDebt);
+
+        bytes memory result =
+            abi.encodeWithSelector(HARVEST_DRY_RUN, profit, loss, debtPayment, debtOutstanding, passed);
+        assembly {
+            revert(add(result, 32), mload(result))
+        }
+    }
+
     // NOTE: Can override `tendTrigger` and `harvestTrigger` if necessary
     function prepareMigration(address _newStrategy) internal virtual override {
         // TODO: Transfer any non-`want` tokens to the new strategy
@@ -451,8 +710,20 @@ contract TrancheStrategy is BaseStrategy {
         ILiquidityGaugeV3 _gauge = gauge;
 
         if (checkStakedBeforeMigrating && address(_gauge) != address(0)) {
-            uint256 toWithdraw = _gauge.balanceOf(address(this));
-            if (toWithdraw != 0) _gauge.withdraw(toWithdraw, false);
+            // the gauge balance, not the ledger: tranches staked on behalf of the strategy move too
+            uint256 stakedBal = _gauge.balanceOf(address(this));
+            if (stakedBal != 0) {
+                stakedTranches = 0;
+                if (_isStakedReceiver(_newStrategy, _gauge)) {
+                    // handoff: claim rewards and move the staked position as it is
+                    _claimRewards();
+                    _transferRewardTokens(_newStrategy);
+                    _gauge.transfer(_newStrategy, stakedBal);
+                    TrancheStrategy(_newStrategy).reconcileStaked();
+                } else {
+                    _gauge.withdraw(stakedBal, false);
+                }
+            }
         }
 
         // transfer funds
@@ -462,6 +733,30 @@ contract TrancheStrategy is BaseStrategy {
         }
     }
 
+    /// @notice true if this strategy can take over a position staked to `_gauge` on migration
+    function canReceiveStaked(ILiquidityGaugeV3 _gauge) external view returns (bool) {
+        return enabledStake && address(gauge) == address(_gauge);
+    }
+
+    /// @dev the new strategy may not be a TrancheStrategy
+    function _isStakedReceiver(address _newStrategy, ILiquidityGaugeV3 _gauge) internal view returns (bool) {
+        try TrancheStrategy(_newStrategy).canReceiveStaked(_gauge) returns (bool ok) {
+            return ok;
+        } catch {
+            return false;
+        }
+    }
+
+    function _transferRewardTokens(address _to) internal {
+        IERC20[] memory _rewardTokens = rewardTokens;
+        uint256 length = _rewardTokens.length;
+
+        for (uint256 i; i < length; i++) {
+            uint256 bal = _balance(_rewardTokens[i]);
+            if (bal != 0) _rewardTokens[i].safeTransfer(_to, bal);
+        }
+    }
+
     // Override this to add all tokens/tokenized positions this contract manages
     // on a *persistent* basis (e.g. not just for swapping back to want ephemerally)
     // NOTE: Do *not* include `want`, already included in `sweep` below
@@ -549,30 +844,85 @@ contract TrancheStrategy is BaseStrategy {
         _claimRewards();
     }
 
+    /// @notice allow or disallow `_depositor` to use `depositAndInvest`
+    function setZapDepositor(address _depositor, bool _allowed) external onlyVaultManagers {
+        zapDepositors[_depositor] = _allowed;
+
+        emit UpdateZapDepositor(_depositor, _allowed);
+    }
+
+    /// @notice deposit `_amount` of `want` to the vault for the sender and invest the credit of the strategy
+    /// without waiting for the next harvest.
+    /// @dev the vault is reported to with no profit, loss nor debt payment: PnL is left to the next harvest
+    /// and the vault debt limits apply as in a harvest. the credit is invested, `want` already held is not.
+    /// if the vault was already reported to in this block, the credit is left to the next harvest.
+    /// NOTE: yearn vaults do not charge the management fee of a report without gain:
+    /// the management fee since the last report is lost. `harvestTrigger` still counts `maxReportDelay`
+    /// from the last harvest
+    /// @return shares : vault shares minted to the sender
+    function depositAndInvest(uint256 _amount) external returns (uint256 shares) {
+        require(zapDepositors[msg.sender], "strat/not-zap-depositor");
+        require(!emergencyExit, "strat/emergency-exit");
+
+        IERC20 _want = want;
+
+        _want.safeTransferFrom(msg.sender, address(this), _amount);
+        // `want` is approved to the vault by `BaseStrategy`
+        shares = vault.deposit(_amount, msg.sender);
+
+        uint256 lastReport = vault.strategies(address(this)).lastReport;
+        // `vault.report` can't be called twice in a block
+        if (lastReport == block.timestamp) return shares;
+        // reported by a harvest since the last zap
+        if (lastReport != lastZapReport) harvestReport = lastReport;
+        lastZapReport = block.timestamp;
+
+        uint256 before = _balance(_want);
+        vault.report(0, 0, 0);
+        uint256 credit = _balance(_want).sub(before);
+
+        // IdleCDO paused: the credit is invested by the next harvest
+        if (credit != 0 && !idleCDO.paused()) {
+            _invest(credit);
+        }
+    }
+
+    /// @notice `BaseStrategy.harvestTrigger`, with `maxReportDelay` counted from the last harvest:
+    /// the reports of `depositAndInvest` do not postpone harvests
+    function harvestTrigger(uint256 callCostInWei) public view override returns (bool) {
+        if (lastZapReport != 0 && vault.strategies(address(this)).lastReport == lastZapReport) {
+            if (block.timestamp.sub(lastHarvest()) >= maxReportDelay) return true;
+        }
+        return super.harvestTrigger(callCostInWei);
+    }
+
+    /// @notice timestamp of the last harvest: the last report of the vault not sent by `depositAndInvest`
+    function lastHarvest() public view returns (uint256) {
+        uint256 lastReport = vault.strategies(address(this)).lastReport;
+        if (lastZapReport != 0 && lastReport == lastZapReport) return harvestReport;
+        return lastReport;
+    }
+
     /* **** Internal Mutative functions **** */
 
     /// @notice deposit `want` to IdleCDO and mint AATranche or BBTranche
     /// @param _wantAmount amount of `want` to deposit
     /// @return trancheMinted : tranche tokens minted
     function _invest(uint256 _wantAmount) internal virtual returns (uint256 trancheMinted) {
-        IERC20 _tranche = tranche;
-
-        uint256 before = _balance(_tranche);
-
-        _depositTranche(_wantAmount);
-
-        trancheMinted = _balance(_tranche).sub(before);
+        trancheMinted = _depositTranche(_wantAmount);
 
         if (enabledStake && trancheMinted != 0) {
             gauge.deposit(trancheMinted, address(this), false);
+            stakedTranches = stakedTranches.add(trancheMinted);
         }
     }
 
     /// @notice redeem `tranche` from IdleCDO and withdraw `want`
+    /// @dev nothing is unstaked nor redeemed while withdrawals are paused (see `withdrawalsAllowed`)
     /// @param _trancheAmount amount of `want` to deposit
     /// @return wantRedeemed : want redeemed
     function _divest(uint256 _trancheAmount) internal virtual returns (uint256 wantRedeemed) {
-        IERC20 _want = want;
+        if (!withdrawalsAllowed()) return 0;
 
         uint256 trancheBal = _balance(tranche);
 
@@ -580,18 +930,21 @@ contract TrancheStrategy is BaseStrategy {
         if (_trancheAmount > trancheBal) {
             ILiquidityGaugeV3 _gauge = gauge;
 
-            uint256 stakedBal = _gauge.balanceOf(address(this));
+            uint256 stakedBal = stakedTranches;
             uint256 toWithdraw = _toWithdraw(_trancheAmount, trancheBal, stakedBal);
 
             // if tranche to withdraw > current balance, withdraw
-            if (toWithdraw != 0) _gauge.withdraw(toWithdraw, false);
-        }
-
-        uint256 before = _balance(_want);
+            if (toWithdraw != 0) {
+                _gauge.withdraw(toWithdraw, false);
+                stakedTranches = stakedBal - toWithdraw; // no underflow
+            }
 
-        _withdrawTranche(_trancheAmount);
+            // tranches are worth less than expected. e.g loss of the IdleCDO: redeem all of them
+            trancheBal = trancheBal.add(toWithdraw);
+            _trancheAmount = _trancheAmount > trancheBal ? trancheBal : _trancheAmount; // min
+        }
 
-        wantRedeemed = _balance(_want).sub(before);
+        wantRedeemed = _withdrawTranche(_trancheAmount);
     }
 
     function _toWithdraw(
@@ -622,20 +975,22 @@ contract TrancheStrategy is BaseStrategy {
     /// @notice deposit specified underlying amount to idleCDO and mint tranche
     /// @dev when `want` is different from CDO underlying token, this method will be overridden by pararent contract
     /// @param _underlyingAmount underlying amount of idleCDO
-    function _depositTranche(uint256 _underlyingAmount) internal virtual {
+    /// @return trancheMinted : tranches minted, as returned by idleCDO
+    function _depositTranche(uint256 _underlyingAmount) internal virtual returns (uint256 trancheMinted) {
         function(uint256) external returns (uint256) _depositXX = isAATranche ? idleCDO.depositAA : idleCDO.depositBB;
 
-        if (_underlyingAmount != 0) _depositXX(_underlyingAmount);
+        if (_underlyingAmount != 0) trancheMinted = _depositXX(_underlyingAmount);
     }
 
     /// @notice redeem tranches and get `want`
     /// @dev when `want` is different from CDO underlying token, this method will be overridden by pararent contract
-    /// @param _trancheAmount amount of `tranche`
-    function _withdrawTranche(uint256 _trancheAmount) internal virtual {
+    /// @param _trancheAmount amount of `tranche`. not more than held
+    /// @return redeemed : underlying redeemed, as returned by idleCDO. `want` unless overridden
+    function _withdrawTranche(uint256 _trancheAmount) internal virtual returns (uint256 redeemed) {
         function(uint256) external returns (uint256) _withdrawXX =
             isAATranche ? idleCDO.withdrawAA : idleCDO.withdrawBB;
 
-        if (_trancheAmount != 0) _withdrawXX(_trancheAmount);
+        if (_trancheAmount != 0) redeemed = _withdrawXX(_trancheAmount);
     }
 
     /* **** Internal Helper functions **** */
@@ -657,6 +1012,12 @@ contract TrancheStrategy is BaseStrategy {
         return trancheAmount.mul(price).div(EXP_SCALE);
     }
 
+    /// @dev `want` received for `underlyingAmount` of IdleCDO underlying token when redeeming tranches
+    /// @notice Usually idleCDO.underlyingToken is equal to the `want`
+    function _quoteUnderlyingToWant(uint256 underlyingAmount) internal view virtual returns (uint256) {
+        return underlyingAmount;
+    }
+
     /// @dev convert `wantAmount` denominated in `tranche`
     /// @notice Usually idleCDO.underlyingToken is equal to the `want`
     function _wantsInTranche(IERC20 _tranche, uint256 wantAmount) internal view virtual returns (uint256) {
@@ -0,0 +1,30 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+/// @dev same limits as yearn CommonHealthCheck defaults
+contract HealthCheckMock {
+    uint256 private constant MAX_BPS = 10_000;
+
+    uint256 public profitLimitRatio = 100; // 1%
+    uint256 public lossLimitRatio = 1; // 0.01%
+
+    function setProfitLimitRatio(uint256 _profitLimitRatio) external {
+        profitLimitRatio = _profitLimitRatio;
+    }
+
+    function setLossLimitRatio(uint256 _lossLimitRatio) external {
+        lossLimitRatio = _lossLimitRatio;
+    }
+
+    function check(
+        uint256 profit,
+        uint256 loss,
+        uint256,
+        uint256,
+        uint256 totalDebt
+    ) external view returns (bool) {
+        if (profit > (totalDebt * profitLimitRatio) / MAX_BPS) return false;
+        if (loss > (totalDebt * lossLimitRatio) / MAX_BPS) return false;
+        return true;
+    }
+}
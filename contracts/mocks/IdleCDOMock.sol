@@ -0,0 +1,179 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+import { SafeERC20, SafeMath, IERC20 } from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+contract IdleCDOTrancheMock is ERC20 {
+    address public immutable minter;
+
+    constructor(string memory _name, string memory _symbol) public ERC20(_name, _symbol) {
+        minter = msg.sender;
+    }
+
+    function mint(address to, uint256 amount) external {
+        require(msg.sender == minter, "tranche/!minter");
+        _mint(to, amount);
+    }
+
+    function burn(address from, uint256 amount) external {
+        require(msg.sender == minter, "tranche/!minter");
+        _burn(from, amount);
+    }
+}
+
+/// @dev IdleCDO with settable tranche prices and withdraw flags.
+/// tranche prices are not backed automatically: mint underlying to this contract to simulate yield.
+contract IdleCDOMock {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    uint256 private constant ONE_TRANCHE_TOKEN = 1e18;
+    uint256 public constant FULL_ALLOC = 100000;
+
+    address public immutable token;
+
+    address public immutable AATranche;
+
+    address public immutable BBTranche;
+
+    bool public paused;
+
+    bool public allowAAWithdraw = true;
+
+    bool public allowBBWithdraw = true;
+
+    uint256 public trancheAPRSplitRatio = 20000; // 20% of the interest to tranche AA
+
+    uint256 public fee;
+
+    mapping(address => uint256) internal prices;
+
+    mapping(address => uint256) internal aprs;
+
+    constructor(address _token) public {
+        token = _token;
+
+        address _AATranche = address(new IdleCDOTrancheMock("IdleCDO AA Tranche", "AA_MOCK"));
+        address _BBTranche = address(new IdleCDOTrancheMock("IdleCDO BB Tranche", "BB_MOCK"));
+
+        AATranche = _AATranche;
+        BBTranche = _BBTranche;
+        prices[_AATranche] = ONE_TRANCHE_TOKEN;
+        prices[_BBTranche] = ONE_TRANCHE_TOKEN;
+    }
+
+    // ###############
+    // Mock setters
+    // ###############
+
+    function setPaused(bool _paused) external {
+        paused = _paused;
+    }
+
+    function setAllowAAWithdraw(bool _allowed) external {
+        allowAAWithdraw = _allowed;
+    }
+
+    function setAllowBBWithdraw(bool _allowed) external {
+        allowBBWithdraw = _allowed;
+    }
+
+    function setVirtualPrice(address _tranche, uint256 _price) external {
+        prices[_tranche] = _price;
+    }
+
+    /// @dev loss of the lending protocol. BB tranche absorbs it first, then AA
+    function realizeLoss(uint256 _loss) external {
+        uint256 bbValue = _trancheValue(BBTranche);
+        uint256 bbLoss = _loss > bbValue ? bbValue : _loss;
+
+        _reprice(AATranche, _trancheValue(AATranche).sub(_loss - bbLoss));
+        _reprice(BBTranche, bbValue - bbLoss);
+        IERC20(token).safeTransfer(address(0xdead), _loss);
+    }
+
+    function setApr(address _tranche, uint256 _apr) external {
+        aprs[_tranche] = _apr;
+    }
+
+    function setTrancheAPRSplitRatio(uint256 _trancheAPRSplitRatio) external {
+        trancheAPRSplitRatio = _trancheAPRSplitRatio;
+    }
+
+    // ###############
+    // Views
+    // ###############
+
+    function getApr(address _tranche) external view returns (uint256) {
+        return aprs[_tranche];
+    }
+
+    function virtualPrice(address _tranche) public view returns (uint256) {
+        return prices[_tranche];
+    }
+
+    function tranchePrice(address _tranche) external view returns (uint256) {
+        return prices[_tranche];
+    }
+
+    function getContractValue() public view returns (uint256) {
+        return _trancheValue(AATranche).add(_trancheValue(BBTranche));
+    }
+
+    function getCurrentAARatio() external view returns (uint256) {
+        uint256 total = getContractValue();
+        if (total == 0) return 0;
+        return _trancheValue(AATranche).mul(FULL_ALLOC).div(total);
+    }
+
+    // ###############
+    // Mutative methods
+    // ###############
+
+    function depositAA(uint256 _amount) external returns (uint256) {
+        return _deposit(_amount, AATranche);
+    }
+
+    function depositBB(uint256 _amount) external returns (uint256) {
+        return _deposit(_amount, BBTranche);
+    }
+
+    function withdrawAA(uint256 _amount) external returns (uint256) {
+        require(!paused || allowAAWithdraw, "3");
+        return _withdraw(_amount, AATranche);
+    }
+
+    function withdrawBB(uint256 _amount) external returns (uint256) {
+        require(!paused || allowBBWithdraw, "3");
+        return _withdraw(_amount, BBTranche);
+    }
+
+    function _deposit(uint256 _amount, address _tranche) internal returns (uint256 minted) {
+        require(!paused, "Pausable: paused");
+
+        IERC20(token).safeTransferFrom(msg.sender, address(this), _amount);
+        minted = _amount.mul(ONE_TRANCHE_TOKEN).div(prices[_tranche]);
+        IdleCDOTrancheMock(_tranche).mint(msg.sender, minted);
+    }
+
+    function _withdraw(uint256 _amount, address _tranche) internal returns (uint256 toRedeem) {
+        if (_amount == 0) {
+            _amount = IERC20(_tranche).balanceOf(msg.sender);
+        }
+        require(_amount > 0, "0");
+
+        IdleCDOTrancheMock(_tranche).burn(msg.sender, _amount);
+        toRedeem = _amount.mul(prices[_tranche]).div(ONE_TRANCHE_TOKEN);
+        IERC20(token).safeTransfer(msg.sender, toRedeem);
+    }
+
+    function _reprice(address _tranche, uint256 _value) internal {
+        uint256 supply = IERC20(_tranche).totalSupply();
+        if (supply != 0) prices[_tranche] = _value.mul(ONE_TRANCHE_TOKEN).div(supply);
+    }
+
+    function _trancheValue(address _tranche) internal view returns (uint256) {
+        return IERC20(_tranche).totalSupply().mul(prices[_tranche]).div(ONE_TRANCHE_TOKEN);
+    }
+}
@@ -0,0 +1,93 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import { SafeERC20, SafeMath, IERC20 } from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+import "./ERC20Mock.sol";
+
+/// @dev Idle LiquidityGaugeV3 with a single reward token.
+/// rewards are notified per account and minted on claim.
+contract LiquidityGaugeMock {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    IERC20 public immutable lp_token;
+
+    ERC20Mock public immutable rewardToken;
+
+    uint256 public totalSupply;
+
+    mapping(address => uint256) public balanceOf;
+
+    mapping(address => uint256) public claimableReward;
+
+    event Deposit(address indexed provider, uint256 value);
+    event Withdraw(address indexed provider, uint256 value);
+    event Transfer(address indexed _from, address indexed _to, uint256 _value);
+
+    constructor(IERC20 _lpToken, ERC20Mock _rewardToken) public {
+        lp_token = _lpToken;
+        rewardToken = _rewardToken;
+    }
+
+    /// @dev LiquidityGaugeV3 has up to 8 reward tokens
+    function reward_tokens(uint256 _index) external view returns (address) {
+        return _index == 0 ? address(rewardToken) : address(0);
+    }
+
+    function claimable_reward(address _addr, address _token) external view returns (uint256) {
+        return _token == address(rewardToken) ? claimableReward[_addr] : 0;
+    }
+
+    function notifyReward(address _addr, uint256 _amount) external {
+        claimableReward[_addr] = claimableReward[_addr].add(_amount);
+    }
+
+    function deposit(
+        uint256 _value,
+        address _addr,
+        bool _claimRewards
+    ) external {
+        if (_claimRewards) _claim(_addr, _addr);
+
+        lp_token.safeTransferFrom(msg.sender, address(this), _value);
+        balanceOf[_addr] = balanceOf[_addr].add(_value);
+        totalSupply = totalSupply.add(_value);
+
+        emit Deposit(_addr, _value);
+    }
+
+    function withdraw(uint256 _value, bool _claimRewards) external {
+        if (_claimRewards) _claim(msg.sender, msg.sender);
+
+        balanceOf[msg.sender] = balanceOf[msg.sender].sub(_value);
+        totalSupply = totalSupply.sub(_value);
+        lp_token.safeTransfer(msg.sender, _value);
+
+        emit Withdraw(msg.sender, _value);
+    }
+
+    /// @dev claimable rewards stay with the sender
+    function transfer(address _to, uint256 _value) external returns (bool) {
+        balanceOf[msg.sender] = balanceOf[msg.sender].sub(_value);
+        balanceOf[_to] = balanceOf[_to].add(_value);
+
+        emit Transfer(msg.sender, _to, _value);
+        return true;
+    }
+
+    function claim_rewards(address _addr, address _receiver) external {
+        if (_receiver != address(0)) {
+            require(_addr == msg.sender, "gauge/cannot-redirect");
+        }
+        _claim(_addr, _receiver == address(0) ? _addr : _receiver);
+    }
+
+    function _claim(address _addr, address _receiver) internal {
+        uint256 amount = claimableReward[_addr];
+        if (amount != 0) {
+            claimableReward[_addr] = 0;
+            rewardToken.mint(_receiver, amount);
+        }
+    }
+}
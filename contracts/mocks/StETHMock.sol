@@ -0,0 +1,16 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+
+/// @dev stETH without rebasing. `submit` mints 1:1
+contract StETHMock is ERC20("Liquid staked Ether 2.0", "stETH") {
+    function submit(address) external payable returns (uint256) {
+        _mint(msg.sender, msg.value);
+        return msg.value;
+    }
+
+    function mint(address to, uint256 amount) external {
+        _mint(to, amount);
+    }
+}
@@ -0,0 +1,20 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+contract StEthPriceFeedMock {
+    uint256 public price = 1e18;
+    bool public isSafe = true;
+
+    function setPrice(uint256 _price, bool _isSafe) external {
+        price = _price;
+        isSafe = _isSafe;
+    }
+
+    function safe_price() external view returns (uint256, uint256) {
+        return (price, block.timestamp);
+    }
+
+    function current_price() external view returns (uint256, bool) {
+        return (price, isSafe);
+    }
+}
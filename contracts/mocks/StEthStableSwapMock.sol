@@ -0,0 +1,231 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+import { SafeERC20, SafeMath, IERC20 } from "@openzeppelin/contracts/token/ERC20/SafeERC20.sol";
+
+/// @dev Curve ETH/stETH pool with the same StableSwap integer math as
+/// https://etherscan.io/address/0xDC24316b9AE028F1497c275EB9192a3Ea0f67022
+/// no A ramping. LP shares are tracked internally, add/remove liquidity charge no fees.
+contract StEthStableSwapMock {
+    using SafeERC20 for IERC20;
+    using SafeMath for uint256;
+
+    uint256 private constant N_COINS = 2;
+    uint256 private constant A_PRECISION = 100;
+    uint256 private constant FEE_DENOMINATOR = 1e10;
+
+    IERC20 public immutable stETH;
+
+    /// @dev A * A_PRECISION
+    uint256 public immutable A_precise;
+
+    uint256 public fee;
+
+    uint256 public admin_fee;
+
+    /// @dev end of an A ramp. A does not change, see `setFutureATime`
+    uint256 public future_A_time;
+
+    /// @dev pool balances excluding admin fees. 0: ETH 1: stETH
+    uint256[2] public balances;
+
+    uint256 public totalSupply;
+
+    mapping(address => uint256) public balanceOf;
+
+    event TokenExchange(
+        address indexed buyer,
+        int128 sold_id,
+        uint256 tokens_sold,
+        int128 bought_id,
+        uint256 tokens_bought
+    );
+    event AddLiquidity(
+        address indexed provider,
+        uint256[2] token_amounts,
+        uint256[2] fees,
+        uint256 invariant,
+        uint256 token_supply
+    );
+    event RemoveLiquidity(address indexed provider, uint256[2] token_amounts, uint256[2] fees, uint256 token_supply);
+
+    constructor(
+        IERC20 _stETH,
+        uint256 _A,
+        uint256 _fee,
+        uint256 _adminFee
+    ) public {
+        stETH = _stETH;
+        A_precise = _A * A_PRECISION;
+        fee = _fee;
+        admin_fee = _adminFee;
+    }
+
+    /// @dev flags an A ramp in progress until `_futureATime`, for `scripts/curve_mirror.py`
+    function setFutureATime(uint256 _futureATime) external {
+        future_A_time = _futureATime;
+    }
+
+    function A() external view returns (uint256) {
+        return A_precise / A_PRECISION;
+    }
+
+    function get_virtual_price() external view returns (uint256) {
+        return _getD(balances, A_precise).mul(1e18).div(totalSupply);
+    }
+
+    function get_dy(
+        int128 i,
+        int128 j,
+        uint256 dx
+    ) external view returns (uint256) {
+        uint256[2] memory xp = balances;
+        (uint256 dy, ) = _exchangeAmounts(xp, i, j, dx);
+        return dy;
+    }
+
+    function exchange(
+        int128 i,
+        int128 j,
+        uint256 dx,
+        uint256 min_dy
+    ) external payable returns (uint256) {
+        require(i != j && i >= 0 && j >= 0 && i < 2 && j < 2, "pool/invalid-coin");
+
+        uint256[2] memory xp = balances;
+        (uint256 dy, uint256 dyFee) = _exchangeAmounts(xp, i, j, dx);
+        require(dy >= min_dy, "Exchange resulted in fewer coins than expected");
+
+        uint256 dyAdminFee = dyFee.mul(admin_fee).div(FEE_DENOMINATOR);
+        balances[uint256(i)] = xp[uint256(i)].add(dx);
+        balances[uint256(j)] = xp[uint256(j)].sub(dy).sub(dyAdminFee);
+
+        if (i == 0) {
+            require(msg.value == dx, "pool/eth-amount");
+            stETH.safeTransfer(msg.sender, dy);
+        } else {
+            require(msg.value == 0, "pool/eth-not-expected");
+            stETH.safeTransferFrom(msg.sender, address(this), dx);
+            _sendEth(msg.sender, dy);
+        }
+
+        emit TokenExchange(msg.sender, i, dx, j, dy);
+        return dy;
+    }
+
+    function add_liquidity(uint256[2] calldata amounts, uint256 min_mint_amount) external payable returns (uint256) {
+        require(msg.value == amounts[0], "pool/eth-amount");
+
+        uint256 amp = A_precise;
+        uint256[2] memory oldBalances = balances;
+        uint256 D0 = _getD(oldBalances, amp);
+        uint256[2] memory newBalances = [oldBalances[0].add(amounts[0]), oldBalances[1].add(amounts[1])];
+        uint256 D1 = _getD(newBalances, amp);
+        require(D1 > D0, "pool/D1-le-D0");
+
+        uint256 tokenSupply = totalSupply;
+        uint256 mintAmount = tokenSupply == 0 ? D1 : tokenSupply.mul(D1 - D0).div(D0);
+        require(mintAmount >= min_mint_amount, "Slippage screwed you");
+
+        balances = newBalances;
+        if (amounts[1] != 0) stETH.safeTransferFrom(msg.sender, address(this), amounts[1]);
+
+        totalSupply = tokenSupply.add(mintAmount);
+        balanceOf[msg.sender] = balanceOf[msg.sender].add(mintAmount);
+
+        uint256[2] memory fees;
+        emit AddLiquidity(msg.sender, amounts, fees, D1, tokenSupply.add(mintAmount));
+        return mintAmount;
+    }
+
+    function remove_liquidity(uint256 _amount, uint256[2] calldata _min_amounts) external returns (uint256[2] memory) {
+        uint256 tokenSupply = totalSupply;
+        uint256[2] memory amounts;
+
+        for (uint256 k; k < N_COINS; k++) {
+            uint256 value = balances[k].mul(_amount).div(tokenSupply);
+            require(value >= _min_amounts[k], "Withdrawal resulted in fewer coins than expected");
+            balances[k] = balances[k].sub(value);
+            amounts[k] = value;
+        }
+
+        balanceOf[msg.sender] = balanceOf[msg.sender].sub(_amount);
+        totalSupply = tokenSupply.sub(_amount);
+
+        _sendEth(msg.sender, amounts[0]);
+        stETH.safeTransfer(msg.sender, amounts[1]);
+
+        uint256[2] memory fees;
+        emit RemoveLiquidity(msg.sender, amounts, fees, tokenSupply.sub(_amount));
+        return amounts;
+    }
+
+    function _exchangeAmounts(
+        uint256[2] memory xp,
+        int128 i,
+        int128 j,
+        uint256 dx
+    ) internal view returns (uint256 dy, uint256 dyFee) {
+        uint256 x = xp[uint256(i)] + dx;
+        uint256 y = _getY(x, xp);
+        dy = xp[uint256(j)] - y - 1;
+        dyFee = (dy * fee) / FEE_DENOMINATOR;
+        dy = dy - dyFee;
+    }
+
+    function _getD(uint256[2] memory xp, uint256 amp) internal pure returns (uint256) {
+        uint256 S = xp[0] + xp[1];
+        if (S == 0) return 0;
+
+        uint256 Dprev;
+        uint256 D = S;
+        uint256 Ann = amp * N_COINS;
+        for (uint256 _i; _i < 255; _i++) {
+            uint256 D_P = D;
+            for (uint256 k; k < N_COINS; k++) {
+                D_P = (D_P * D) / (xp[k] * N_COINS + 1); // +1 is to prevent /0
+            }
+            Dprev = D;
+            D =
+                (((Ann * S) / A_PRECISION + D_P * N_COINS) * D) /
+                (((Ann - A_PRECISION) * D) / A_PRECISION + (N_COINS + 1) * D_P);
+            // Equality with the precision of 1
+            if (D > Dprev) {
+                if (D - Dprev <= 1) return D;
+            } else {
+                if (Dprev - D <= 1) return D;
+            }
+        }
+        revert("pool/D-not-converged");
+    }
+
+    /// @dev with two coins, the only coin other than `j` is the input coin with new balance `x`
+    function _getY(uint256 x, uint256[2] memory xp) internal view returns (uint256) {
+        uint256 amp = A_precise;
+        uint256 D = _getD(xp, amp);
+        uint256 Ann = amp * N_COINS;
+
+        uint256 c = (D * D) / (x * N_COINS);
+        c = (c * D * A_PRECISION) / (Ann * N_COINS);
+        uint256 b = x + (D * A_PRECISION) / Ann;
+
+        uint256 yPrev;
+        uint256 y = D;
+        for (uint256 _i; _i < 255; _i++) {
+            yPrev = y;
+            y = (y * y + c) / (2 * y + b - D);
+            // Equality with the precision of 1
+            if (y > yPrev) {
+                if (y - yPrev <= 1) return y;
+            } else {
+                if (yPrev - y <= 1) return y;
+            }
+        }
+        revert("pool/y-not-converged");
+    }
+
+    function _sendEth(address payable _to, uint256 _amount) internal {
+        (bool success, ) = _to.call{ value: _amount }("");
+        require(success, "pool/eth-transfer");
+    }
+}
@@ -0,0 +1,34 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+pragma experimental ABIEncoderV2;
+
+import "../StEthTrancheStrategy.sol";
+
+/// @dev StEthTrancheStrategy wired to mock WETH / stETH / Curve pool / price feed.
+/// deployer is strategist, rewards and keeper.
+contract StEthTrancheStrategyMock is BaseStEthTrancheStrategy {
+    constructor(
+        address _vault,
+        IIdleCDO _idleCDO,
+        bool _isAATranche,
+        ILiquidityGaugeV3 _gauge,
+        address _healthCheck,
+        Protocol memory _protocol
+    )
+        public
+        BaseStEthTrancheStrategy(
+            _vault,
+            msg.sender,
+            msg.sender,
+            msg.sender,
+            _idleCDO,
+            _isAATranche,
+            IUniswapV2Router02(address(0)),
+            new IERC20[](0),
+            _gauge,
+            IDistributorProxy(address(0)),
+            _healthCheck,
+            _protocol
+        )
+    {}
+}
@@ -0,0 +1,10 @@
+// SPDX-License-Identifier: AGPL-3.0
+pragma solidity 0.6.12;
+
+contract TradeFactoryMock {
+    event Enabled(address indexed strategy, address indexed tokenIn, address indexed tokenOut);
+
+    function enable(address _tokenIn, address _tokenOut) external {
+        emit Enabled(msg.sender, _tokenIn, _tokenOut);
+    }
+}
@@ -9,7 +9,7 @@ interface IStEthStableSwap {
         int128 to,
         uint256 _from_amount,
         uint256 _min_to_amount
-    ) external payable;
+    ) external payable returns (uint256);
 
     function balances(int128) external view returns (uint256);
 
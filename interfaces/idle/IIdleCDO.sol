@@ -29,6 +29,9 @@ interface IIdleCDO {
     // Flag for allowing BB withdraws
     function allowBBWithdraw() external view returns (bool);
 
+    // Pausable. deposits are paused, withdrawals too unless allowed per tranche
+    function paused() external view returns (bool);
+
     // Fee amount (relative to FULL_ALLOC)
     function fee() external view returns (uint256);
 
@@ -13,4 +13,6 @@ interface ILiquidityGaugeV3 {
     function claim_rewards(address account, address receiver) external;
 
     function balanceOf(address account) external view returns (uint256);
+
+    function transfer(address to, uint256 amount) external returns (bool);
 }
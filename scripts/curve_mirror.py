@@ -0,0 +1,215 @@
+"""Local mirror of the Curve ETH/stETH pool for `get_dy` quotes without RPC calls.
+
+The mirror reads the pool state once (`balances`, `A_precise`, `fee`,
+`admin_fee`, `future_A_time`) and then follows its logs:
+
+    TokenExchange             balances[i] += dx, balances[j] -= dy + admin fee
+    AddLiquidity              balances += amounts - admin fees
+    RemoveLiquidity           balances -= amounts
+    RemoveLiquidityImbalance  balances -= amounts + admin fees
+
+Any other log of the pool (`RemoveLiquidityOne` has no coin index, `NewFee`,
+`RampA`...) and any `TokenExchange` whose `tokens_bought` differs from the
+local quote make the mirror read the state again. stETH rebases change the
+balances of the mainnet pool without a pool log: `max_age` (default
+`DEFAULT_MAX_AGE` blocks) bounds the blocks between two reads. While A ramps
+(`future_A_time` after the block read) `A_precise` changes every block
+without a log: every `sync` reads the state again until the ramp is over.
+
+`get_dy` is the StableSwap integer math of the pool. quotes are exact against
+`StEthStableSwapMock` (tests/local/steth/test_curve_mirror.py), not checked
+against the mainnet pool. the mock charges no fee on liquidity and has no
+`remove_liquidity_imbalance`: the admin fee terms of `AddLiquidity` and
+`RemoveLiquidityImbalance` are not exercised.
+
+    mirror = StableSwapMirror.seed(w3, pool)
+    mirror.sync()  # apply the logs up to the latest block
+    mirror.get_dy(1, 0, 10 ** 18)
+"""
+from dataclasses import dataclass, field
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+N_COINS = 2
+A_PRECISION = 100
+FEE_DENOMINATOR = 10 ** 10
+
+# ~1 hour of blocks. stETH rebases once a day
+DEFAULT_MAX_AGE = 300
+
+TOKEN_EXCHANGE = Web3.keccak(text="TokenExchange(address,int128,uint256,int128,uint256)")
+ADD_LIQUIDITY = Web3.keccak(text="AddLiquidity(address,uint256[2],uint256[2],uint256,uint256)")
+REMOVE_LIQUIDITY = Web3.keccak(text="RemoveLiquidity(address,uint256[2],uint256[2],uint256)")
+REMOVE_LIQUIDITY_IMBALANCE = Web3.keccak(text="RemoveLiquidityImbalance(address,uint256[2],uint256[2],uint256,uint256)")
+
+
+class OutOfSync(Exception):
+    pass
+
+
+# ---- StableSwap math ----
+
+
+def get_D(xp, amp):
+    S = sum(xp)
+    if S == 0:
+        return 0
+
+    D = S
+    Ann = amp * N_COINS
+    for _ in range(255):
+        D_P = D
+        for x in xp:
+            D_P = D_P * D // (x * N_COINS + 1)  # +1 is to prevent /0
+        Dprev = D
+        D = (Ann * S // A_PRECISION + D_P * N_COINS) * D // ((Ann - A_PRECISION) * D // A_PRECISION + (N_COINS + 1) * D_P)
+        # Equality with the precision of 1
+        if abs(D - Dprev) <= 1:
+            return D
+    raise ArithmeticError("D not converged")
+
+
+def get_y(x, xp, amp):
+    """new balance of the output coin for a new balance `x` of the input coin"""
+    D = get_D(xp, amp)
+    Ann = amp * N_COINS
+
+    c = D * D // (x * N_COINS)
+    c = c * D * A_PRECISION // (Ann * N_COINS)
+    b = x + D * A_PRECISION // Ann
+
+    y = D
+    for _ in range(255):
+        y_prev = y
+        y = (y * y + c) // (2 * y + b - D)
+        # Equality with the precision of 1
+        if abs(y - y_prev) <= 1:
+            return y
+    raise ArithmeticError("y not converged")
+
+
+def exchange_amounts(xp, amp, fee, i, j, dx):
+    """(dy, dy_fee) of an exchange of `dx` of coin `i` for coin `j`"""
+    if i == j or not (0 <= i < N_COINS and 0 <= j < N_COINS):
+        raise ValueError("invalid coin")
+    y = get_y(xp[i] + dx, xp, amp)
+    dy = xp[j] - y - 1
+    if dy < 0:
+        # reverts on-chain
+        raise ArithmeticError("dy underflow")
+    dy_fee = dy * fee // FEE_DENOMINATOR
+    return dy - dy_fee, dy_fee
+
+
+# ---- mirror ----
+
+
+def _call(w3, to, signature, *args, block="latest"):
+    data = Web3.keccak(text=signature)[:4] + b"".join(a.to_bytes(32, "big") for a in args)
+    return int.from_bytes(bytes(w3.eth.call({"to": to, "data": data}, block))[:32], "big")
+
+
+def _words(data):
+    data = bytes(HexBytes(data))
+    return [int.from_bytes(data[k : k + 32], "big") for k in range(0, len(data), 32)]
+
+
+def _int128(word):
+    return word - 2 ** 256 if word >= 2 ** 255 else word
+
+
+@dataclass
+class StableSwapMirror:
+    balances: list
+    # A * A_PRECISION
+    amp: int
+    fee: int
+    admin_fee: int
+    pool: str = None
+    w3: object = field(default=None, repr=False)
+    # last block applied
+    block: int = None
+    seeded_at: int = None
+    # None: no bound
+    max_age: int = DEFAULT_MAX_AGE
+    # A ramp in progress at the last read
+    ramping: bool = False
+    # state reads after the first one
+    resyncs: int = 0
+
+    @classmethod
+    def seed(cls, w3, pool, block=None, max_age=DEFAULT_MAX_AGE):
+        mirror = cls([0] * N_COINS, 0, 0, 0, Web3.toChecksumAddress(pool), w3, max_age=max_age)
+        mirror._read(w3.eth.block_number if block is None else block)
+        return mirror
+
+    def _read(self, block):
+        pool = self.pool
+        self.balances = [_call(self.w3, pool, "balances(uint256)", k, block=block) for k in range(N_COINS)]
+        self.amp = _call(self.w3, pool, "A_precise()", block=block)
+        self.fee = _call(self.w3, pool, "fee()", block=block)
+        self.admin_fee = _call(self.w3, pool, "admin_fee()", block=block)
+        future_A_time = _call(self.w3, pool, "future_A_time()", block=block)
+        self.ramping = future_A_time > self.w3.eth.get_block(block)["timestamp"]
+        self.block = self.seeded_at = block
+
+    def resync(self, block=None):
+        self.resyncs += 1
+        self._read(self.w3.eth.block_number if block is None else block)
+
+    # ---- quotes ----
+
+    def get_dy(self, i, j, dx):
+        return exchange_amounts(self.balances, self.amp, self.fee, i, j, dx)[0]
+
+    def get_D(self):
+        return get_D(self.balances, self.amp)
+
+    # ---- logs ----
+
+    def apply(self, log):
+        """apply a log of the pool. raises `OutOfSync` if it can't be applied"""
+        topics = [HexBytes(t) for t in log["topics"]]
+        event = topics[0] if topics else None
+        words = _words(log["data"])
+
+        if event == TOKEN_EXCHANGE:
+            i, dx, j, tokens_bought = _int128(words[0]), words[1], _int128(words[2]), words[3]
+            dy, dy_fee = exchange_amounts(self.balances, self.amp, self.fee, i, j, dx)
+            if dy != tokens_bought:
+                raise OutOfSync(f"TokenExchange: quoted {dy}, logged {tokens_bought}")
+            self.balances[i] += dx
+            self.balances[j] -= dy + dy_fee * self.admin_fee // FEE_DENOMINATOR
+        elif event == ADD_LIQUIDITY:
+            amounts, fees = words[0:2], words[2:4]
+            for k in range(N_COINS):
+                self.balances[k] += amounts[k] - fees[k] * self.admin_fee // FEE_DENOMINATOR
+        elif event == REMOVE_LIQUIDITY:
+            for k in range(N_COINS):
+                self.balances[k] -= words[k]
+        elif event == REMOVE_LIQUIDITY_IMBALANCE:
+            amounts, fees = words[0:2], words[2:4]
+            for k in range(N_COINS):
+                self.balances[k] -= amounts[k] + fees[k] * self.admin_fee // FEE_DENOMINATOR
+        else:
+            raise OutOfSync(f"unmodelled log {event.hex() if event else None}")
+
+    def sync(self, to_block=None):
+        """apply the logs of the pool up to `to_block`. returns the number of logs applied"""
+        to_block = self.w3.eth.block_number if to_block is None else to_block
+        if to_block <= self.block:
+            return 0
+        if self.ramping or (self.max_age is not None and to_block - self.seeded_at >= self.max_age):
+            self.resync(to_block)
+            return 0
+
+        logs = self.w3.eth.get_logs({"address": self.pool, "fromBlock": self.block + 1, "toBlock": to_block})
+        try:
+            for log in logs:
+                self.apply(log)
+        except (OutOfSync, ArithmeticError):
+            self.resync(to_block)
+            return 0
+        self.block = to_block
+        return len(logs)
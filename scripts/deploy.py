@@ -1,69 +1,298 @@
-from pathlib import Path
+"""Batch deployment of tranche strategies from a YAML manifest.
+
+    brownie run scripts/deploy.py main deployments/example.yaml --network alchemy-mainnet-fork
+    DEPLOYER_PASSWORD=... brownie run scripts/deploy.py main deployments/example.yaml deployer --network mainnet
 
-from brownie import TracnheStrategy, StEthTrancheStrategy, accounts, config, network, project, web3
-from eth_utils import is_checksum_address
-import click
+Every entry of the manifest is checked before anything is deployed (vault
+`apiVersion` and `token`, IdleCDO `token`, tranche decimals...). Checks run
+in parallel. On a development network (local chain or mainnet-fork) the run
+is a dry run: nothing is published and `vault: new` deploys a fresh vault.
+Outside a dry run the deployer account is required and its password is read
+from `DEPLOYER_PASSWORD`.
+A JSON record of the deployments is written to `deployments/records/`
+after every deployment: if one fails, the record keeps the strategies already
+deployed and the failed entry with its error under `failed`.
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 
-from tests.conftest import sushiswap_router
+import yaml
+from brownie import (
+    ZERO_ADDRESS,
+    Contract,
+    StEthTrancheStrategy,
+    TrancheStrategy,
+    accounts,
+    config,
+    interface,
+    network,
+    project,
+)
+from brownie.exceptions import ProjectAlreadyLoaded
 
 API_VERSION = config["dependencies"][0].split("@")[-1]
-Vault = project.load(
-    Path.home() / ".brownie" / "packages" / config["dependencies"][0]
-).Vault
 
-sushiswap_router = "0xd9e1cE17f2641f24aE83637ab66a2cca9C378B9F"
+RECORDS_DIR = Path("deployments") / "records"
+
+WETH = "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2"
+STETH = "0xae7ab96520DE3A18E5e111B5EaAb095312D7fE84"
+
+STRATEGY_CONTRACTS = {
+    "TrancheStrategy": TrancheStrategy,
+    "StEthTrancheStrategy": StEthTrancheStrategy,
+}
+
+DEFAULTS = {
+    "contract": "TrancheStrategy",
+    "router": "0xd9e1cE17f2641f24aE83637ab66a2cca9C378B9F",  # sushiswap
+    "reward_tokens": [],
+    "gauge": ZERO_ADDRESS,
+    "distributor_proxy": ZERO_ADDRESS,
+    "health_check": "0xDDCea799fF1699e98EDF118e0629A974Df7DF012",
+    "publish_source": False,
+}
+
+VAULT_ABI = [
+    {
+        "name": name,
+        "inputs": [],
+        "outputs": [{"name": "", "type": output}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+    for name, output in (("apiVersion", "string"), ("token", "address"))
+]
+
+GAUGE_ABI = [
+    {
+        "name": "lp_token",
+        "inputs": [],
+        "outputs": [{"name": "", "type": "address"}],
+        "stateMutability": "view",
+        "type": "function",
+    }
+]
+
+
+class PreflightError(Exception):
+    pass
+
+
+def load_manifest(path):
+    with open(path) as fp:
+        manifest = yaml.safe_load(fp)
+
+    defaults = {**DEFAULTS, **manifest.get("defaults", {})}
+    entries = [{**defaults, **entry} for entry in manifest["strategies"]]
 
+    names = [entry["name"] for entry in entries]
+    if len(set(names)) != len(names):
+        raise PreflightError("duplicated strategy names in manifest")
+    return entries
 
-def get_address(msg: str, default: str = None) -> str:
-    val = click.prompt(msg, default=default)
 
-    # Keep asking user for click.prompt until it passes
-    while True:
+def is_dry_run():
+    active = network.show_active()
+    return active == "development" or "fork" in active
 
-        if is_checksum_address(val):
-            return val
-        elif addr := web3.ens.address(val):
-            click.echo(f"Found ENS '{val}' [{addr}]")
-            return addr
 
-        click.echo(
-            f"I'm sorry, but '{val}' is not a checksummed address or valid ENS record"
+def _vault_container():
+    path = Path.home() / ".brownie" / "packages" / config["dependencies"][0]
+    try:
+        return project.load(path).Vault
+    except ProjectAlreadyLoaded:
+        return next(p for p in project.get_loaded_projects() if p._path == path).Vault
+
+
+def _check(condition, entry, message):
+    if not condition:
+        raise PreflightError(f"{entry['name']}: {message}")
+
+
+def preflight_entry(entry):
+    """read on-chain state needed to deploy `entry` and validate the manifest"""
+    _check(entry["contract"] in STRATEGY_CONTRACTS, entry, f"unknown contract {entry['contract']}")
+    _check(entry["tranche"] in ("AA", "BB"), entry, f"tranche must be AA or BB, got {entry['tranche']}")
+
+    idle_cdo = interface.IIdleCDO(entry["idle_cdo"])
+    is_AA = entry["tranche"] == "AA"
+    tranche = interface.IERC20Metadata(idle_cdo.AATranche() if is_AA else idle_cdo.BBTranche())
+    underlying = idle_cdo.token()
+    state = {
+        "tranche": tranche.address,
+        "tranche_symbol": tranche.symbol(),
+        "tranche_decimals": tranche.decimals(),
+        "cdo_token": underlying,
+    }
+    _check(state["tranche_decimals"] == 18, entry, "tranche must have 18 decimals")
+
+    if entry["vault"] != "new":
+        vault = Contract.from_abi("Vault", entry["vault"], VAULT_ABI, persist=False)
+        state["vault_api_version"] = vault.apiVersion()
+        state["want"] = vault.token()
+        _check(
+            state["vault_api_version"] == API_VERSION,
+            entry,
+            f"vault api {state['vault_api_version']} != {API_VERSION}",
         )
-        # NOTE: Only display default once
-        val = click.prompt(msg)
+    else:
+        _check(is_dry_run(), entry, "`vault: new` is only allowed on a development network")
+        state["want"] = WETH if entry["contract"] == "StEthTrancheStrategy" else underlying
 
+    if entry["contract"] == "StEthTrancheStrategy":
+        _check(state["want"] == WETH, entry, "want must be WETH")
+        _check(underlying == STETH, entry, "IdleCDO token must be stETH")
+    else:
+        _check(state["want"] == underlying, entry, "want must be the IdleCDO token")
 
-def main():
-    print(f"You are using the '{network.show_active()}' network")
-    dev = accounts.load(click.prompt(
-        "Account", type=click.Choice(accounts.load())))
-    print(f"You are using: 'dev' [{dev.address}]")
+    if entry["gauge"] != ZERO_ADDRESS:
+        gauge = Contract.from_abi("Gauge", entry["gauge"], GAUGE_ABI, persist=False)
+        _check(gauge.lp_token() == tranche.address, entry, "gauge does not stake the tranche")
+
+    return state
+
+
+def preflight(entries, max_workers=8):
+    """run `preflight_entry` for every entry in parallel. raise if any entry fails"""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(preflight_entry, entry) for entry in entries]
 
-    if input("Is there a Vault for this strategy already? y/[N]: ").lower() == "y":
-        vault = Vault.at(get_address("Deployed Vault: "))
-        assert vault.apiVersion() == API_VERSION
+    states, errors = [], []
+    for future in futures:
+        try:
+            states.append(future.result())
+        except Exception as e:
+            states.append(None)
+            errors.append(str(e))
+
+    if errors:
+        raise PreflightError("\n".join(errors))
+    return states
+
+
+def deploy_strategy(entry, state, deployer, dry_run):
+    vault = entry["vault"]
+    if vault == "new":
+        vault = _deploy_vault(state["want"], deployer).address
+
+    Strategy = STRATEGY_CONTRACTS[entry["contract"]]
+    args = [
+        vault,
+        entry.get("strategist", deployer.address),
+        entry.get("rewards", deployer.address),
+        entry.get("keeper", deployer.address),
+        entry["idle_cdo"],
+        entry["tranche"] == "AA",
+        entry["router"],
+        entry["reward_tokens"],
+        entry["gauge"],
+        entry["distributor_proxy"],
+        entry["health_check"],
+    ]
+    if entry.get("clone_of"):
+        # EIP-1167 clone of an already deployed strategy
+        tx = Strategy.at(entry["clone_of"]).cloneTrancheStrategy(*args, {"from": deployer})
+        strategy = Strategy.at(tx.events["Cloned"]["clone"])
     else:
-        print("You should deploy one vault using scripts from Vault project")
-        return  # TODO: Deploy one using scripts from Vault project
-
-    tranche_type = input(
-        "Is there a Vault for this strategy already? y/[N]: ").upper()
-    assert tranche_type == "AA" or tranche_type == "BB"
-    idleCDO = input("Input IdleCDO")
-    print(
-        f"""
-    Strategy Parameters
-
-       api: {API_VERSION}
-     token: {vault.token()}
-      name: '{vault.name()}'
-    symbol: '{vault.symbol()}'
-    """
-    )
-    publish_source = click.confirm("Verify source on etherscan?")
-    if input("Deploy Strategy? y/[N]: ").lower() != "y":
-        return
-
-    is_AA = tranche_type == "AA"
-    strategy = TracnheStrategy.deploy(vault, idleCDO, is_AA, sushiswap_router, {
-        "from": dev}, publish_source=publish_source)
+        strategy = Strategy.deploy(
+            *args, {"from": deployer}, publish_source=entry["publish_source"] and not dry_run
+        )
+        tx = strategy.tx
+
+    return {
+        "name": entry["name"],
+        "contract": entry["contract"],
+        "address": strategy.address,
+        "vault": vault,
+        "idle_cdo": entry["idle_cdo"],
+        "tranche_type": entry["tranche"],
+        "tranche": state["tranche"],
+        "gauge": entry["gauge"],
+        "clone_of": entry.get("clone_of"),
+        "constructor_args": [str(a) if not isinstance(a, (bool, list)) else a for a in args],
+        "tx": tx.txid,
+        "block": tx.block_number,
+        "gas_used": tx.gas_used,
+    }
+
+
+def _deploy_vault(token, deployer):
+    vault = _vault_container().deploy({"from": deployer})
+    vault.initialize(token, deployer, deployer, "", "", deployer, deployer, {"from": deployer})
+    return vault
+
+
+def deploy(entries, deployer, dry_run=None, records_dir=RECORDS_DIR):
+    """deploy every entry of the manifest. returns the deployment record, written to `records_dir` as it goes"""
+    if dry_run is None:
+        dry_run = is_dry_run()
+
+    started = time.time()
+    states = preflight(entries)
+
+    record = {
+        "network": network.show_active(),
+        "chain_id": network.chain.id,
+        "dry_run": dry_run,
+        "api_version": API_VERSION,
+        "deployer": deployer.address,
+        "timestamp": int(started),
+        "preflight": {entry["name"]: state for entry, state in zip(entries, states)},
+        "deployments": [],
+        "failed": None,
+    }
+    for entry, state in zip(entries, states):
+        try:
+            record["deployments"].append(deploy_strategy(entry, state, deployer, dry_run))
+        except Exception as e:
+            # the strategies already deployed are on-chain: keep them in the record
+            record["failed"] = {"name": entry["name"], "error": f"{type(e).__name__}: {e}"}
+            raise
+        finally:
+            write_record(record, records_dir)
+    return record
+
+
+def record_path(record, records_dir=RECORDS_DIR):
+    suffix = "-dry-run" if record["dry_run"] else ""
+    return Path(records_dir) / f"{record['network']}-{record['timestamp']}{suffix}.json"
+
+
+def write_record(record, records_dir=RECORDS_DIR):
+    path = record_path(record, records_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w") as fp:
+        json.dump(record, fp, indent=2)
+    return path
+
+
+def load_deployer(account, dry_run):
+    """`accounts[0]` in a dry run without `account`, else the brownie account `account`
+    unlocked with the `DEPLOYER_PASSWORD` environment variable, without prompting"""
+    if account is None:
+        if dry_run:
+            return accounts[0]
+        raise ValueError(f"no deployer account on '{network.show_active()}': pass a brownie account id")
+    password = os.environ.get("DEPLOYER_PASSWORD")
+    if password is None:
+        raise ValueError("DEPLOYER_PASSWORD is not set")
+    return accounts.load(account, password=password)
+
+
+def main(manifest_path, account=None):
+    print(f"You are using the '{network.show_active()}' network")
+    entries = load_manifest(manifest_path)
+
+    dry_run = is_dry_run()
+    deployer = load_deployer(account, dry_run)
+    print(f"Deploying {len(entries)} strategies from '{deployer.address}' (dry run: {dry_run})")
+
+    record = deploy(entries, deployer, dry_run)
+    path = record_path(record)
+
+    for deployment in record["deployments"]:
+        print(f"{deployment['name']}: {deployment['contract']} at {deployment['address']}")
+    print(f"Deployment record: {path}")
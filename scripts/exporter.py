@@ -0,0 +1,381 @@
+"""Prometheus exporter for a fleet of tranche strategies.
+
+Views of every strategy are cached and re-read only when a log touching them
+shows up, instead of polling `estimatedTotalAssets()` and friends every block:
+
+    field            re-read on
+    price_feed       every block: the stETH price feed has no logs
+    staked           gauge Deposit/Withdraw/Transfer and tranche transfers of the strategy
+    unstaked         tranche transfers of the strategy
+    pending_rewards  gauge logs of the strategy
+    total_assets     any of the above, logs of the IdleCDO, tranche mints/burns,
+                     want transfers of the strategy and `StrategyReported`
+
+`total_debt` is taken from the `StrategyReported` logs of the vault.
+IdleCDO interest accrues without logs: `max_age` bounds how many blocks a
+field is served from the cache.
+
+    python scripts/exporter.py --rpc http://127.0.0.1:8545 --config keeper.yaml --port 9100
+
+The config is the keeper one (scripts/keeper.py), only `name` and `address` of
+the strategies are used.
+"""
+import argparse
+import logging
+import os
+import sys
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from hexbytes import HexBytes
+from web3 import HTTPProvider, Web3
+
+try:
+    from scripts.keeper import JsonFormatter, load_config
+except ImportError:  # python scripts/exporter.py
+    from keeper import JsonFormatter, load_config
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+TRANSFER = Web3.keccak(text="Transfer(address,address,uint256)")
+DEPOSIT = Web3.keccak(text="Deposit(address,uint256)")
+WITHDRAW = Web3.keccak(text="Withdraw(address,uint256)")
+STRATEGY_REPORTED = Web3.keccak(text="StrategyReported(address,uint256,uint256,uint256,uint256,uint256,uint256,uint256,uint256)")
+
+# read in this order: a price feed or gauge change invalidates the fields after it
+FIELDS = ("price_feed", "staked", "unstaked", "pending_rewards", "total_assets")
+
+# blocks. None: only logs invalidate the field
+DEFAULT_MAX_AGE = {
+    "price_feed": 1,
+    "staked": None,
+    "unstaked": None,
+    "pending_rewards": 50,
+    "total_assets": 50,
+}
+
+# LiquidityGaugeV3
+MAX_REWARDS = 8
+
+logger = logging.getLogger("exporter")
+
+
+def _log(event, level=logging.INFO, **fields):
+    logger.log(level, event, extra={"fields": fields})
+
+
+def _topic_address(topic):
+    return Web3.toChecksumAddress("0x" + bytes(HexBytes(topic))[-20:].hex())
+
+
+def _address_topic(address):
+    return "0x" + "00" * 12 + address[2:].lower()
+
+
+def _word(data, index):
+    data = bytes(HexBytes(data))
+    return int.from_bytes(data[index * 32 : (index + 1) * 32], "big")
+
+
+def _encode(arg):
+    return (int(arg, 16) if isinstance(arg, str) else arg).to_bytes(32, "big")
+
+
+@dataclass
+class StrategyState:
+    name: str
+    address: str
+    vault: str = None
+    want: str = None
+    tranche: str = None
+    idle_cdo: str = None
+    gauge: str = None
+    price_feed: str = None
+    want_decimals: int = 18
+    # token => decimals
+    reward_tokens: dict = field(default_factory=dict)
+    total_debt: int = None
+    values: dict = field(default_factory=dict)
+    # field => block of the last read
+    read_at: dict = field(default_factory=dict)
+    stale: set = field(default_factory=lambda: set(FIELDS))
+    errors: int = 0
+
+    def invalidate(self, *fields):
+        self.stale.update(fields)
+
+
+class StateExporter:
+    def __init__(self, w3, strategies, max_age=None):
+        self.w3 = w3
+        self.states = [StrategyState(s.name, Web3.toChecksumAddress(s.address)) for s in strategies]
+        self.max_age = {**DEFAULT_MAX_AGE, **(max_age or {})}
+        # last block processed
+        self.block = None
+        # eth_call count
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    # ---- views ----
+
+    def _call(self, to, signature, *args, block="latest"):
+        data = Web3.keccak(text=signature)[:4] + b"".join(_encode(a) for a in args)
+        self.calls += 1
+        return bytes(self.w3.eth.call({"to": to, "data": data}, block))
+
+    def _uint(self, to, signature, *args, block="latest"):
+        return _word(self._call(to, signature, *args, block=block), 0)
+
+    def _address(self, to, signature, *args, block="latest"):
+        return _topic_address(self._call(to, signature, *args, block=block)[:32])
+
+    def _load(self, state, block):
+        """addresses of the strategy. the gauge is re-read with `staked`"""
+        state.vault = self._address(state.address, "vault()", block=block)
+        state.want = self._address(state.address, "want()", block=block)
+        state.tranche = self._address(state.address, "tranche()", block=block)
+        state.idle_cdo = self._address(state.address, "idleCDO()", block=block)
+        state.want_decimals = self._uint(state.want, "decimals()", block=block)
+        try:
+            state.price_feed = self._address(state.address, "priceFeed()", block=block)
+        except Exception:
+            # not a stETH strategy
+            state.price_feed = None
+        # StrategyParams: performanceFee, activation, debtRatio, minDebtPerHarvest, maxDebtPerHarvest, lastReport, totalDebt...
+        state.total_debt = _word(self._call(state.vault, "strategies(address)", state.address, block=block), 6)
+
+    def _load_rewards(self, state, block):
+        state.reward_tokens = {}
+        if state.gauge == ZERO_ADDRESS:
+            return
+        for i in range(MAX_REWARDS):
+            token = self._address(state.gauge, "reward_tokens(uint256)", i, block=block)
+            if token == ZERO_ADDRESS:
+                break
+            state.reward_tokens[token] = self._uint(token, "decimals()", block=block)
+
+    def _read(self, state, name, block):
+        if name == "price_feed":
+            if state.price_feed is None:
+                return None
+            result = self._call(state.price_feed, "current_price()", block=block)
+            return _word(result, 0), _word(result, 1) == 1
+        if name == "staked":
+            gauge = self._address(state.address, "gauge()", block=block)
+            if gauge != state.gauge:
+                state.gauge = gauge
+                self._load_rewards(state, block)
+                state.invalidate("pending_rewards")
+            return 0 if gauge == ZERO_ADDRESS else self._uint(gauge, "balanceOf(address)", state.address, block=block)
+        if name == "unstaked":
+            return self._uint(state.tranche, "balanceOf(address)", state.address, block=block)
+        if name == "pending_rewards":
+            return {
+                token: self._uint(state.gauge, "claimable_reward(address,address)", state.address, token, block=block)
+                for token in state.reward_tokens
+            }
+        if name == "total_assets":
+            return self._uint(state.address, "estimatedTotalAssets()", block=block)
+        raise ValueError(name)
+
+    # ---- logs ----
+
+    def _logs(self, from_block, to_block):
+        watched = set()
+        for s in self.states:
+            watched.update(a for a in (s.vault, s.idle_cdo, s.tranche, s.gauge) if a not in (None, ZERO_ADDRESS))
+        params = {"fromBlock": from_block, "toBlock": to_block}
+        logs = list(self.w3.eth.get_logs({**params, "address": sorted(watched)})) if watched else []
+
+        # want transfers of the strategies only: want may be WETH
+        wants = sorted({s.want for s in self.states})
+        strategies = [_address_topic(s.address) for s in self.states]
+        transfer = Web3.toHex(TRANSFER)
+        for topics in ([transfer, strategies], [transfer, None, strategies]):
+            logs += self.w3.eth.get_logs({**params, "address": wants, "topics": topics})
+        return logs
+
+    def _apply(self, entry):
+        address = Web3.toChecksumAddress(entry["address"])
+        topics = [HexBytes(t) for t in entry["topics"]]
+        if not topics:
+            return
+        event = topics[0]
+        parties = {_topic_address(t) for t in topics[1:3]}
+
+        for s in self.states:
+            if address == s.vault and event == STRATEGY_REPORTED and _topic_address(topics[1]) == s.address:
+                s.total_debt = _word(entry["data"], 5)
+                s.invalidate("total_assets")
+            if address == s.gauge and event in (DEPOSIT, WITHDRAW, TRANSFER) and s.address in parties:
+                s.invalidate("staked", "pending_rewards", "total_assets")
+            if address == s.tranche and event == TRANSFER:
+                if s.address in parties:
+                    s.invalidate("staked", "unstaked", "total_assets")
+                elif ZERO_ADDRESS in parties:
+                    # IdleCDO deposits and withdrawals update the tranche prices
+                    s.invalidate("total_assets")
+            if address == s.idle_cdo:
+                s.invalidate("total_assets")
+            if address == s.want and event == TRANSFER and s.address in parties:
+                s.invalidate("total_assets")
+
+    # ---- refresh ----
+
+    def _expired(self, state, name, block):
+        max_age = self.max_age[name]
+        return max_age is not None and name in state.read_at and block - state.read_at[name] >= max_age
+
+    def refresh(self, block=None):
+        """process logs up to `block` and re-read the invalidated fields. returns `{name: [fields re-read]}`"""
+        block = self.w3.eth.block_number if block is None else block
+        with self.lock:
+            if self.block is None:
+                for s in self.states:
+                    self._load(s, block)
+            elif block > self.block:
+                for entry in self._logs(self.block + 1, block):
+                    self._apply(entry)
+
+            reads = {}
+            for s in self.states:
+                for name in FIELDS:
+                    if name not in s.stale and not self._expired(s, name, block):
+                        continue
+                    reads.setdefault(s.name, []).append(name)
+                    try:
+                        value = self._read(s, name, block)
+                    except Exception as e:
+                        # e.g. `strat/price-unsafe`. retried next block
+                        s.errors += 1
+                        s.values.pop(name, None)
+                        _log("read_error", logging.WARNING, strategy=s.name, field=name, block=block, error=str(e))
+                        continue
+                    if name == "price_feed" and s.values.get(name) != value:
+                        s.invalidate("total_assets")
+                    s.values[name] = value
+                    s.read_at[name] = block
+                    s.stale.discard(name)
+            self.block = block
+        return reads
+
+    # ---- metrics ----
+
+    def render(self):
+        """Prometheus text format"""
+        metrics = {
+            "tranche_strategy_total_assets": ("gauge", "estimatedTotalAssets() in want", []),
+            "tranche_strategy_total_debt": ("gauge", "total debt in want, from StrategyReported", []),
+            "tranche_strategy_tranches_staked": ("gauge", "tranches staked in the gauge", []),
+            "tranche_strategy_tranches_unstaked": ("gauge", "tranches held by the strategy", []),
+            "tranche_strategy_pending_rewards": ("gauge", "claimable gauge rewards", []),
+            "tranche_strategy_steth_price": ("gauge", "stETH price feed, in ETH", []),
+            "tranche_strategy_price_feed_safe": ("gauge", "1 if the stETH price feed is safe", []),
+            "tranche_strategy_read_errors_total": ("counter", "failed view calls", []),
+        }
+
+        def sample(metric, state, value, **labels):
+            labels = {"strategy": state.name, "address": state.address, **labels}
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+            metrics[metric][2].append(f"{metric}{{{label_str}}} {value}")
+
+        with self.lock:
+            for s in self.states:
+                scale = 10 ** s.want_decimals
+                if "total_assets" in s.values:
+                    sample("tranche_strategy_total_assets", s, s.values["total_assets"] / scale)
+                if s.total_debt is not None:
+                    sample("tranche_strategy_total_debt", s, s.total_debt / scale)
+                # tranches have 18 decimals
+                if "staked" in s.values:
+                    sample("tranche_strategy_tranches_staked", s, s.values["staked"] / 1e18)
+                if "unstaked" in s.values:
+                    sample("tranche_strategy_tranches_unstaked", s, s.values["unstaked"] / 1e18)
+                for token, amount in s.values.get("pending_rewards", {}).items():
+                    sample("tranche_strategy_pending_rewards", s, amount / 10 ** s.reward_tokens[token], token=token)
+                if s.values.get("price_feed") is not None:
+                    price, is_safe = s.values["price_feed"]
+                    sample("tranche_strategy_steth_price", s, price / 1e18)
+                    sample("tranche_strategy_price_feed_safe", s, int(is_safe))
+                sample("tranche_strategy_read_errors_total", s, s.errors)
+            block, calls = self.block, self.calls
+
+        lines = []
+        for metric, (kind, help_text, samples) in metrics.items():
+            if samples:
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}", *samples]
+        lines += [
+            "# HELP tranche_exporter_block last block processed",
+            "# TYPE tranche_exporter_block gauge",
+            f"tranche_exporter_block {block}",
+            "# HELP tranche_exporter_calls_total eth_call sent",
+            "# TYPE tranche_exporter_calls_total counter",
+            f"tranche_exporter_calls_total {calls}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port, host=""):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = exporter.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+    def run(self, poll_interval=12, stop=None):
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            try:
+                reads = self.refresh()
+                _log("refresh", block=self.block, reads=reads, calls=self.calls)
+            except Exception as e:
+                # e.g. the node is down. keep serving the cache
+                _log("refresh_error", logging.ERROR, error=str(e))
+            stop.wait(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc", default=os.environ.get("WEB3_PROVIDER_URI", "http://127.0.0.1:8545"))
+    parser.add_argument("--config", required=True, help="fleet config (yaml)")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--poll-interval", type=float, default=12)
+    parser.add_argument("--max-age", type=int, default=DEFAULT_MAX_AGE["total_assets"], help="blocks, for total assets and rewards")
+    args = parser.parse_args()
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    strategies, _ = load_config(args.config)
+    exporter = StateExporter(
+        Web3(HTTPProvider(args.rpc)),
+        strategies,
+        max_age={"total_assets": args.max_age, "pending_rewards": args.max_age},
+    )
+    exporter.serve(args.port)
+    _log("start", port=args.port, strategies=[s.name for s in strategies])
+    try:
+        exporter.run(args.poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Record/replay cache for mainnet-fork runs.
+
+A JSON-RPC proxy between ganache and the upstream node. Reads at the pinned
+fork block (`eth_getStorageAt`, `eth_getCode`, `eth_call`...) are stored in a
+content-addressed on-disk cache, keyed by the fork block, and later runs are
+served from it. Etherscan requests (ABI/source fetches made by `Contract(...)`
+with `autofetch_sources`) are cached the same way under `/explorer`.
+
+    python scripts/fork_cache.py --upstream https://eth-mainnet.alchemyapi.io/v2/$ALCHEMY_API_KEY \\
+        --block $FORK_BLOCK_NUMBER --explorer https://api.etherscan.io/api
+
+Then point the brownie networks at the proxy (see README). With `--offline`
+cache misses are errors instead of upstream requests.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+DEFAULT_CACHE_DIR = Path(".fork-cache")
+
+# method => index of the block parameter, None if the result does not depend on a block
+CACHEABLE_METHODS = {
+    "eth_chainId": None,
+    "net_version": None,
+    "eth_getCode": 1,
+    "eth_getBalance": 1,
+    "eth_getTransactionCount": 1,
+    "eth_getStorageAt": 2,
+    "eth_call": 1,
+    "eth_getBlockByNumber": 0,
+    "eth_getBlockByHash": None,
+    "eth_getTransactionByHash": None,
+    "eth_getTransactionReceipt": None,
+}
+
+EXPLORER_SECRET_PARAMS = {"apikey"}
+
+
+class CacheMiss(Exception):
+    pass
+
+
+def content_key(*parts):
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ForkCache:
+    def __init__(self, upstream, block, cache_dir=DEFAULT_CACHE_DIR, explorer=None, offline=False):
+        self.upstream = upstream
+        self.block = int(block)
+        self.explorer = explorer
+        self.offline = offline
+        self.root = Path(cache_dir)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._request_id = 0
+
+    @property
+    def block_tag(self):
+        return hex(self.block)
+
+    # ---- storage ----
+
+    def _path(self, namespace, key):
+        return self.root / namespace / key[:2] / f"{key}.json"
+
+    def _load(self, namespace, key):
+        path = self._path(namespace, key)
+        if not path.exists():
+            return None
+        with path.open() as fp:
+            return json.load(fp)
+
+    def _store(self, namespace, key, value):
+        path = self._path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # atomic: concurrent test workers can share the cache
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "w") as fp:
+            json.dump(value, fp)
+        os.replace(tmp, path)
+
+    def _cached(self, namespace, key, fetch):
+        entry = self._load(namespace, key)
+        if entry is not None:
+            with self._lock:
+                self.hits += 1
+            return entry
+        if self.offline:
+            raise CacheMiss(key)
+        entry = fetch()
+        self._store(namespace, key, entry)
+        with self._lock:
+            self.misses += 1
+        return entry
+
+    # ---- json rpc ----
+
+    def _pin(self, method, params):
+        """Replace block tags by the fork block. Returns None if not cacheable."""
+        if method == "eth_blockNumber":
+            return params
+        if method not in CACHEABLE_METHODS:
+            return None
+
+        idx = CACHEABLE_METHODS[method]
+        if idx is None:
+            return params
+
+        params = list(params)
+        if len(params) <= idx or params[idx] in ("latest", "pending", "safe", "finalized"):
+            params[idx:] = [self.block_tag] + params[idx + 1 :]
+        elif params[idx] == "earliest":
+            return params
+
+        block = params[idx]
+        if not isinstance(block, str) or int(block, 16) > self.block:
+            return None
+        return params
+
+    def _upstream_rpc(self, method, params):
+        with self._lock:
+            self._request_id += 1
+            request_id = self._request_id
+        body = json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params})
+        request = urllib.request.Request(
+            self.upstream, data=body.encode(), headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.load(response)
+
+    def rpc(self, payload):
+        method = payload.get("method")
+        params = payload.get("params", [])
+        request_id = payload.get("id")
+
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": request_id, "result": self.block_tag}
+
+        pinned = self._pin(method, params)
+        try:
+            if pinned is None:
+                if self.offline:
+                    raise CacheMiss(method)
+                response = self._upstream_rpc(method, params)
+            else:
+                key = content_key(method, pinned)
+                response = self._cached(str(self.block), key, lambda: self._upstream_rpc(method, pinned))
+                if "error" in response:
+                    # do not replay errors. e.g. rate limits
+                    self._path(str(self.block), key).unlink()
+        except CacheMiss:
+            return {
+                "jsonrpc": "2.0",
+                "id": request_id,
+                "error": {"code": -32000, "message": f"fork-cache: miss for {method} (offline)"},
+            }
+
+        return {**response, "id": request_id}
+
+    # ---- explorer ----
+
+    def explorer_get(self, query):
+        params = sorted(
+            (k, v) for k, v in urllib.parse.parse_qsl(query) if k.lower() not in EXPLORER_SECRET_PARAMS
+        )
+        key = content_key("explorer", params)
+
+        def fetch():
+            url = f"{self.explorer}?{query}"
+            with urllib.request.urlopen(url) as response:
+                return json.load(response)
+
+        return self._cached("explorer", key, fetch)
+
+
+def make_handler(cache):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            if isinstance(payload, list):
+                self._send(200, [cache.rpc(p) for p in payload])
+            else:
+                self._send(200, cache.rpc(payload))
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            if not url.path.startswith("/explorer") or cache.explorer is None:
+                self._send(404, {"status": "0", "message": "NOTOK", "result": "fork-cache: unknown path"})
+                return
+            try:
+                self._send(200, cache.explorer_get(url.query))
+            except CacheMiss:
+                self._send(200, {"status": "0", "message": "NOTOK", "result": "fork-cache: miss (offline)"})
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(cache, host="127.0.0.1", port=8546):
+    return ThreadingHTTPServer((host, port), make_handler(cache))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--upstream", default=os.environ.get("FORK_UPSTREAM_RPC"), help="upstream JSON-RPC url")
+    parser.add_argument("--block", default=os.environ.get("FORK_BLOCK_NUMBER"), type=int, help="pinned fork block")
+    parser.add_argument("--explorer", default="https://api.etherscan.io/api", help="upstream explorer api url")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, type=Path)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", default=8546, type=int)
+    parser.add_argument("--offline", action="store_true", help="serve from the cache only")
+    args = parser.parse_args()
+
+    if args.block is None:
+        parser.error("--block or FORK_BLOCK_NUMBER is required: only a pinned fork can be cached")
+    if args.upstream is None and not args.offline:
+        parser.error("--upstream or FORK_UPSTREAM_RPC is required unless --offline")
+
+    cache = ForkCache(args.upstream, args.block, args.cache_dir, args.explorer, args.offline)
+    server = serve(cache, args.host, args.port)
+    print(f"fork-cache: block {args.block} on http://{args.host}:{args.port} ({'offline' if args.offline else 'record'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"fork-cache: {cache.hits} hits, {cache.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Decode `TrancheStrategy.harvestDryRun()`.
+
+`harvestDryRun()` runs `harvest()` and reverts with
+`HarvestDryRun(profit, loss, debtPayment, debtOutstanding, healthCheckPassed)`.
+
+    from scripts.harvest_dry_run import harvest_dry_run
+    result = harvest_dry_run(web3, strategy.address, keeper.address)
+    if result.loss > 0 or not result.health_check_passed:
+        ...
+"""
+from typing import NamedTuple
+
+from web3 import Web3
+
+SIGNATURE = "HarvestDryRun(uint256,uint256,uint256,uint256,bool)"
+SELECTOR = Web3.keccak(text=SIGNATURE)[:4]
+CALL_DATA = Web3.keccak(text="harvestDryRun()")[:4]
+
+# Error(string)
+ERROR_SELECTOR = Web3.keccak(text="Error(string)")[:4]
+
+
+class HarvestDryRun(NamedTuple):
+    profit: int
+    loss: int
+    debt_payment: int
+    debt_outstanding: int
+    health_check_passed: bool
+
+
+class HarvestDryRunReverted(Exception):
+    """the harvest itself reverts. `reason` is the revert string, if any"""
+
+    def __init__(self, reason, data=b""):
+        super().__init__(reason)
+        self.reason = reason
+        self.data = data
+
+
+def _to_bytes(data):
+    if isinstance(data, str):
+        return bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    return bytes(data)
+
+
+def decode_revert_reason(data):
+    data = _to_bytes(data)
+    if data[:4] != ERROR_SELECTOR:
+        return None
+    length = int.from_bytes(data[36:68], "big")
+    return data[68 : 68 + length].decode(errors="replace")
+
+
+def decode(data):
+    """decode the revert data of `harvestDryRun()`"""
+    data = _to_bytes(data)
+    if data[:4] != SELECTOR:
+        raise HarvestDryRunReverted(decode_revert_reason(data), data)
+
+    words = [int.from_bytes(data[i : i + 32], "big") for i in range(4, 4 + 5 * 32, 32)]
+    return HarvestDryRun(*words[:4], bool(words[4]))
+
+
+def _revert_data(error):
+    """revert data from a JSON-RPC error. geth and ganache put it in different places"""
+    data = error.get("data")
+    if isinstance(data, str):
+        return data
+    if isinstance(data, dict):
+        # ganache-cli: {"<tx hash>": {"error": "revert", "return": "0x..."}, "stack": ..., "name": ...}
+        if "data" in data:
+            return data["data"]
+        for value in data.values():
+            if isinstance(value, dict) and "return" in value:
+                return value["return"]
+    return None
+
+
+def harvest_dry_run(w3, strategy, keeper, block="latest"):
+    """`eth_call` `harvestDryRun()` from `keeper`. raise `HarvestDryRunReverted` if the harvest reverts"""
+    call = {"from": keeper, "to": strategy, "data": Web3.toHex(CALL_DATA)}
+    response = w3.provider.make_request("eth_call", [call, block])
+
+    if "error" not in response:
+        raise HarvestDryRunReverted("harvestDryRun did not revert", _to_bytes(response["result"]))
+
+    data = _revert_data(response["error"])
+    if data is None:
+        raise HarvestDryRunReverted(response["error"].get("message"))
+    return decode(data)
@@ -0,0 +1,275 @@
+"""Base fee aware harvest scheduler.
+
+Each strategy gets a window `[earliest, deadline]` for its next harvest:
+
+- `earliest`: `lastReport + minReportDelay`
+- `deadline`: `lastReport + maxReportDelay`, or earlier when the projected
+  unreported profit (`apr` of the strategy) reaches `max_unreported_profit`,
+  a fraction of the debt
+
+Inside the window a harvest is sent when the base fee is below a quantile of
+the recent base fees. The quantile rises to 1 as the deadline gets closer, so
+the harvest happens in the cheapest blocks seen so far and never after the
+deadline.
+
+    # record base fees with eth_feeHistory
+    python scripts/harvest_scheduler.py record --rpc $WEB3_PROVIDER_URI --blocks 216000 --out basefee.csv
+    # replay: harvest at the deadline vs scheduled harvests
+    python scripts/harvest_scheduler.py replay basefee.csv --max-report-delay 86400
+
+`ScheduledKeeper` hands the harvests to the keeper daemon (scripts/keeper.py):
+a strategy is harvested when `harvestTrigger` is true, in the block picked by
+the scheduler.
+"""
+import argparse
+import bisect
+import csv
+import logging
+from collections import deque
+from dataclasses import dataclass
+
+from web3 import HTTPProvider, Web3
+from web3.exceptions import ContractLogicError
+
+try:
+    from scripts.keeper import Keeper, log
+except ImportError:  # python scripts/harvest_scheduler.py
+    from keeper import Keeper, log
+
+YEAR = 365 * 24 * 3600
+
+# `harvest()` of StEthTrancheStrategy, from the mainnet-fork tests
+DEFAULT_HARVEST_GAS = 900_000
+
+
+@dataclass
+class HarvestWindow:
+    earliest: int
+    deadline: int
+
+
+def harvest_window(last_report, min_report_delay, max_report_delay, apr=0, max_unreported_profit=0):
+    """`apr` and `max_unreported_profit` are fractions, e.g. 0.05 and 0.001"""
+    earliest = last_report + min_report_delay
+    deadline = last_report + max_report_delay
+    if apr > 0 and max_unreported_profit > 0:
+        deadline = min(deadline, last_report + int(max_unreported_profit / apr * YEAR))
+    return HarvestWindow(earliest, max(deadline, earliest))
+
+
+class BaseFeeScheduler:
+    """
+    @param lookback seconds of base fee history. a day covers the daily cycle
+    @param min_quantile quantile of the history accepted at the start of the window
+    @param min_samples no decision on less history, harvest at the deadline only
+    @param window_start fraction of the window skipped. harvesting as soon as the
+        base fee dips would harvest more often than needed
+    """
+
+    def __init__(self, lookback=24 * 3600, min_quantile=0.1, min_samples=100, window_start=0.5):
+        self.lookback = lookback
+        self.window_start = window_start
+        self.min_quantile = min_quantile
+        self.min_samples = min_samples
+        self._history = deque()  # (timestamp, base_fee)
+        self._sorted = []
+
+    def observe(self, timestamp, base_fee):
+        self._history.append((timestamp, base_fee))
+        bisect.insort(self._sorted, base_fee)
+        while self._history[0][0] < timestamp - self.lookback:
+            _, old = self._history.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+
+    def threshold(self, progress):
+        """base fee accepted at `progress` (0 to 1) of the window"""
+        if len(self._sorted) < self.min_samples:
+            return 0
+        quantile = self.min_quantile + (1 - self.min_quantile) * progress ** 2
+        idx = min(int(quantile * len(self._sorted)), len(self._sorted) - 1)
+        return self._sorted[idx]
+
+    def should_harvest(self, window, timestamp, base_fee):
+        if timestamp >= window.deadline:
+            return True
+        start = window.earliest + int((window.deadline - window.earliest) * self.window_start)
+        if timestamp < start:
+            return False
+        progress = (timestamp - start) / max(window.deadline - start, 1)
+        # strictly cheaper: a flat base fee waits for the deadline
+        return base_fee < self.threshold(progress)
+
+
+# ---- replay ----
+
+
+def load_series(path):
+    with open(path) as fp:
+        return [(int(row["block"]), int(row["timestamp"]), int(row["base_fee"])) for row in csv.DictReader(fp)]
+
+
+def replay(series, min_report_delay, max_report_delay, apr=0, max_unreported_profit=0, harvest_gas=DEFAULT_HARVEST_GAS, scheduler=None):
+    """harvests of one strategy over `series` ([(block, timestamp, base_fee)]).
+
+    baseline: harvest in the first block past the deadline, as `harvestTrigger` does.
+    scheduled: `BaseFeeScheduler`. both start with a harvest in the first block.
+    """
+    scheduler = scheduler or BaseFeeScheduler()
+
+    def window(last_report):
+        return harvest_window(last_report, min_report_delay, max_report_delay, apr, max_unreported_profit)
+
+    start = series[0][1]
+    result = {}
+    for policy in ("baseline", "scheduled"):
+        last_report = start
+        harvests = []
+        for _, timestamp, base_fee in series:
+            if policy == "scheduled":
+                scheduler.observe(timestamp, base_fee)
+            w = window(last_report)
+            due = timestamp >= w.deadline if policy == "baseline" else scheduler.should_harvest(w, timestamp, base_fee)
+            if due:
+                harvests.append(base_fee)
+                last_report = timestamp
+        result[policy] = {
+            "harvests": len(harvests),
+            "gas_cost": sum(harvests) * harvest_gas,
+            "mean_base_fee": sum(harvests) // max(len(harvests), 1),
+        }
+
+    baseline, scheduled = result["baseline"]["mean_base_fee"], result["scheduled"]["mean_base_fee"]
+    result["savings_per_harvest"] = 1 - scheduled / baseline if baseline else 0
+    baseline, scheduled = result["baseline"]["gas_cost"], result["scheduled"]["gas_cost"]
+    result["savings"] = 1 - scheduled / baseline if baseline else 0
+    return result
+
+
+def record(w3, start_block, end_block, path, chunk=1024):
+    """base fee of every block in `[start_block, end_block)` to csv. timestamps are interpolated per chunk"""
+    with open(path, "w", newline="") as fp:
+        writer = csv.writer(fp)
+        writer.writerow(["block", "timestamp", "base_fee"])
+        for first in range(start_block, end_block, chunk):
+            count = min(chunk, end_block - first)
+            last = first + count - 1
+            history = w3.eth.fee_history(count, last, [])
+            t0 = w3.eth.get_block(first)["timestamp"]
+            t1 = w3.eth.get_block(last)["timestamp"]
+            # baseFeePerGas has one more entry: the block after `last`
+            for i, base_fee in enumerate(history["baseFeePerGas"][:count]):
+                writer.writerow([first + i, t0 + (t1 - t0) * i // max(count - 1, 1), base_fee])
+
+
+# ---- keeper ----
+
+
+class ScheduledKeeper(Keeper):
+    """Keeper harvesting in the window given by `BaseFeeScheduler`.
+
+    strategies may set `apr` and `max_unreported_profit` (see `harvest_window`)
+    """
+
+    def __init__(self, *args, scheduler=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scheduler = scheduler or BaseFeeScheduler()
+        self._block = None
+
+    async def _read_uint(self, address, signature, *args):
+        data = Web3.keccak(text=signature)[:4] + b"".join(int(a, 16).to_bytes(32, "big") for a in args)
+        result = await self._run(self.w3.eth.call, {"to": address, "data": data})
+        return [int.from_bytes(result[i : i + 32], "big") for i in range(0, len(result), 32)]
+
+    async def _vault_params(self, strategy):
+        """vault address and `vault.strategies(strategy)`"""
+        (vault,) = await self._read_uint(strategy.address, "vault()")
+        vault = Web3.toChecksumAddress("0x" + vault.to_bytes(20, "big").hex())
+        return vault, await self._read_uint(vault, "strategies(address)", strategy.address)
+
+    async def last_harvest(self, strategy):
+        """`lastHarvest()` of the strategy: the reports of `depositAndInvest` do not move the window"""
+        try:
+            (last_harvest,) = await self._read_uint(strategy.address, "lastHarvest()")
+            return last_harvest
+        except (ContractLogicError, ValueError):
+            # no zap (e.g. MultiTrancheStrategy): the last report of the vault
+            # StrategyParams: performanceFee, activation, debtRatio, minDebtPerHarvest, maxDebtPerHarvest, lastReport...
+            _, params = await self._vault_params(strategy)
+            return params[5]
+
+    async def window(self, strategy):
+        (min_delay,) = await self._read_uint(strategy.address, "minReportDelay()")
+        (max_delay,) = await self._read_uint(strategy.address, "maxReportDelay()")
+        return harvest_window(
+            await self.last_harvest(strategy),
+            min_delay,
+            max_delay,
+            getattr(strategy, "apr", 0),
+            getattr(strategy, "max_unreported_profit", 0),
+        )
+
+    async def check(self, strategy):
+        try:
+            # `harvestTrigger` decides if a harvest is due, the scheduler picks the block
+            if await self._trigger(strategy, "harvestTrigger"):
+                window = await self.window(strategy)
+                if self.scheduler.should_harvest(window, self._block["timestamp"], self._base_fee):
+                    return "harvest" if await self.passes_dry_run(strategy) else None
+            if strategy.tend and await self._trigger(strategy, "tendTrigger"):
+                return "tend"
+        except Exception as e:
+            log("trigger_error", logging.WARNING, strategy=strategy.name, error=str(e))
+        return None
+
+    async def tick(self):
+        self._block = await self._run(self.w3.eth.get_block, "latest")
+        # pre-London chains (e.g. ganache-cli): use the gas price
+        self._base_fee = self._block.get("baseFeePerGas") or await self._run(lambda: self.w3.eth.gas_price)
+        self.scheduler.observe(self._block["timestamp"], self._base_fee)
+        log("base_fee", block=self._block["number"], base_fee=self._base_fee)
+        return await super().tick()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rec = commands.add_parser("record", help="record base fees with eth_feeHistory")
+    rec.add_argument("--rpc", required=True)
+    rec.add_argument("--blocks", type=int, default=7 * 7200)
+    rec.add_argument("--end-block", type=int)
+    rec.add_argument("--out", required=True)
+
+    rep = commands.add_parser("replay", help="replay a recorded series")
+    rep.add_argument("series")
+    rep.add_argument("--min-report-delay", type=int, default=0)
+    rep.add_argument("--max-report-delay", type=int, default=86400)
+    rep.add_argument("--apr", type=float, default=0)
+    rep.add_argument("--max-unreported-profit", type=float, default=0)
+    rep.add_argument("--harvest-gas", type=int, default=DEFAULT_HARVEST_GAS)
+    rep.add_argument("--min-quantile", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        w3 = Web3(HTTPProvider(args.rpc))
+        end = args.end_block or w3.eth.block_number
+        record(w3, end - args.blocks, end, args.out)
+        return
+
+    result = replay(
+        load_series(args.series),
+        args.min_report_delay,
+        args.max_report_delay,
+        args.apr,
+        args.max_unreported_profit,
+        args.harvest_gas,
+        BaseFeeScheduler(min_quantile=args.min_quantile),
+    )
+    for policy in ("baseline", "scheduled"):
+        r = result[policy]
+        print(f"{policy:>9}: {r['harvests']} harvests, {r['gas_cost'] / 1e18:.4f} ETH, mean base fee {r['mean_base_fee'] / 1e9:.2f} gwei")
+    print(f"savings per harvest: {result['savings_per_harvest']:.1%}, total: {result['savings']:.1%}")
+
+
+if __name__ == "__main__":
+    main()
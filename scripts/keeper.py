@@ -0,0 +1,327 @@
+"""Keeper daemon for a fleet of tranche strategies.
+
+Polls `harvestTrigger` and `tendTrigger` of every strategy concurrently each
+`poll_interval` and sends `harvest()`/`tend()` from one keeper account.
+
+- nonces are assigned locally so transactions of one tick are in flight together
+- a transaction not mined within `confirm_timeout` is replaced with the same
+  nonce and a gas price bumped by `gas_bump`, up to `max_gas_price`. if it is
+  still not mined, the local nonce is synced again with the node
+- with `dry_run: true` harvests are simulated first (`harvestDryRun()`) and
+  skipped if they would revert, report a loss or fail the health check
+- every event is logged as one JSON object per line
+
+    python scripts/keeper.py --rpc http://127.0.0.1:8545 --config keeper.yaml
+
+`keeper.yaml`:
+
+    call_cost: 30000000000000000  # wei, passed to the triggers
+    poll_interval: 12
+    strategies:
+      - name: steth-AA
+        address: "0x..."
+        tend: false
+
+The keeper key is read from `KEEPER_PRIVATE_KEY`. Without it, `--from` must be
+an account unlocked on the node (e.g. ganache).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass
+from functools import partial
+
+import yaml
+from web3 import HTTPProvider, Web3
+from web3.exceptions import TransactionNotFound
+
+try:
+    from scripts.harvest_dry_run import HarvestDryRunReverted, harvest_dry_run
+except ImportError:  # python scripts/keeper.py
+    from harvest_dry_run import HarvestDryRunReverted, harvest_dry_run
+
+SELECTORS = {
+    name: Web3.keccak(text=signature)[:4]
+    for name, signature in (
+        ("harvestTrigger", "harvestTrigger(uint256)"),
+        ("tendTrigger", "tendTrigger(uint256)"),
+        ("harvest", "harvest()"),
+        ("tend", "tend()"),
+    )
+}
+
+logger = logging.getLogger("keeper")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {"ts": round(record.created, 3), "level": record.levelname.lower(), "event": record.getMessage()}
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, default=str)
+
+
+def log(event, level=logging.INFO, **fields):
+    logger.log(level, event, extra={"fields": fields})
+
+
+def bump_gas_price(gas_price, bump, max_gas_price):
+    """replacement transactions must pay at least 10% more"""
+    return min(max(int(gas_price * bump), gas_price * 11 // 10 + 1), max_gas_price)
+
+
+@dataclass
+class StrategyConfig:
+    name: str
+    address: str
+    tend: bool = False
+    # used by `ScheduledKeeper` (scripts/harvest_scheduler.py)
+    apr: float = 0
+    max_unreported_profit: float = 0
+
+
+class TransactionFailed(Exception):
+    pass
+
+
+class Keeper:
+    def __init__(
+        self,
+        w3,
+        account,
+        strategies,
+        private_key=None,
+        call_cost=0,
+        poll_interval=12,
+        gas_bump=1.125,
+        max_gas_price=500 * 10 ** 9,
+        gas_limit_margin=1.2,
+        confirm_timeout=60,
+        max_retries=5,
+        dry_run=False,
+        executor=None,
+    ):
+        self.w3 = w3
+        self.account = Web3.toChecksumAddress(account)
+        self.strategies = strategies
+        self.private_key = private_key
+        self.call_cost = call_cost
+        self.poll_interval = poll_interval
+        self.gas_bump = gas_bump
+        self.max_gas_price = max_gas_price
+        self.gas_limit_margin = gas_limit_margin
+        self.confirm_timeout = confirm_timeout
+        self.max_retries = max_retries
+        self.dry_run = dry_run
+        self.executor = executor
+
+        self._nonce = None
+        self._lock = None
+
+    @property
+    def _nonce_lock(self):
+        # created lazily: the lock must belong to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _run(self, fn, *args, **kwargs):
+        """web3 is blocking: run calls in the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    # ---- triggers ----
+
+    async def _trigger(self, strategy, name):
+        data = SELECTORS[name] + self.call_cost.to_bytes(32, "big")
+        result = await self._run(self.w3.eth.call, {"to": strategy.address, "data": data})
+        return int.from_bytes(result, "big") == 1
+
+    async def passes_dry_run(self, strategy):
+        """with `dry_run`, skip harvests that revert, report a loss or fail the health check"""
+        if not self.dry_run:
+            return True
+        try:
+            result = await self._run(harvest_dry_run, self.w3, strategy.address, self.account)
+        except HarvestDryRunReverted as e:
+            log("dry_run_reverted", logging.WARNING, strategy=strategy.name, reason=e.reason)
+            return False
+        log("dry_run", strategy=strategy.name, **result._asdict())
+        return result.loss == 0 and result.health_check_passed
+
+    async def check(self, strategy):
+        """returns the function to call on `strategy`, None if nothing to do"""
+        try:
+            if await self._trigger(strategy, "harvestTrigger"):
+                return "harvest" if await self.passes_dry_run(strategy) else None
+            if strategy.tend and await self._trigger(strategy, "tendTrigger"):
+                return "tend"
+        except Exception as e:
+            log("trigger_error", logging.WARNING, strategy=strategy.name, error=str(e))
+        return None
+
+    # ---- transactions ----
+
+    async def _sync_nonce(self):
+        self._nonce = await self._run(self.w3.eth.get_transaction_count, self.account, "pending")
+
+    async def _send_raw(self, tx):
+        if self.private_key is None:
+            return await self._run(self.w3.eth.send_transaction, tx)
+        signed = self.w3.eth.account.sign_transaction(tx, self.private_key)
+        return await self._run(self.w3.eth.send_raw_transaction, signed.rawTransaction)
+
+    async def _wait_mined(self, tx_hashes, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            for tx_hash in tx_hashes:
+                try:
+                    receipt = await self._run(self.w3.eth.get_transaction_receipt, tx_hash)
+                except TransactionNotFound:
+                    receipt = None
+                if receipt is not None:
+                    return receipt
+            if time.monotonic() >= deadline:
+                return None
+            await asyncio.sleep(min(1, self.poll_interval))
+
+    async def send(self, strategy, fn_name):
+        """send `fn_name()` to `strategy`, replacing it with a higher gas price until mined"""
+        tx = {"from": self.account, "to": strategy.address, "data": SELECTORS[fn_name], "value": 0}
+        # a call that reverts must not consume a nonce
+        gas = await self._run(self.w3.eth.estimate_gas, tx)
+        tx["gas"] = int(gas * self.gas_limit_margin)
+        tx["gasPrice"] = min(await self._run(lambda: self.w3.eth.gas_price), self.max_gas_price)
+        if self.private_key is not None:
+            tx["chainId"] = await self._run(lambda: self.w3.eth.chain_id)
+
+        async with self._nonce_lock:
+            if self._nonce is None:
+                await self._sync_nonce()
+            tx["nonce"] = self._nonce
+            try:
+                tx_hash = await self._send_raw(tx)
+            except Exception:
+                await self._sync_nonce()
+                raise
+            self._nonce += 1
+
+        tx_hashes = [tx_hash]
+        log("sent", strategy=strategy.name, fn=fn_name, nonce=tx["nonce"], gas_price=tx["gasPrice"], tx=tx_hash.hex())
+
+        for attempt in range(self.max_retries + 1):
+            receipt = await self._wait_mined(tx_hashes, self.confirm_timeout)
+            if receipt is not None:
+                break
+            if attempt == self.max_retries or tx["gasPrice"] >= self.max_gas_price:
+                # keep waiting on what is in the mempool, do not bump anymore
+                receipt = await self._wait_mined(tx_hashes, self.confirm_timeout)
+                break
+            tx["gasPrice"] = bump_gas_price(tx["gasPrice"], self.gas_bump, self.max_gas_price)
+            try:
+                tx_hashes.append(await self._send_raw(tx))
+            except Exception as e:
+                # e.g. the previous one got mined in between
+                log("bump_error", logging.WARNING, strategy=strategy.name, nonce=tx["nonce"], error=str(e))
+                continue
+            log("bumped", strategy=strategy.name, fn=fn_name, nonce=tx["nonce"], gas_price=tx["gasPrice"], attempt=attempt + 1)
+
+        if receipt is None:
+            log("stuck", logging.ERROR, strategy=strategy.name, fn=fn_name, nonce=tx["nonce"])
+            # dropped from the mempool: the next transactions must not queue behind the nonce
+            async with self._nonce_lock:
+                await self._sync_nonce()
+            raise TransactionFailed(f"{strategy.name}: {fn_name} not mined (nonce {tx['nonce']})")
+
+        fields = dict(
+            strategy=strategy.name,
+            fn=fn_name,
+            nonce=tx["nonce"],
+            tx=receipt["transactionHash"].hex(),
+            block=receipt["blockNumber"],
+            gas_used=receipt["gasUsed"],
+        )
+        if receipt["status"] != 1:
+            log("reverted", logging.ERROR, **fields)
+            raise TransactionFailed(f"{strategy.name}: {fn_name} reverted")
+        log("mined", **fields)
+        return receipt
+
+    async def work(self, strategy, fn_name):
+        try:
+            return await self.send(strategy, fn_name)
+        except TransactionFailed:
+            return None
+        except Exception as e:
+            log("send_error", logging.ERROR, strategy=strategy.name, fn=fn_name, error=str(e))
+            return None
+
+    # ---- loop ----
+
+    async def tick(self):
+        """check every strategy, then work every due one. returns `{name: receipt}`"""
+        actions = await asyncio.gather(*(self.check(s) for s in self.strategies))
+        due = [(s, fn) for s, fn in zip(self.strategies, actions) if fn is not None]
+        log("tick", strategies=len(self.strategies), due=[f"{s.name}.{fn}" for s, fn in due])
+
+        receipts = await asyncio.gather(*(self.work(s, fn) for s, fn in due))
+        return {s.name: receipt for (s, _), receipt in zip(due, receipts)}
+
+    async def run(self, stop=None):
+        stop = stop or asyncio.Event()
+        log("start", account=self.account, strategies=[s.name for s in self.strategies])
+        while not stop.is_set():
+            started = time.monotonic()
+            await self.tick()
+            try:
+                await asyncio.wait_for(stop.wait(), max(self.poll_interval - (time.monotonic() - started), 0))
+            except asyncio.TimeoutError:
+                pass
+        log("stop")
+
+
+def load_config(path):
+    with open(path) as fp:
+        config = yaml.safe_load(fp)
+    strategies = [StrategyConfig(**s) for s in config.pop("strategies")]
+    return strategies, config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc", default=os.environ.get("WEB3_PROVIDER_URI", "http://127.0.0.1:8545"))
+    parser.add_argument("--config", required=True, help="fleet config (yaml)")
+    parser.add_argument("--from", dest="account", help="unlocked node account, if no KEEPER_PRIVATE_KEY")
+    parser.add_argument("--schedule", action="store_true", help="harvest in low base fee blocks before the deadline")
+    args = parser.parse_args()
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    w3 = Web3(HTTPProvider(args.rpc))
+    private_key = os.environ.get("KEEPER_PRIVATE_KEY")
+    if private_key is not None:
+        account = w3.eth.account.from_key(private_key).address
+    elif args.account is not None:
+        account = args.account
+    else:
+        parser.error("KEEPER_PRIVATE_KEY or --from is required")
+
+    strategies, settings = load_config(args.config)
+    keeper_cls = Keeper
+    if args.schedule:
+        from harvest_scheduler import ScheduledKeeper as keeper_cls
+    keeper = keeper_cls(w3, account, strategies, private_key=private_key, **settings)
+    try:
+        asyncio.run(keeper.run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Load test of a vault and its tranche strategy on mock protocols.
+
+    brownie run scripts/load_test.py main --network development
+    brownie run scripts/load_test.py main 500 200 12 --network development  # users blocks txs_per_block
+
+Hundreds of depositors and withdrawers send their transactions without waiting
+for each other: mining is stopped and every block is mined with all the
+transactions sent for it. A harvest is sent at random intervals.
+
+The report has the transactions per block, the gas of every operation
+(deposit, withdraw, harvest), the share of reverted transactions and the share
+of withdrawals not covered by the idle `want` of the vault, i.e. that fell
+through to `liquidatePosition` of the strategy.
+"""
+import json
+import random
+from collections import Counter, defaultdict
+
+from brownie import accounts, chain, project, web3
+
+try:
+    from scripts.replay import _fund, deploy_env
+except ImportError:  # brownie run load_test
+    from replay import _fund, deploy_env
+
+# explicit gas limit: no estimate against a pending state
+GAS_LIMIT = 3_000_000
+
+
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return 0
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+def summarize(samples):
+    """`samples`: [{"op", "block", "gas_used", "reverted", "from_strategy"}]"""
+    per_block = Counter(s["block"] for s in samples)
+    gas = defaultdict(list)
+    reverted = Counter()
+    count = Counter()
+    for s in samples:
+        count[s["op"]] += 1
+        reverted[s["op"]] += s["reverted"]
+        if not s["reverted"]:
+            gas[s["op"]].append(s["gas_used"])
+
+    withdrawals = [s for s in samples if s["op"] == "withdraw" and not s["reverted"]]
+    return {
+        "txs": len(samples),
+        "blocks": len(per_block),
+        "txs_per_block": {
+            "mean": len(samples) / max(len(per_block), 1),
+            "max": max(per_block.values(), default=0),
+            "histogram": dict(sorted(Counter(per_block.values()).items())),
+        },
+        "gas": {
+            op: {
+                "count": len(values),
+                "mean": sum(values) // max(len(values), 1),
+                "p50": percentile(values, 0.5),
+                "p90": percentile(values, 0.9),
+                "p99": percentile(values, 0.99),
+                "max": max(values, default=0),
+            }
+            for op, values in gas.items()
+        },
+        "revert_share": {op: reverted[op] / count[op] for op in count},
+        "withdrawals_from_strategy": sum(s["from_strategy"] for s in withdrawals) / max(len(withdrawals), 1),
+    }
+
+
+class LoadTest:
+    """
+    @param users number of depositors/withdrawers
+    @param txs_per_block mean of the user transactions sent per block
+    @param harvest_probability chance of a harvest in a block
+    @param withdraw_probability chance of a user transaction being a withdrawal
+    @param max_deposit deposits are uniform in [1, max_deposit] `want`
+    """
+
+    def __init__(
+        self,
+        env,
+        gov,
+        users=200,
+        txs_per_block=8,
+        harvest_probability=0.1,
+        withdraw_probability=0.4,
+        max_deposit=100,
+        seed=0,
+    ):
+        self.env = env
+        self.gov = gov
+        self.txs_per_block = txs_per_block
+        self.harvest_probability = harvest_probability
+        self.withdraw_probability = withdraw_probability
+        self.max_deposit = max_deposit
+        self.random = random.Random(seed)
+        self.users = [accounts.add() for _ in range(users)]
+        self.samples = []
+
+    def setup(self):
+        """fund every user with `max_deposit * 10` and approve the vault"""
+        env = self.env
+        unit = 10 ** env.want.decimals()
+        for user in self.users:
+            accounts[0].transfer(user, 1e18)
+            _fund(env, user, self.max_deposit * 10 * unit)
+            env.want.approve(env.vault, 2 ** 256 - 1, {"from": user})
+
+    def _from_strategy(self, tx):
+        """the vault withdrew from the strategy: `want` transfer strategy => vault"""
+        env = self.env
+        if "Transfer" not in tx.events:
+            return False
+        for event in tx.events["Transfer"]:
+            sender, receiver = list(event.values())[:2]
+            if event.address == env.want.address and (sender, receiver) == (env.strategy.address, env.vault.address):
+                return True
+        return False
+
+    def _user_tx(self, user):
+        env = self.env
+        shares = env.vault.balanceOf(user)
+        if shares != 0 and self.random.random() < self.withdraw_probability:
+            amount = max(shares * self.random.randint(1, 100) // 100, 1)
+            # max loss 0.01%, as the default of `vault.withdraw`
+            return "withdraw", env.vault.withdraw(amount, user, 1, {"from": user, "gas_limit": GAS_LIMIT, "required_confs": 0})
+        amount = self.random.randint(1, self.max_deposit) * 10 ** env.want.decimals()
+        return "deposit", env.vault.deposit(amount, {"from": user, "gas_limit": GAS_LIMIT, "required_confs": 0})
+
+    def block(self):
+        """send the transactions of one block and mine it"""
+        count = min(int(self.random.expovariate(1 / self.txs_per_block)) + 1, len(self.users))
+        sent = [self._user_tx(user) for user in self.random.sample(self.users, count)]
+        if self.random.random() < self.harvest_probability:
+            tx = self.env.strategy.harvest({"from": self.gov, "gas_limit": GAS_LIMIT, "required_confs": 0})
+            sent.append(("harvest", tx))
+
+        chain.sleep(12)
+        chain.mine()
+
+        for op, tx in sent:
+            tx.wait(1)
+            self.samples.append(
+                {
+                    "op": op,
+                    "block": tx.block_number,
+                    "gas_used": tx.gas_used,
+                    "reverted": tx.status == 0,
+                    "from_strategy": op == "withdraw" and tx.status == 1 and self._from_strategy(tx),
+                }
+            )
+
+    def run(self, blocks):
+        web3.provider.make_request("miner_stop", [])
+        try:
+            for _ in range(blocks):
+                self.block()
+        finally:
+            web3.provider.make_request("miner_start", [])
+        return summarize(self.samples)
+
+
+def main(users=200, blocks=100, txs_per_block=8, kind="base", out=None):
+    gov = accounts[1]
+    env = deploy_env(kind, project.get_loaded_projects()[0], gov)
+    load_test = LoadTest(env, gov, users=int(users), txs_per_block=float(txs_per_block))
+    print(f"Funding {len(load_test.users)} users")
+    load_test.setup()
+
+    report = load_test.run(int(blocks))
+    print(json.dumps(report, indent=2))
+    if out is not None:
+        with open(out, "w") as fp:
+            json.dump({"report": report, "samples": load_test.samples}, fp, indent=2)
+    return report
@@ -0,0 +1,222 @@
+"""Operations CLI for a deployed tranche strategy, without brownie.
+
+    python scripts/ops.py --strategy 0x... status
+    python scripts/ops.py --strategy 0x... harvest
+    python scripts/ops.py --strategy 0x... invest 1000e18
+    python scripts/ops.py --strategy 0x... divest 500e18
+    python scripts/ops.py --strategy 0x... claim
+    python scripts/ops.py --strategy 0x... set-slippage 30
+    python scripts/ops.py --strategy 0x... set-unsafe-price true
+
+No brownie project is loaded nor compiled: the ABI of the strategy is read
+from a prebuilt JSON file (`--abi`), a build artifact of `brownie compile`
+(default `build/contracts/StEthTrancheStrategy.json`, whose ABI covers
+`TrancheStrategy` too) or a plain ABI list. web3 is imported once a command
+runs, so `--help` and argument errors return immediately.
+
+Amounts are in wei (`1000e18` is accepted). Transactions are signed with
+`OPS_PRIVATE_KEY`, or sent from `--from`, an account unlocked on the node
+(e.g. ganache). They are estimated first: a call that would revert is not
+sent. Output is JSON.
+"""
+import argparse
+import json
+import os
+import sys
+from decimal import Decimal
+from pathlib import Path
+
+BUILD = Path(__file__).resolve().parents[1] / "build" / "contracts"
+DEFAULT_ABIS = (BUILD / "StEthTrancheStrategy.json", BUILD / "TrancheStrategy.json")
+
+# views without arguments reported by `status`, if in the ABI
+STATUS_VIEWS = (
+    "name",
+    "vault",
+    "want",
+    "idleCDO",
+    "tranche",
+    "isAATranche",
+    "estimatedTotalAssets",
+    "totalTranches",
+    "stakedTranches",
+    "enabledStake",
+    "emergencyExit",
+    "withdrawalsAllowed",
+    "maximumSlippage",
+    "isAllowedUnsafePrice",
+    "unwindInKind",
+)
+
+# `vault.strategies(strategy)` of yearn vaults 0.4.x
+VAULT_ABI = [
+    {
+        "name": "strategies",
+        "type": "function",
+        "stateMutability": "view",
+        "inputs": [{"name": "arg0", "type": "address"}],
+        "outputs": [
+            {
+                "name": "",
+                "type": "tuple",
+                "components": [
+                    {"name": name, "type": "uint256"}
+                    for name in (
+                        "performanceFee",
+                        "activation",
+                        "debtRatio",
+                        "minDebtPerHarvest",
+                        "maxDebtPerHarvest",
+                        "lastReport",
+                        "totalDebt",
+                        "totalGain",
+                        "totalLoss",
+                    )
+                ],
+            }
+        ],
+    }
+]
+
+
+def _amount(value):
+    try:
+        return int(Decimal(value))
+    except (ArithmeticError, ValueError):
+        raise argparse.ArgumentTypeError(f"expected an amount in wei, got {value!r}")
+
+
+def _bool(value):
+    if value.lower() not in ("true", "false", "1", "0"):
+        raise argparse.ArgumentTypeError(f"expected true or false, got {value!r}")
+    return value.lower() in ("true", "1")
+
+
+# command => (strategy function, argument types)
+TRANSACTIONS = {
+    "harvest": ("harvest", ()),
+    "invest": ("invest", (_amount,)),
+    "divest": ("divest", (_amount,)),
+    "claim": ("claimRewards", ()),
+    "set-slippage": ("setMaxSlippage", (int,)),
+    "set-unsafe-price": ("setApprovalUnsafePrice", (_bool,)),
+}
+
+
+def load_abi(path=None):
+    """ABI of a brownie build artifact or of a plain ABI JSON file. default: `DEFAULT_ABIS`"""
+    if path is None:
+        path = next((p for p in DEFAULT_ABIS if p.exists()), None)
+        if path is None:
+            raise FileNotFoundError(f"no ABI in {BUILD}: run `brownie compile` once or pass --abi")
+    with open(path) as fp:
+        abi = json.load(fp)
+    return abi["abi"] if isinstance(abi, dict) else abi
+
+
+class Ops:
+    def __init__(self, w3, strategy, abi, account=None, private_key=None, gas_limit_margin=1.2):
+        from web3 import Web3
+
+        self.w3 = w3
+        self.strategy = w3.eth.contract(address=Web3.toChecksumAddress(strategy), abi=abi)
+        self.account = Web3.toChecksumAddress(account) if account is not None else None
+        self.private_key = private_key
+        self.gas_limit_margin = gas_limit_margin
+
+    def status(self):
+        functions = {
+            item["name"]
+            for item in self.strategy.abi
+            if item.get("type") == "function" and not item.get("inputs")
+        }
+        status = {"strategy": self.strategy.address}
+        for name in STATUS_VIEWS:
+            if name not in functions:
+                continue
+            try:
+                status[name] = getattr(self.strategy.functions, name)().call()
+            except Exception:
+                # e.g. not implemented by the deployed strategy
+                continue
+
+        if "vault" in status:
+            vault = self.w3.eth.contract(address=status["vault"], abi=VAULT_ABI)
+            params = vault.functions.strategies(self.strategy.address).call()
+            names = [c["name"] for c in VAULT_ABI[0]["outputs"][0]["components"]]
+            status["vaultParams"] = dict(zip(names, params))
+        return status
+
+    def transact(self, fn_name, *args):
+        """send `fn_name(*args)` to the strategy and wait for the receipt"""
+        w3 = self.w3
+        tx = {"from": self.account, "to": self.strategy.address, "value": 0}
+        tx["data"] = self.strategy.encodeABI(fn_name=fn_name, args=args)
+        # reverts here: no nonce is used
+        tx["gas"] = int(w3.eth.estimate_gas(tx) * self.gas_limit_margin)
+        tx["gasPrice"] = w3.eth.gas_price
+
+        if self.private_key is None:
+            tx_hash = w3.eth.send_transaction(tx)
+        else:
+            tx["nonce"] = w3.eth.get_transaction_count(self.account, "pending")
+            tx["chainId"] = w3.eth.chain_id
+            signed = w3.eth.account.sign_transaction(tx, self.private_key)
+            tx_hash = w3.eth.send_raw_transaction(signed.rawTransaction)
+
+        receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+        return {
+            "fn": fn_name,
+            "args": list(args),
+            "tx": receipt["transactionHash"].hex(),
+            "block": receipt["blockNumber"],
+            "status": receipt["status"],
+            "gasUsed": receipt["gasUsed"],
+        }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc", default=os.environ.get("WEB3_PROVIDER_URI", "http://127.0.0.1:8545"))
+    parser.add_argument("--strategy", required=True)
+    parser.add_argument("--abi", help="build artifact or ABI JSON of the strategy")
+    parser.add_argument("--from", dest="account", help="unlocked node account, if no OPS_PRIVATE_KEY")
+
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status")
+    for command, (fn_name, types) in TRANSACTIONS.items():
+        sub = commands.add_parser(command, help=f"{fn_name}()")
+        for i, arg_type in enumerate(types):
+            sub.add_argument(f"arg{i}", type=arg_type, metavar="VALUE")
+
+    args = parser.parse_args(argv)
+    if args.command != "status" and "OPS_PRIVATE_KEY" not in os.environ and args.account is None:
+        parser.error("OPS_PRIVATE_KEY or --from is required")
+    return args
+
+
+def main(argv=None, w3=None):
+    args = parse_args(argv)
+    abi = load_abi(args.abi)
+
+    if w3 is None:
+        from web3 import HTTPProvider, Web3
+
+        w3 = Web3(HTTPProvider(args.rpc))
+
+    private_key = os.environ.get("OPS_PRIVATE_KEY")
+    account = w3.eth.account.from_key(private_key).address if private_key is not None else args.account
+    ops = Ops(w3, args.strategy, abi, account=account, private_key=private_key)
+
+    if args.command == "status":
+        result = ops.status()
+    else:
+        fn_name, types = TRANSACTIONS[args.command]
+        result = ops.transact(fn_name, *(getattr(args, f"arg{i}") for i in range(len(types))))
+    json.dump(result, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+    return result
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""Replay recorded vault activity against strategy builds on mock protocols.
+
+    brownie run scripts/replay.py main activity.json --network development
+    # compare with another build, e.g. a worktree of the deployed commit
+    git worktree add ../baseline <ref>
+    brownie run scripts/replay.py main activity.json ../baseline --network development
+
+For each build a vault, the mock protocols and the strategy of the build are
+deployed, then every step is sent. The mock protocols are the ones of this
+tree; only the strategy comes from the build. `steth` traces need
+`StEthTrancheStrategyMock` in every build: builds older than it can only
+replay `base` traces.
+The report has the PnL of the vault, the gas of every step and the steps
+whose outcome (reverted or not) differs between the builds.
+
+A trace is JSON:
+
+    {
+      "strategy": "steth",  # or "base"
+      "steps": [
+        {"action": "deposit", "user": "0xab...", "amount": 10.0},
+        {"action": "harvest"},
+        {"action": "sleep", "seconds": 86400},
+        {"action": "virtual_price", "price": 1.001},  # strategy tranche, backed by the IdleCDO
+        {"action": "steth_price", "price": 0.999, "safe": true},
+        {"action": "withdraw", "user": "0xab...", "amount": "all", "max_loss": 1}
+      ]
+    }
+
+or a CSV export of an indexer with `timestamp,event,account,amount` columns and
+`Deposit`, `Withdraw` and `StrategyReported` events: the time between rows
+becomes `sleep` steps. Amounts are in `want`, users are mapped to local
+accounts in order of appearance.
+"""
+import csv
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from brownie import (
+    ZERO_ADDRESS,
+    ERC20Mock,
+    HealthCheckMock,
+    IdleCDOMock,
+    LiquidityGaugeMock,
+    StEthPriceFeedMock,
+    StEthStableSwapMock,
+    StETHMock,
+    TradeFactoryMock,
+    WETHMock,
+    accounts,
+    chain,
+    interface,
+    project,
+)
+from brownie.exceptions import VirtualMachineError
+
+try:
+    from scripts.deploy import _vault_container
+except ImportError:  # brownie run replay
+    from deploy import _vault_container
+
+# explicit gas limit: reverting steps are mined and their gas counted
+GAS_LIMIT = 6_000_000
+
+CSV_EVENTS = {"Deposit": "deposit", "Withdraw": "withdraw", "StrategyReported": "harvest"}
+
+
+# ---- traces ----
+
+
+def load_trace(path, strategy="base"):
+    path = Path(path)
+    if path.suffix == ".csv":
+        return load_csv_trace(path, strategy)
+    with path.open() as fp:
+        return json.load(fp)
+
+
+def load_csv_trace(path, strategy="base"):
+    steps = []
+    last = None
+    with open(path) as fp:
+        for row in csv.DictReader(fp):
+            action = CSV_EVENTS.get(row["event"])
+            if action is None:
+                continue
+            timestamp = int(row["timestamp"])
+            if last is not None and timestamp > last:
+                steps.append({"action": "sleep", "seconds": timestamp - last})
+            last = timestamp
+
+            step = {"action": action}
+            if action != "harvest":
+                step.update(user=row["account"], amount=float(row["amount"]))
+            steps.append(step)
+    return {"strategy": strategy, "steps": steps}
+
+
+# ---- environment ----
+
+
+@dataclass
+class Env:
+    kind: str
+    vault: object
+    strategy: object
+    want: object
+    underlying: object
+    idleCDO: object
+    tranche: object
+    price_feed: object = None
+    users: dict = field(default_factory=dict)
+
+
+def deploy_env(kind, build, gov):
+    """vault, mock protocols and the strategy of `build` (a brownie project)"""
+    if kind == "steth" and not hasattr(build, "StEthTrancheStrategyMock"):
+        raise ValueError(f"{build._path}: no StEthTrancheStrategyMock in the build, only base traces can be replayed")
+    steth = None
+    if kind == "steth":
+        want = gov.deploy(WETHMock)
+        steth = underlying = gov.deploy(StETHMock)
+    else:
+        want = underlying = gov.deploy(ERC20Mock)
+    idleCDO = gov.deploy(IdleCDOMock, underlying)
+    tranche = interface.ERC20(idleCDO.AATranche())
+    gauge = gov.deploy(LiquidityGaugeMock, tranche, gov.deploy(ERC20Mock))
+    health_check = gov.deploy(HealthCheckMock)
+
+    vault = _vault_container().deploy({"from": gov})
+    vault.initialize(want, gov, gov, "", "", gov, gov, {"from": gov})
+    vault.setDepositLimit(2 ** 256 - 1, {"from": gov})
+
+    price_feed = None
+    if kind == "steth":
+        price_feed = gov.deploy(StEthPriceFeedMock)
+        # same A, fee and admin fee as the mainnet pool
+        stable_swap = gov.deploy(StEthStableSwapMock, steth, 50, 4_000_000, 5_000_000_000)
+        seed = 50 * 1e18
+        steth.mint(gov, seed, {"from": gov})
+        steth.approve(stable_swap, seed, {"from": gov})
+        stable_swap.add_liquidity([seed, seed], 0, {"from": gov, "value": seed})
+        strategy = gov.deploy(
+            build.StEthTrancheStrategyMock, vault, idleCDO, True, gauge, health_check, (want, steth, stable_swap, price_feed)
+        )
+    else:
+        strategy = gov.deploy(
+            build.TrancheStrategy, vault, gov, gov, gov, idleCDO, True, ZERO_ADDRESS, [], gauge, ZERO_ADDRESS, health_check
+        )
+
+    vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    strategy.updateTradeFactory(gov.deploy(TradeFactoryMock), {"from": gov})
+    strategy.enableStaking({"from": gov})
+    return Env(kind, vault, strategy, want, underlying, idleCDO, tranche, price_feed)
+
+
+def _user(env, address):
+    if address not in env.users:
+        # accounts 0-1 deploy and govern
+        index = len(env.users) + 2
+        if index < len(accounts):
+            env.users[address] = accounts[index]
+        else:
+            env.users[address] = accounts.add()
+            accounts[0].transfer(env.users[address], 10 * 1e18)
+    return env.users[address]
+
+
+def _fund(env, user, amount):
+    if env.kind == "steth":
+        if user.balance() < amount + 1e18:
+            accounts[0].transfer(user, amount)
+        env.want.deposit({"from": user, "value": amount})
+    else:
+        env.want.mint(user, amount, {"from": user})
+
+
+# ---- replay ----
+
+
+@dataclass
+class StepResult:
+    index: int
+    action: str
+    gas_used: int = 0
+    reverted: bool = False
+    revert_msg: str = None
+
+
+@dataclass
+class ReplayResult:
+    build: str
+    steps: list = field(default_factory=list)
+    deposited: int = 0
+    withdrawn: int = 0
+    # vault at the end of the replay
+    total_assets: int = 0
+    total_gain: int = 0
+    total_loss: int = 0
+
+    @property
+    def pnl(self):
+        return self.withdrawn + self.total_assets - self.deposited
+
+    @property
+    def gas_used(self):
+        return sum(s.gas_used for s in self.steps)
+
+
+def _send(result, index, action, fn, *args, sender):
+    step = StepResult(index, action)
+    result.steps.append(step)
+    try:
+        tx = fn(*args, {"from": sender, "gas_limit": GAS_LIMIT})
+    except VirtualMachineError as e:
+        step.reverted = True
+        step.revert_msg = e.revert_msg
+        if getattr(e, "txid", None):
+            step.gas_used = chain.get_transaction(e.txid).gas_used
+        return None
+    step.gas_used = tx.gas_used
+    return tx
+
+
+def _apply(env, result, index, step, gov):
+    action = step["action"]
+    decimals = env.want.decimals()
+
+    if action == "sleep":
+        chain.sleep(int(step["seconds"]))
+        chain.mine()
+        result.steps.append(StepResult(index, action))
+    elif action == "deposit":
+        user = _user(env, step["user"])
+        amount = int(step["amount"] * 10 ** decimals)
+        _fund(env, user, amount)
+        env.want.approve(env.vault, amount, {"from": user})
+        if _send(result, index, action, env.vault.deposit, amount, sender=user) is not None:
+            result.deposited += amount
+    elif action == "withdraw":
+        user = _user(env, step["user"])
+        shares = env.vault.balanceOf(user)
+        if step["amount"] != "all":
+            amount = int(step["amount"] * 10 ** decimals)
+            shares = min(shares, amount * 10 ** decimals // env.vault.pricePerShare())
+        before = env.want.balanceOf(user)
+        tx = _send(result, index, action, env.vault.withdraw, shares, user, step.get("max_loss", 1), sender=user)
+        if tx is not None:
+            result.withdrawn += env.want.balanceOf(user) - before
+    elif action == "harvest":
+        _send(result, index, action, env.strategy.harvest, sender=gov)
+    elif action == "virtual_price":
+        price = int(step["price"] * 1e18)
+        old = env.idleCDO.virtualPrice(env.tranche)
+        if price > old:
+            # back the yield
+            env.underlying.mint(env.idleCDO, env.tranche.totalSupply() * (price - old) // 10 ** 18, {"from": gov})
+        _send(result, index, action, env.idleCDO.setVirtualPrice, env.tranche, price, sender=gov)
+    elif action == "steth_price":
+        _send(result, index, action, env.price_feed.setPrice, int(step["price"] * 1e18), step.get("safe", True), sender=gov)
+    else:
+        raise ValueError(f"step {index}: unknown action {action}")
+
+
+def replay(trace, build, name=None):
+    """replay `trace` against the strategy of `build`. returns a `ReplayResult`
+
+    every replay deploys its own vault and mocks: replays of several builds do not share state
+    """
+    result = ReplayResult(name or build._name)
+    gov = accounts[1]
+    env = deploy_env(trace.get("strategy", "base"), build, gov)
+    for index, step in enumerate(trace["steps"]):
+        _apply(env, result, index, step, gov)
+
+    params = env.vault.strategies(env.strategy)
+    result.total_assets = env.vault.totalAssets()
+    result.total_gain = params["totalGain"]
+    result.total_loss = params["totalLoss"]
+    return result
+
+
+def diff(base, other):
+    """steps whose outcome or gas differ, and the PnL difference"""
+    steps = []
+    for a, b in zip(base.steps, other.steps):
+        if a.reverted != b.reverted or a.gas_used != b.gas_used:
+            steps.append(
+                {
+                    "index": a.index,
+                    "action": a.action,
+                    "gas": (a.gas_used, b.gas_used),
+                    "reverted": (a.revert_msg if a.reverted else None, b.revert_msg if b.reverted else None),
+                }
+            )
+    return {
+        "pnl": (base.pnl, other.pnl),
+        "gas_used": (base.gas_used, other.gas_used),
+        "revert_differences": [s for s in steps if s["reverted"][0] != s["reverted"][1]],
+        "gas_differences": steps,
+    }
+
+
+def _load_build(path):
+    path = Path(path).resolve()
+    for p in project.get_loaded_projects():
+        if p._path == path:
+            return p
+    return project.load(path, name="BaselineProject")
+
+
+def main(trace_path, baseline=None, out=None, strategy="base"):
+    """`strategy`: kind of strategy of a CSV trace"""
+    trace = load_trace(trace_path, strategy)
+    current = project.get_loaded_projects()[0]
+
+    results = [replay(trace, current, "current")]
+    if baseline is not None:
+        results.insert(0, replay(trace, _load_build(baseline), "baseline"))
+
+    for r in results:
+        reverted = sum(s.reverted for s in r.steps)
+        print(f"{r.build}: pnl {r.pnl}, gain {r.total_gain}, loss {r.total_loss}, gas {r.gas_used}, {reverted} reverted steps")
+
+    report = {"results": [{**asdict(r), "pnl": r.pnl, "gas_used": r.gas_used} for r in results]}
+    if baseline is not None:
+        report["diff"] = diff(*results)
+        for s in report["diff"]["revert_differences"]:
+            print(f"step {s['index']} ({s['action']}): reverted {s['reverted'][0]!r} -> {s['reverted'][1]!r}")
+
+    if out is not None:
+        with open(out, "w") as fp:
+            json.dump(report, fp, indent=2, default=str)
+    return report
@@ -0,0 +1,199 @@
+"""Monte Carlo of the loss of an AA or BB position of an IdleCDO.
+
+Every path follows the tranches of one IdleCDO over `years`, in steps of
+`1 / steps_per_year`:
+
+    yield    the lending APR of the path accrues to the pool. `fee` is taken on
+             the gain, AA gets `split_ratio` of the rest (`trancheAPRSplitRatio`,
+             out of FULL_ALLOC), BB the remainder
+    loss     loss events of the lending provider arrive at `loss_rate` per year,
+             their severity (share of the pool) is Beta(`loss_alpha`, `loss_beta`).
+             BB absorbs a loss first, AA the remainder (AA-first refund)
+    depeg    (stETH) the `priceFeed` price of stETH in ETH drops by
+             Beta(`depeg_alpha`, `depeg_beta`) at `depeg_rate` per year and
+             recovers toward 1:1 with a half-life of `recovery_days`
+
+The position is valued in `want` at the end: tranche price growth times the
+stETH price for stETH tranches. `unsafe_exit` is the share of paths whose
+price moved by more than `max_safe_price_difference` in the last step, i.e.
+where `priceFeed.current_price()` is unsafe and exiting needs
+`setApprovalUnsafePrice`.
+
+Paths are simulated in batches of `batch` on `workers` processes. Batch `k`
+draws from the `k`-th child of `SeedSequence(seed)`: results only depend on
+the seed, the path count and the batch size, not on the number of workers.
+
+    python scripts/risk.py --paths 5000000 --loss-rate 0.05 --steth
+    python scripts/risk.py --paths 1000000 --split-ratio 30000 --aa-ratio 0.7 --json risk.json
+
+    from scripts.risk import Params, simulate, report
+    report(simulate(Params(steth=True), 1_000_000))
+"""
+import argparse
+import json
+import os
+from dataclasses import asdict, dataclass
+from multiprocessing import Pool
+
+import numpy as np
+
+# IdleCDO `trancheAPRSplitRatio` and `fee` unit
+FULL_ALLOC = 100_000
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+
+
+@dataclass
+class Params:
+    """
+    @param aa_ratio share of the pool in AA at the start (`getCurrentAARatio() / FULL_ALLOC`). in (0, 1)
+    @param apr_mean mean lending APR of a path. the APR of a path is drawn once, clipped at 0
+    @param split_ratio `trancheAPRSplitRatio`: AA share of the gain, out of FULL_ALLOC
+    @param fee IdleCDO fee on the gain, out of FULL_ALLOC
+    @param loss_rate expected loss events per year
+    """
+
+    years: float = 1.0
+    steps_per_year: int = 365
+    aa_ratio: float = 0.5
+    apr_mean: float = 0.04
+    apr_vol: float = 0.01
+    split_ratio: int = 20_000
+    fee: int = 10_000
+    loss_rate: float = 0.02
+    loss_alpha: float = 0.5
+    loss_beta: float = 4.0
+    # stETH underlying
+    steth: bool = False
+    depeg_rate: float = 0.5
+    depeg_alpha: float = 1.0
+    depeg_beta: float = 50.0
+    recovery_days: float = 30.0
+    max_safe_price_difference: float = 0.01
+
+
+def waterfall(aa, bb, loss):
+    """(aa, bb) values after `loss`: BB absorbs it first, then AA. never below zero"""
+    bb_loss = np.minimum(loss, bb)
+    aa_loss = np.minimum(loss - bb_loss, aa)
+    return aa - aa_loss, bb - bb_loss
+
+
+def simulate_batch(params, paths, seed):
+    """{"aa", "bb": loss, "return_aa", "return_bb": return, per `want` invested. "unsafe_exit": bool} of `paths` paths"""
+    p = params
+    rng = np.random.default_rng(seed)
+    steps = int(round(p.years * p.steps_per_year))
+    dt = 1 / p.steps_per_year
+
+    aa = np.full(paths, p.aa_ratio)
+    bb = np.full(paths, 1 - p.aa_ratio)
+    apr = np.maximum(rng.normal(p.apr_mean, p.apr_vol, paths), 0)
+    growth = apr * dt * (1 - p.fee / FULL_ALLOC)
+    split = p.split_ratio / FULL_ALLOC
+
+    price = np.ones(paths)
+    last_price = price
+    recovery = np.exp(-np.log(2) * dt * 365 / p.recovery_days)
+
+    for _ in range(steps):
+        gain = (aa + bb) * growth
+        aa += gain * split
+        bb += gain * (1 - split)
+
+        hit = np.flatnonzero(rng.random(paths) < p.loss_rate * dt)
+        if hit.size:
+            severity = rng.beta(p.loss_alpha, p.loss_beta, hit.size)
+            aa[hit], bb[hit] = waterfall(aa[hit], bb[hit], severity * (aa[hit] + bb[hit]))
+
+        if p.steth:
+            last_price = price
+            discount = (1 - price) * recovery
+            hit = np.flatnonzero(rng.random(paths) < p.depeg_rate * dt)
+            if hit.size:
+                jump = rng.beta(p.depeg_alpha, p.depeg_beta, hit.size)
+                discount[hit] = 1 - (1 - discount[hit]) * (1 - jump)
+            price = 1 - discount
+
+    # tranche supplies do not change: value of 1 `want` invested at the start
+    value_aa = aa / p.aa_ratio * price
+    value_bb = bb / (1 - p.aa_ratio) * price
+    return {
+        "aa": np.maximum(1 - value_aa, 0).astype(np.float32),
+        "bb": np.maximum(1 - value_bb, 0).astype(np.float32),
+        "return_aa": (value_aa - 1).astype(np.float32),
+        "return_bb": (value_bb - 1).astype(np.float32),
+        "unsafe_exit": np.abs(price - last_price) > p.max_safe_price_difference,
+    }
+
+
+def _run(job):
+    return simulate_batch(*job)
+
+
+def simulate(params, paths, workers=None, batch=100_000, seed=0):
+    """concatenated `simulate_batch` results of `paths` paths. `workers`: processes, default all cores"""
+    sizes = [min(batch, paths - start) for start in range(0, paths, batch)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(params, size, s) for size, s in zip(sizes, seeds)]
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers <= 1 or len(jobs) == 1:
+        results = [_run(job) for job in jobs]
+    else:
+        with Pool(min(workers, len(jobs))) as pool:
+            # in order: batch `k` is always at index `k`
+            results = pool.map(_run, jobs, chunksize=1)
+    return {key: np.concatenate([r[key] for r in results]) for key in results[0]}
+
+
+def _summary(losses, returns, position):
+    losses = losses.astype(np.float64)
+    tail = np.quantile(losses, 0.99)
+    return {
+        "loss_probability": float((losses > 0).mean()),
+        "expected_return": float(returns.mean()) * position,
+        "expected_loss": float(losses.mean()) * position,
+        "loss_quantiles": {str(q): float(v) * position for q, v in zip(QUANTILES, np.quantile(losses, QUANTILES))},
+        # expected loss beyond the 99% quantile
+        "cvar_99": float(losses[losses >= tail].mean()) * position,
+    }
+
+
+def report(results, position=1.0):
+    """loss distribution of a position of `position` `want` in AA and in BB"""
+    return {
+        "paths": len(results["aa"]),
+        "aa": _summary(results["aa"], results["return_aa"], position),
+        "bb": _summary(results["bb"], results["return_bb"], position),
+        "unsafe_exit": float(results["unsafe_exit"].mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paths", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, help="default: all cores")
+    parser.add_argument("--batch", type=int, default=100_000, help="paths per batch")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--position", type=float, default=1.0, help="position size in `want`")
+    parser.add_argument("--json", help="write the report to this file")
+    for name, default in asdict(Params()).items():
+        flag = "--" + name.replace("_", "-")
+        if isinstance(default, bool):
+            parser.add_argument(flag, action="store_true")
+        else:
+            parser.add_argument(flag, type=type(default), default=default)
+    args = parser.parse_args()
+
+    params = Params(**{name: getattr(args, name) for name in asdict(Params())})
+    result = report(simulate(params, args.paths, args.workers, args.batch, args.seed), args.position)
+    result["params"] = asdict(params)
+    print(json.dumps(result, indent=2))
+    if args.json is not None:
+        with open(args.json, "w") as fp:
+            json.dump(result, fp, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""Historical series of a tranche strategy for backtesting and tuning.
+
+Samples every `step` blocks of a block range:
+
+    column              source
+    timestamp           block timestamp
+    virtual_price_aa    idleCDO.virtualPrice(AATranche)
+    virtual_price_bb    idleCDO.virtualPrice(BBTranche)
+    steth_price         priceFeed.current_price() (stETH strategies)
+    steth_price_safe
+    curve_balance_eth   stableSwapSTETH.balances(0) (stETH strategies)
+    curve_balance_steth stableSwapSTETH.balances(1)
+    gauge_balance       gauge.balanceOf(strategy)
+    gauge_supply        gauge.totalSupply()
+
+The range is split in chunks of `chunk` samples. The calls of a chunk (plus
+`eth_getBlockByNumber` for the timestamps) are sent as one JSON-RPC batch, and
+`workers` chunks are fetched concurrently. Every chunk is written to its own
+file as soon as it is fetched: an interrupted run resumes from the chunks
+already stored, and extending `--to-block` only fetches the new blocks.
+
+    python scripts/series.py --rpc $ARCHIVE_RPC --strategy 0x... --from-block 14000000 --step 300 --out series/steth-AA
+    python scripts/series.py ... --format parquet  # needs pyarrow
+
+Prices are raw 1e18-scaled integers (uint64), balances are float64 in tokens
+(wei / 1e18). A failed call (e.g. before a contract is deployed) is 0, or NaN
+for float columns.
+
+    from scripts.series import consolidate
+    series = consolidate("series/steth-AA")  # {column: memory-mapped array}
+"""
+import argparse
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import requests
+from web3 import HTTPProvider, Web3
+
+ZERO_ADDRESS = "0x0000000000000000000000000000000000000000"
+
+# name => (dtype, scale). raw integers are divided by `scale` for float columns
+COLUMNS = {
+    "block": (np.uint64, 1),
+    "timestamp": (np.uint64, 1),
+    "virtual_price_aa": (np.uint64, 1),
+    "virtual_price_bb": (np.uint64, 1),
+    "steth_price": (np.uint64, 1),
+    "steth_price_safe": (np.bool_, 1),
+    "curve_balance_eth": (np.float64, 1e18),
+    "curve_balance_steth": (np.float64, 1e18),
+    "gauge_balance": (np.float64, 1e18),
+    "gauge_supply": (np.float64, 1e18),
+}
+
+CHUNK_FILE = re.compile(r"^(\d+)-(\d+)\.(npz|parquet)$")
+
+
+def _selector(signature):
+    return Web3.keccak(text=signature)[:4].hex().replace("0x", "")
+
+
+def _calldata(signature, *args):
+    encoded = "".join((int(a, 16) if isinstance(a, str) else a).to_bytes(32, "big").hex() for a in args)
+    return "0x" + _selector(signature) + encoded
+
+
+def _words(result):
+    data = bytes.fromhex(result[2:]) if result else b""
+    return [int.from_bytes(data[i : i + 32], "big") for i in range(0, len(data), 32)]
+
+
+@dataclass
+class Target:
+    """contracts sampled. zero address: column skipped"""
+
+    strategy: str
+    idle_cdo: str
+    aa_tranche: str
+    bb_tranche: str
+    gauge: str = ZERO_ADDRESS
+    price_feed: str = ZERO_ADDRESS
+    pool: str = ZERO_ADDRESS
+
+    def calls(self):
+        """[(columns, to, calldata)]: columns filled by the words of the result, in order"""
+        calls = [
+            (["virtual_price_aa"], self.idle_cdo, _calldata("virtualPrice(address)", self.aa_tranche)),
+            (["virtual_price_bb"], self.idle_cdo, _calldata("virtualPrice(address)", self.bb_tranche)),
+        ]
+        if self.price_feed != ZERO_ADDRESS:
+            calls.append((["steth_price", "steth_price_safe"], self.price_feed, _calldata("current_price()")))
+        if self.pool != ZERO_ADDRESS:
+            calls.append((["curve_balance_eth"], self.pool, _calldata("balances(uint256)", 0)))
+            calls.append((["curve_balance_steth"], self.pool, _calldata("balances(uint256)", 1)))
+        if self.gauge != ZERO_ADDRESS:
+            calls.append((["gauge_balance"], self.gauge, _calldata("balanceOf(address)", self.strategy)))
+            calls.append((["gauge_supply"], self.gauge, _calldata("totalSupply()")))
+        return calls
+
+    def columns(self):
+        return ["block", "timestamp"] + [c for columns, _, _ in self.calls() for c in columns]
+
+
+def resolve(w3, strategy):
+    """`Target` of a deployed strategy, at the latest block"""
+    strategy = Web3.toChecksumAddress(strategy)
+
+    def address(to, signature):
+        result = w3.eth.call({"to": to, "data": _calldata(signature)})
+        return Web3.toChecksumAddress(result[-20:])
+
+    idle_cdo = address(strategy, "idleCDO()")
+    target = Target(
+        strategy,
+        idle_cdo,
+        address(idle_cdo, "AATranche()"),
+        address(idle_cdo, "BBTranche()"),
+        gauge=address(strategy, "gauge()"),
+    )
+    try:
+        target.price_feed = address(strategy, "priceFeed()")
+        target.pool = address(strategy, "stableSwapSTETH()")
+    except Exception:
+        # not a stETH strategy
+        pass
+    return target
+
+
+class Fetcher:
+    """
+    @param url JSON-RPC endpoint. an archive node for blocks older than its pruning window
+    @param step blocks between two samples
+    @param chunk samples per batch and per file
+    """
+
+    def __init__(self, url, target, out, step=1, chunk=500, workers=4, fmt="npz", timeout=120):
+        self.url = url
+        self.target = target
+        self.out = Path(out)
+        self.step = step
+        self.chunk = chunk
+        self.workers = workers
+        self.fmt = fmt
+        self.timeout = timeout
+        self.session = requests.Session()
+        # JSON-RPC batches sent
+        self.batches = 0
+
+    # ---- plan ----
+
+    def plan(self, from_block, to_block):
+        """chunks [(start, end)] of the range, aligned on `from_block` so reruns split it the same way"""
+        span = self.step * self.chunk
+        return [(start, min(start + span - self.step, to_block)) for start in range(from_block, to_block + 1, span)]
+
+    def stored(self):
+        """{start: (end, path)} of the chunks on disk"""
+        chunks = {}
+        if self.out.exists():
+            for path in self.out.iterdir():
+                match = CHUNK_FILE.match(path.name)
+                if match:
+                    chunks[int(match[1])] = (int(match[2]), path)
+        return chunks
+
+    def pending(self, from_block, to_block):
+        """chunks not stored yet. a shorter chunk stored (the end of a previous run) is fetched again"""
+        stored = self.stored()
+        pending = []
+        for start, end in self.plan(from_block, to_block):
+            if start in stored and stored[start][0] >= end:
+                continue
+            pending.append((start, end))
+        return pending
+
+    # ---- fetch ----
+
+    def _batch(self, payload):
+        self.batches += 1
+        response = self.session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        results = response.json()
+        if isinstance(results, dict):
+            # the node rejected the whole batch
+            raise RuntimeError(results.get("error", results))
+        return {r["id"]: r for r in results}
+
+    def fetch_chunk(self, start, end):
+        """{column: array} of the samples of [start, end]"""
+        blocks = list(range(start, end + 1, self.step))
+        calls = self.target.calls()
+
+        payload = []
+        for i, block in enumerate(blocks):
+            tag = hex(block)
+            payload.append({"jsonrpc": "2.0", "id": len(payload), "method": "eth_getBlockByNumber", "params": [tag, False]})
+            for _, to, data in calls:
+                payload.append({"jsonrpc": "2.0", "id": len(payload), "method": "eth_call", "params": [{"to": to, "data": data}, tag]})
+        results = self._batch(payload)
+
+        raw = {c: [] for c in self.target.columns()}
+        raw["block"] = blocks
+        index = 0
+        for _ in blocks:
+            raw["timestamp"].append(int(results[index]["result"]["timestamp"], 16))
+            index += 1
+            for columns, _, _ in calls:
+                # reverted or no code: no result
+                words = _words(results[index].get("result"))
+                for j, column in enumerate(columns):
+                    raw[column].append(words[j] if j < len(words) else None)
+                index += 1
+        return {c: _column(c, values) for c, values in raw.items()}
+
+    def _write(self, start, end, series):
+        self.out.mkdir(parents=True, exist_ok=True)
+        path = self.out / f"{start}-{end}.{self.fmt}"
+        tmp = path.with_name(path.name + ".tmp")
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            pq.write_table(pa.table(series), tmp)
+        else:
+            with open(tmp, "wb") as fp:
+                # uncompressed: members can be read without inflating
+                np.savez(fp, **series)
+        # a chunk is either complete or absent
+        os.replace(tmp, path)
+
+        # shorter chunk of a previous run
+        for other_start, (other_end, other_path) in self.stored().items():
+            if other_start == start and other_end < end:
+                other_path.unlink()
+        return path
+
+    def run(self, from_block, to_block, progress=None):
+        """fetch the chunks not stored yet. returns the paths written"""
+        pending = self.pending(from_block, to_block)
+        written = []
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = {pool.submit(self.fetch_chunk, start, end): (start, end) for start, end in pending}
+            for future in as_completed(futures):
+                start, end = futures[future]
+                written.append(self._write(start, end, future.result()))
+                if progress is not None:
+                    progress(len(written), len(pending), start, end)
+        return sorted(written)
+
+
+def _column(name, values):
+    dtype, scale = COLUMNS[name]
+    if dtype is np.float64:
+        return np.array([np.nan if v is None else v / scale for v in values], dtype=dtype)
+    return np.array([0 if v is None else v for v in values], dtype=dtype)
+
+
+# ---- read ----
+
+
+def _chunks(path):
+    chunks = []
+    for p in Path(path).iterdir():
+        match = CHUNK_FILE.match(p.name)
+        if match:
+            chunks.append((int(match[1]), p))
+    return [p for _, p in sorted(chunks)]
+
+
+def load_series(path):
+    """{column: array} of every chunk stored in `path`, by block"""
+    parts = []
+    for chunk in _chunks(path):
+        if chunk.suffix == ".parquet":
+            import pyarrow.parquet as pq
+
+            table = pq.read_table(chunk, memory_map=True)
+            parts.append({c: table.column(c).to_numpy() for c in table.column_names})
+        else:
+            with np.load(chunk) as npz:
+                parts.append({c: npz[c] for c in npz.files})
+    if not parts:
+        return {}
+    return {c: np.concatenate([p[c] for p in parts]) for c in parts[0]}
+
+
+def consolidate(path):
+    """write one `.npy` file per column to `path/columns` and return them memory-mapped"""
+    series = load_series(path)
+    columns = Path(path) / "columns"
+    columns.mkdir(exist_ok=True)
+    for name, values in series.items():
+        np.save(columns / f"{name}.npy", values)
+    return {name: np.load(columns / f"{name}.npy", mmap_mode="r") for name in series}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc", default=os.environ.get("WEB3_PROVIDER_URI", "http://127.0.0.1:8545"))
+    parser.add_argument("--strategy", required=True)
+    parser.add_argument("--from-block", type=int, required=True)
+    parser.add_argument("--to-block", type=int, help="default: latest")
+    parser.add_argument("--step", type=int, default=1, help="blocks between two samples")
+    parser.add_argument("--chunk", type=int, default=500, help="samples per batch and per file")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--format", choices=("npz", "parquet"), default="npz")
+    parser.add_argument("--out", required=True, help="directory of the chunks")
+    args = parser.parse_args()
+
+    w3 = Web3(HTTPProvider(args.rpc))
+    target = resolve(w3, args.strategy)
+    to_block = w3.eth.block_number if args.to_block is None else args.to_block
+
+    fetcher = Fetcher(args.rpc, target, args.out, args.step, args.chunk, args.workers, args.format)
+    print(f"{len(fetcher.pending(args.from_block, to_block))} chunks to fetch, columns: {', '.join(target.columns())}")
+    fetcher.run(
+        args.from_block,
+        to_block,
+        progress=lambda done, total, start, end: print(f"[{done}/{total}] blocks {start}-{end}"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,22 @@
 import pytest
 from brownie import Contract, interface
 
+from gas_profiler import GasProfiler
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--gas-profile",
+        metavar="PATH",
+        help="trace every transaction and write flamegraph stacks to PATH.folded and a summary to PATH.json",
+    )
+
+
+def pytest_configure(config):
+    path = config.getoption("--gas-profile")
+    if path:
+        config.pluginmanager.register(GasProfiler(path), "gas_profiler")
+
 
 @pytest.fixture
 def gov(accounts):
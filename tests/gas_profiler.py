@@ -0,0 +1,160 @@
+"""Gas and call-count profiler for brownie tests.
+
+Enabled with `brownie test --gas-profile <path>`. Every transaction sent during
+the session is traced (`tx.trace`) and its gas is attributed to the stack of
+functions executing it, internal (`TrancheStrategy._invest`) and external
+(`IdleCDO.depositAA`) alike. At the end of the session it writes
+
+- `<path>.folded`: folded stacks, one `frame;frame;frame gas` line per stack,
+  readable by flamegraph.pl, speedscope or inferno
+- `<path>.json`: calls, self and inclusive gas per function, and gas and
+  transaction count per block
+"""
+import json
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import pytest
+
+INTRINSIC = "[intrinsic]"
+
+
+def _frame_name(step):
+    fn = step.get("fn")
+    if fn:
+        return fn
+    return step.get("contractName") or step.get("address") or "<unknown>"
+
+
+def step_costs(steps):
+    """Gas spent by each step itself, excluding gas used by the calls it makes.
+
+    `gasCost` of a CALL includes the gas forwarded to the callee, so the cost of
+    a step is the difference of the remaining gas with the next step at the same
+    depth, minus everything the callee used in between.
+    """
+    costs = [0] * len(steps)
+    pending = []  # [call step index, gas used by the callee so far]
+
+    for i, step in enumerate(steps):
+        while pending and steps[pending[-1][0]]["depth"] >= step["depth"]:
+            idx, child_gas = pending.pop()
+            costs[idx] = steps[idx]["gas"] - step["gas"] - child_gas
+            if pending:
+                pending[-1][1] += costs[idx] + child_gas
+
+        nxt = steps[i + 1] if i + 1 < len(steps) else None
+        if nxt is not None and nxt["depth"] > step["depth"]:
+            pending.append([i, 0])
+            continue
+
+        if nxt is not None and nxt["depth"] == step["depth"]:
+            costs[i] = step["gas"] - nxt["gas"]
+        else:
+            # last step of a frame: RETURN, STOP, REVERT...
+            costs[i] = step["gasCost"]
+        if pending:
+            pending[-1][1] += costs[i]
+
+    # calls still pending when the trace ends (e.g. out of gas)
+    for idx, child_gas in pending:
+        costs[idx] = steps[idx]["gasCost"]
+    return costs
+
+
+def fold_trace(steps, gas_used=None):
+    """Fold trace steps into `{stack: gas}` and `{function: calls}`.
+
+    `gas_used` is the receipt gas. What the trace does not account for
+    (intrinsic gas, calldata, refunds) goes to an `[intrinsic]` frame.
+    """
+    stacks = Counter()
+    calls = Counter()
+    frames = []  # [(depth, jumpDepth, name)]
+
+    for step, cost in zip(steps, step_costs(steps)):
+        key = (step["depth"], step.get("jumpDepth", 0))
+        while frames and frames[-1][:2] > key:
+            frames.pop()
+
+        name = _frame_name(step)
+        if not frames or frames[-1][:2] != key:
+            frames.append((key[0], key[1], name))
+            calls[name] += 1
+        elif frames[-1][2] != name:
+            frames[-1] = (key[0], key[1], name)
+            calls[name] += 1
+
+        stacks[tuple(f[2] for f in frames)] += cost
+
+    if gas_used is not None and steps:
+        traced = sum(stacks.values())
+        root = _frame_name(steps[0])
+        stacks[(root, INTRINSIC)] += max(gas_used - traced, 0)
+
+    return stacks, calls
+
+
+class GasProfiler:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.stacks = Counter()
+        self.calls = Counter()
+        self.blocks = defaultdict(lambda: {"gas": 0, "transactions": 0})
+        self._seen = set()
+
+    def collect(self):
+        from brownie import history
+
+        for tx in history:
+            if tx.txid in self._seen:
+                continue
+            self._seen.add(tx.txid)
+
+            stacks, calls = fold_trace(tx.trace, tx.gas_used)
+            self.stacks.update(stacks)
+            self.calls.update(calls)
+
+            block = self.blocks[tx.block_number]
+            block["gas"] += tx.gas_used
+            block["transactions"] += 1
+
+    # collect before brownie reverts the chain between tests
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_setup(self, item):
+        yield
+        self.collect()
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_call(self, item):
+        yield
+        self.collect()
+
+    def pytest_sessionfinish(self, session):
+        self.write()
+
+    def summary(self):
+        self_gas = Counter()
+        inclusive_gas = Counter()
+        for stack, gas in self.stacks.items():
+            self_gas[stack[-1]] += gas
+            for name in set(stack):
+                inclusive_gas[name] += gas
+
+        functions = {
+            name: {"calls": self.calls[name], "self_gas": self_gas[name], "gas": inclusive_gas[name]}
+            for name in sorted(inclusive_gas, key=inclusive_gas.get, reverse=True)
+        }
+        blocks = {str(number): self.blocks[number] for number in sorted(self.blocks)}
+        return {"functions": functions, "blocks": blocks}
+
+    def write(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self.path.with_suffix(".folded").open("w") as fp:
+            for stack, gas in sorted(self.stacks.items()):
+                if gas > 0:
+                    fp.write(f"{';'.join(stack)} {gas}\n")
+
+        with self.path.with_suffix(".json").open("w") as fp:
+            json.dump(self.summary(), fp, indent=2)
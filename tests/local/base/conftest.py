@@ -0,0 +1,42 @@
+import pytest
+from brownie import ZERO_ADDRESS
+
+
+@pytest.fixture
+def token(ERC20Mock, gov):
+    yield gov.deploy(ERC20Mock)
+
+
+@pytest.fixture
+def idleCDO(IdleCDOMock, gov, token):
+    yield gov.deploy(IdleCDOMock, token)
+
+
+@pytest.fixture
+def amount(token, user):
+    amount = 1_000 * 1e18
+    token.mint(user, amount)
+    yield amount
+
+
+@pytest.fixture
+def strategy(strategist, keeper, vault, rewards, idleCDO, gov, TrancheStrategy, trade_factory, staking_reward, gauge, healthCheck):
+    strategy = strategist.deploy(
+        TrancheStrategy,
+        vault,
+        strategist,
+        rewards,
+        keeper,
+        idleCDO,
+        True,
+        ZERO_ADDRESS,
+        [],
+        gauge,
+        ZERO_ADDRESS,
+        healthCheck
+    )
+    vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    strategy.updateTradeFactory(trade_factory, {"from": gov})
+    strategy.setRewardTokens([staking_reward], {"from": gov})
+    strategy.enableStaking({"from": gov})
+    yield strategy
@@ -0,0 +1,42 @@
+import pytest
+
+
+def balance_reads(tx, strategy):
+    """tokens whose `balanceOf` is called by `strategy` in `tx`"""
+    return [c["to"] for c in tx.subcalls if c["from"] == strategy.address and "balanceOf" in c.get("function", "")]
+
+
+def test_invest_uses_minted_amount(token, strategy, gov, gauge, amount):
+    token.mint(strategy, amount)
+    tx = strategy.invest(amount, {"from": gov})
+
+    # tranches minted as returned by `depositAA`
+    assert balance_reads(tx, strategy) == []
+    assert gauge.balanceOf(strategy) == amount
+
+
+def test_divest_uses_redeemed_amount(token, strategy, gov, gauge, tranche, amount):
+    token.mint(strategy, amount)
+    strategy.invest(amount, {"from": gov})
+
+    tx = strategy.divest(amount / 2, {"from": gov})
+
+    # held tranches only: `want` redeemed as returned by `withdrawAA`
+    assert balance_reads(tx, strategy) == [tranche.address, gauge.address]
+    assert token.balanceOf(strategy) == amount / 2
+    assert gauge.balanceOf(strategy) == amount / 2
+
+
+def test_harvest_profit_with_returned_amounts(chain, token, vault, strategy, user, idleCDO, tranche, amount, RELATIVE_APPROX):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    token.mint(idleCDO, amount * 0.01)
+    idleCDO.setVirtualPrice(tranche, 1.01e18)
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    assert pytest.approx(tx.events["Harvested"]["profit"], rel=RELATIVE_APPROX) == amount * 0.01
+    assert pytest.approx(strategy.estimatedTotalAssets(), rel=RELATIVE_APPROX) == vault.strategies(strategy)["totalDebt"]
@@ -0,0 +1,51 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS
+
+
+def clone_args(vault, strategist, rewards, keeper, idleCDO, gauge, healthCheck):
+    return [vault, strategist, rewards, keeper, idleCDO, True, ZERO_ADDRESS, [], gauge, ZERO_ADDRESS, healthCheck]
+
+
+def test_clone(
+    chain, token, vault, strategy, user, amount, gov, strategist, rewards, keeper, idleCDO, gauge, tranche,
+    healthCheck, trade_factory, TrancheStrategy, RELATIVE_APPROX
+):
+    args = clone_args(vault, strategist, rewards, keeper, idleCDO, gauge, healthCheck)
+    tx = strategy.cloneTrancheStrategy(*args, {"from": strategist})
+    clone = TrancheStrategy.at(tx.events["Cloned"]["clone"])
+
+    assert clone.isOriginal() is False
+    assert clone.tranche() == tranche
+    assert clone.idleCDO() == idleCDO
+    assert clone.isAATranche() is True
+    assert clone.keeper() == keeper
+    assert clone.checkStakedBeforeMigrating() is True
+    assert clone.maxReportDelay() == strategy.maxReportDelay()
+
+    with brownie.reverts():
+        clone.initialize(*args, {"from": strategist})
+    with brownie.reverts("strat/not-original"):
+        clone.cloneTrancheStrategy(*args, {"from": strategist})
+
+    vault.updateStrategyDebtRatio(strategy, 0, {"from": gov})
+    vault.addStrategy(clone, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    clone.updateTradeFactory(trade_factory, {"from": gov})
+    clone.enableStaking({"from": gov})
+
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    clone.harvest({"from": keeper})
+
+    assert gauge.balanceOf(clone) > 0
+    assert pytest.approx(clone.estimatedTotalAssets(), rel=RELATIVE_APPROX) == amount
+
+
+def test_clone_deployment_gas(vault, strategy, strategist, rewards, keeper, idleCDO, gauge, healthCheck, TrancheStrategy):
+    args = clone_args(vault, strategist, rewards, keeper, idleCDO, gauge, healthCheck)
+
+    full = TrancheStrategy.deploy(*args, {"from": strategist}).tx.gas_used
+    clone = strategy.cloneTrancheStrategy(*args, {"from": strategist}).gas_used
+
+    assert clone < full / 4
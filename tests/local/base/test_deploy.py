@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from brownie import TrancheStrategy, accounts
+
+from scripts.deploy import DEFAULTS, PreflightError, deploy, load_deployer, load_manifest, record_path
+
+
+@pytest.fixture
+def manifest(tmp_path, vault, idleCDO, gauge, healthCheck, staking_reward):
+    def manifest(**overrides):
+        strategies = [
+            {"name": "AA", "vault": vault.address, "idle_cdo": idleCDO.address, "tranche": "AA"},
+            {"name": "BB", "vault": vault.address, "idle_cdo": idleCDO.address, "tranche": "BB"},
+        ]
+        strategies[0].update(overrides)
+        defaults = {"health_check": healthCheck.address, "reward_tokens": [staking_reward.address]}
+        path = tmp_path / "manifest.yaml"
+        # json is valid yaml
+        path.write_text(json.dumps({"defaults": defaults, "strategies": strategies}))
+        return load_manifest(path)
+
+    yield manifest
+
+
+def test_dry_run(manifest, strategist, idleCDO, gauge, vault, tmp_path):
+    entries = manifest(gauge=gauge.address)
+    assert entries[1]["router"] == DEFAULTS["router"]
+
+    record = deploy(entries, strategist, dry_run=True, records_dir=tmp_path / "records")
+
+    assert record["dry_run"]
+    assert record["failed"] is None
+    assert record["preflight"]["AA"]["tranche"] == idleCDO.AATranche()
+    assert record["preflight"]["BB"]["tranche"] == idleCDO.BBTranche()
+    assert record["preflight"]["AA"]["vault_api_version"] == vault.apiVersion()
+
+    aa, bb = [TrancheStrategy.at(d["address"]) for d in record["deployments"]]
+    assert aa.tranche() == idleCDO.AATranche()
+    assert bb.tranche() == idleCDO.BBTranche()
+    assert aa.gauge() == gauge
+    assert aa.vault() == vault
+    assert aa.keeper() == strategist
+
+    with record_path(record, tmp_path / "records").open() as fp:
+        assert json.load(fp)["deployments"][0]["address"] == aa.address
+
+
+def test_failed_deployment_is_recorded(manifest, strategist, gov, tmp_path):
+    entries = manifest()
+    # not a contract: BB fails once AA is deployed
+    entries[1]["clone_of"] = gov.address
+    records_dir = tmp_path / "records"
+
+    with pytest.raises(ValueError):
+        deploy(entries, strategist, dry_run=True, records_dir=records_dir)
+
+    (path,) = records_dir.iterdir()
+    with path.open() as fp:
+        record = json.load(fp)
+    assert [d["name"] for d in record["deployments"]] == ["AA"]
+    assert TrancheStrategy.at(record["deployments"][0]["address"]).vault() == entries[0]["vault"]
+    assert record["failed"]["name"] == "BB"
+
+
+def test_preflight_fails_before_deploying(manifest, strategist, idleCDO, gov, LiquidityGaugeMock, staking_reward, tmp_path):
+    # gauge staking BB tranches
+    gauge = gov.deploy(LiquidityGaugeMock, idleCDO.BBTranche(), staking_reward)
+    entries = manifest(gauge=gauge.address)
+    deployed = len(TrancheStrategy)
+
+    with pytest.raises(PreflightError, match="AA: gauge does not stake the tranche"):
+        deploy(entries, strategist, dry_run=True, records_dir=tmp_path / "records")
+
+    assert len(TrancheStrategy) == deployed
+    assert not (tmp_path / "records").exists()
+
+
+def test_load_deployer(monkeypatch):
+    assert load_deployer(None, dry_run=True) == accounts[0]
+    # outside a dry run: fail fast instead of prompting
+    with pytest.raises(ValueError, match="no deployer account"):
+        load_deployer(None, dry_run=False)
+    monkeypatch.delenv("DEPLOYER_PASSWORD", raising=False)
+    with pytest.raises(ValueError, match="DEPLOYER_PASSWORD"):
+        load_deployer("deployer", dry_run=False)
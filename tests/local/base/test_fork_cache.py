@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+from brownie import web3
+from web3 import HTTPProvider, Web3
+
+from scripts.fork_cache import ForkCache, serve
+
+
+@pytest.fixture
+def start_proxy():
+    servers = []
+
+    def start_proxy(cache):
+        server = serve(cache, port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return Web3(HTTPProvider(f"http://127.0.0.1:{server.server_port}"))
+
+    yield start_proxy
+
+    for server in servers:
+        server.shutdown()
+
+
+def test_record_and_replay(chain, token, user, amount, tmp_path, start_proxy):
+    block = chain.height
+    cache = ForkCache(web3.provider.endpoint_uri, block, tmp_path)
+    proxy = start_proxy(cache)
+
+    code = proxy.eth.get_code(token.address)
+    slot = proxy.eth.get_storage_at(token.address, 2)
+    balance = proxy.eth.call({"to": token.address, "data": token.balanceOf.encode_input(user)})
+    assert cache.misses == 3 and cache.hits == 0
+
+    # state changes after the fork block are not visible
+    token.transfer(token, amount, {"from": user})
+    assert proxy.eth.call({"to": token.address, "data": token.balanceOf.encode_input(user)}) == balance
+    assert proxy.eth.get_code(token.address) == code
+    assert proxy.eth.block_number == block
+    assert cache.misses == 3 and cache.hits == 2
+
+    # later runs are served from the cache without the upstream node
+    offline = ForkCache(None, block, tmp_path, offline=True)
+    proxy = start_proxy(offline)
+    assert proxy.eth.get_code(token.address) == code
+    assert proxy.eth.get_storage_at(token.address, 2) == slot
+    assert offline.hits == 2 and offline.misses == 0
+
+
+def test_offline_miss(chain, token, tmp_path, start_proxy):
+    proxy = start_proxy(ForkCache(None, chain.height, tmp_path, offline=True))
+
+    with pytest.raises(ValueError, match="fork-cache"):
+        proxy.eth.get_code(token.address)
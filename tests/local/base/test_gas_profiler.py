@@ -0,0 +1,54 @@
+from gas_profiler import INTRINSIC, fold_trace, step_costs
+
+
+def step(depth, gas, gas_cost, fn, jump_depth=0):
+    return {"depth": depth, "gas": gas, "gasCost": gas_cost, "fn": fn, "jumpDepth": jump_depth}
+
+
+def test_step_costs_exclude_callee_gas():
+    steps = [
+        step(1, 1000, 3, "Strategy.harvest"),
+        step(1, 997, 700, "Strategy.harvest"),  # CALL forwarding gas
+        step(2, 600, 3, "Gauge.deposit"),
+        step(2, 597, 0, "Gauge.deposit"),  # RETURN
+        step(1, 800, 0, "Strategy.harvest"),  # STOP
+    ]
+    costs = step_costs(steps)
+    # CALL overhead = 997 - 800 - (3 + 0)
+    assert costs == [3, 194, 3, 0, 0]
+    assert sum(costs) == 1000 - 800
+
+
+def test_fold_trace_internal_and_external_frames():
+    steps = [
+        step(1, 1000, 3, "TrancheStrategy.harvest"),
+        step(1, 997, 10, "TrancheStrategy._invest", 1),
+        step(1, 987, 700, "TrancheStrategy._invest", 1),
+        step(2, 600, 5, "IdleCDO.depositAA"),
+        step(2, 595, 0, "IdleCDO.depositAA"),
+        step(1, 850, 3, "TrancheStrategy._invest", 1),
+        step(1, 847, 0, "TrancheStrategy.harvest"),
+    ]
+    stacks, calls = fold_trace(steps, gas_used=21000 + 153)
+
+    assert stacks[("TrancheStrategy.harvest",)] == 3
+    assert stacks[("TrancheStrategy.harvest", "TrancheStrategy._invest")] == 10 + 132 + 3
+    assert stacks[("TrancheStrategy.harvest", "TrancheStrategy._invest", "IdleCDO.depositAA")] == 5
+    assert stacks[("TrancheStrategy.harvest", INTRINSIC)] == 21000
+    assert calls["TrancheStrategy._invest"] == 1
+    assert calls["IdleCDO.depositAA"] == 1
+
+
+def test_fold_harvest_trace(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    stacks, calls = fold_trace(tx.trace, tx.gas_used)
+
+    # refunds are not in the trace
+    assert sum(stacks.values()) >= tx.gas_used
+    assert calls["TrancheStrategy._invest"] == 1
+    assert calls["TrancheStrategy._claimRewards"] == 1
+    assert any("IdleCDOMock.depositAA" in stack for stack in stacks)
@@ -0,0 +1,75 @@
+import asyncio
+
+import brownie
+import pytest
+from brownie import web3
+
+from scripts.harvest_dry_run import HarvestDryRunReverted, harvest_dry_run
+from scripts.keeper import Keeper, StrategyConfig
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    chain.sleep(1)
+    yield strategy
+
+
+def test_dry_run_first_harvest(chain, token, vault, strategy, user, amount, keeper, tranche, gauge):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+
+    result = harvest_dry_run(web3, strategy.address, keeper.address)
+
+    assert result == (0, 0, 0, 0, True)
+    # nothing happened
+    assert vault.strategies(strategy)["totalDebt"] == 0
+    assert gauge.balanceOf(strategy) == 0
+
+
+def test_dry_run_profit(invested, vault, idleCDO, tranche, keeper, amount, RELATIVE_APPROX):
+    strategy = invested
+    idleCDO.setVirtualPrice(tranche, 1.005e18)
+
+    result = harvest_dry_run(web3, strategy.address, keeper.address)
+    assert pytest.approx(result.profit, rel=RELATIVE_APPROX) == amount * 0.005
+    assert result.loss == 0
+    assert result.health_check_passed
+
+    tx = strategy.harvest({"from": keeper})
+    assert tx.events["Harvested"]["profit"] == result.profit
+    assert tx.events["Harvested"]["debtOutstanding"] == result.debt_outstanding
+
+
+def test_dry_run_health_check(invested, idleCDO, tranche, keeper, amount):
+    strategy = invested
+    # more than the 1% profit limit
+    idleCDO.setVirtualPrice(tranche, 1.02e18)
+
+    result = harvest_dry_run(web3, strategy.address, keeper.address)
+    assert result.profit > 0
+    assert not result.health_check_passed
+
+    with brownie.reverts("!healthcheck"):
+        strategy.harvest({"from": keeper})
+
+
+def test_dry_run_reverts(invested, user):
+    with pytest.raises(HarvestDryRunReverted) as e:
+        harvest_dry_run(web3, invested.address, user.address)
+    assert e.value.reason == "!authorized"
+
+
+def test_keeper_skips_loss(invested, idleCDO, tranche, keeper):
+    strategy = invested
+    idleCDO.setVirtualPrice(tranche, 0.99e18)
+    config = StrategyConfig(name="strategy", address=strategy.address)
+
+    # harvestTrigger is true: the strategy has less than its debt
+    assert strategy.harvestTrigger(0)
+    daemon = Keeper(web3, keeper.address, [config], dry_run=True, confirm_timeout=5)
+    assert asyncio.run(daemon.tick()) == {}
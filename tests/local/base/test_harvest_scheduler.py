@@ -0,0 +1,133 @@
+import asyncio
+import math
+import random
+
+from brownie import web3
+
+from scripts.harvest_scheduler import YEAR, BaseFeeScheduler, HarvestWindow, ScheduledKeeper, harvest_window, replay
+from scripts.keeper import StrategyConfig
+
+DAY = 24 * 3600
+
+
+def base_fee_series(days=7, seed=0):
+    """12s blocks, daily cycle between 15 and 45 gwei with noise"""
+    rng = random.Random(seed)
+    series = []
+    for i in range(days * 7200):
+        timestamp = 1_650_000_000 + 12 * i
+        cycle = 1 + 0.5 * math.sin(2 * math.pi * timestamp / DAY)
+        series.append((i, timestamp, int(30e9 * cycle * math.exp(rng.gauss(0, 0.2)))))
+    return series
+
+
+def test_harvest_window():
+    assert harvest_window(1_000, 100, DAY) == HarvestWindow(1_100, 1_000 + DAY)
+    # 5% apr reaches 0.01% unreported profit in ~17.5 hours
+    window = harvest_window(1_000, 0, DAY, apr=0.05, max_unreported_profit=0.0001)
+    assert window.deadline == 1_000 + int(0.0001 / 0.05 * YEAR)
+    assert window.deadline < 1_000 + DAY
+
+
+def test_flat_base_fee_waits_for_deadline():
+    scheduler = BaseFeeScheduler(min_samples=1)
+    window = harvest_window(0, 0, 1_000)
+    for t in range(0, 1_000, 12):
+        scheduler.observe(t, 10)
+        assert not scheduler.should_harvest(window, t, 10)
+    assert scheduler.should_harvest(window, 1_000, 10)
+
+
+def test_replay_savings():
+    series = base_fee_series()
+    result = replay(series, 0, DAY)
+
+    baseline, scheduled = result["baseline"], result["scheduled"]
+    assert baseline["harvests"] == 6
+    # never later than the deadline
+    assert scheduled["harvests"] >= baseline["harvests"]
+    assert result["savings_per_harvest"] > 0.3
+    assert scheduled["gas_cost"] < baseline["gas_cost"]
+
+
+def test_scheduled_keeper_harvests_at_deadline(chain, token, vault, strategy, strategist, amount, user, keeper):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    strategy.setMaxReportDelay(3600, {"from": strategist})
+    config = StrategyConfig(name="strategy", address=strategy.address)
+    daemon = ScheduledKeeper(web3, keeper.address, [config], poll_interval=0, confirm_timeout=5)
+
+    # ganache has no base fee: the gas price is flat, wait for the deadline
+    assert asyncio.run(daemon.tick()) == {}
+
+    chain.sleep(3600)
+    chain.mine()
+    receipts = asyncio.run(daemon.tick())
+    assert receipts["strategy"]["status"] == 1
+    assert vault.strategies(strategy)["totalDebt"] == amount
+
+    assert asyncio.run(daemon.tick()) == {}
+
+
+def test_scheduled_keeper_harvests_revoked_strategy(chain, token, vault, strategy, strategist, gov, amount, user, keeper):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    strategy.setMaxReportDelay(3600, {"from": strategist})
+    config = StrategyConfig(name="strategy", address=strategy.address)
+    daemon = ScheduledKeeper(web3, keeper.address, [config], poll_interval=0, confirm_timeout=5)
+    assert asyncio.run(daemon.tick()) == {}
+
+    # debt outstanding: `harvestTrigger` is true, the flat gas price waits for the deadline
+    vault.revokeStrategy(strategy, {"from": gov})
+    assert strategy.harvestTrigger(0)
+    assert asyncio.run(daemon.tick()) == {}
+
+    chain.sleep(3600)
+    chain.mine()
+    receipts = asyncio.run(daemon.tick())
+    assert receipts["strategy"]["status"] == 1
+    assert vault.strategies(strategy)["totalDebt"] == 0
+
+
+def test_scheduled_keeper_waits_for_harvest_trigger(chain, token, vault, strategy, strategist, amount, user, keeper):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    strategy.setMaxReportDelay(DAY, {"from": strategist})
+    # projected unreported profit: deadline ~1 hour after the harvest
+    config = StrategyConfig(name="strategy", address=strategy.address, apr=1, max_unreported_profit=0.0001)
+    daemon = ScheduledKeeper(web3, keeper.address, [config], poll_interval=0, confirm_timeout=5)
+
+    # past the deadline of the scheduler, but no harvest is due
+    chain.sleep(3600)
+    chain.mine()
+    assert not strategy.harvestTrigger(0)
+    assert asyncio.run(daemon.tick()) == {}
+
+
+def test_scheduled_keeper_window_ignores_zaps(chain, token, vault, strategy, strategist, gov, amount, user, keeper):
+    strategy.setZapDepositor(user, True, {"from": gov})
+    token.approve(strategy, amount, {"from": user})
+    strategy.depositAndInvest(amount // 2, {"from": user})
+    chain.sleep(1)
+    strategy.harvest({"from": strategist})
+    harvested = vault.strategies(strategy)["lastReport"]
+    strategy.setMaxReportDelay(3600, {"from": strategist})
+    config = StrategyConfig(name="strategy", address=strategy.address)
+    daemon = ScheduledKeeper(web3, keeper.address, [config], poll_interval=0, confirm_timeout=5)
+    assert asyncio.run(daemon.tick()) == {}
+
+    # a zap inside the window reports to the vault but does not push back the deadline
+    chain.sleep(1800)
+    strategy.depositAndInvest(amount // 2, {"from": user})
+    assert vault.strategies(strategy)["lastReport"] > harvested
+    assert asyncio.run(daemon.tick()) == {}
+
+    chain.sleep(1800)
+    chain.mine()
+    receipts = asyncio.run(daemon.tick())
+    assert receipts["strategy"]["status"] == 1
+    assert strategy.lastHarvest() == vault.strategies(strategy)["lastReport"]
@@ -0,0 +1,94 @@
+import asyncio
+import json
+import logging
+
+import pytest
+from brownie import ZERO_ADDRESS, web3
+
+from scripts.keeper import JsonFormatter, Keeper, StrategyConfig, TransactionFailed, bump_gas_price
+
+
+@pytest.fixture
+def fleet(strategy, vault, gov, strategist, rewards, keeper, idleCDO, gauge, healthCheck, TrancheStrategy):
+    vault.updateStrategyDebtRatio(strategy, 5_000, {"from": gov})
+    other = strategist.deploy(
+        TrancheStrategy, vault, strategist, rewards, keeper, idleCDO, True, ZERO_ADDRESS, [], gauge, ZERO_ADDRESS, healthCheck
+    )
+    vault.addStrategy(other, 5_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    yield [strategy, other]
+
+
+def make_keeper(account, strategies):
+    configs = [StrategyConfig(name=f"strategy-{i}", address=s.address, tend=True) for i, s in enumerate(strategies)]
+    return Keeper(web3, account.address, configs, poll_interval=0, confirm_timeout=5)
+
+
+def test_tick_harvests_due_strategies(chain, token, vault, fleet, amount, user, keeper, caplog):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    daemon = make_keeper(keeper, fleet)
+    start_nonce = keeper.nonce
+
+    with caplog.at_level(logging.INFO, logger="keeper"):
+        receipts = asyncio.run(daemon.tick())
+
+    assert set(receipts) == {"strategy-0", "strategy-1"}
+    assert all(r["status"] == 1 for r in receipts.values())
+    # one nonce each, sent without waiting for each other
+    nonces = sorted(web3.eth.get_transaction(r["transactionHash"])["nonce"] for r in receipts.values())
+    assert nonces == [start_nonce, start_nonce + 1]
+    for s in fleet:
+        assert vault.strategies(s)["totalDebt"] == amount / 2
+
+    mined = [r for r in caplog.records if r.getMessage() == "mined"]
+    assert len(mined) == 2
+    assert json.loads(JsonFormatter().format(mined[0]))["fn"] == "harvest"
+
+    # credit is used up: nothing to do
+    assert asyncio.run(daemon.tick()) == {}
+
+
+def test_reverting_strategy_does_not_block_the_fleet(chain, token, vault, fleet, amount, user, keeper, strategy, gov):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    # only governance and the keeper can harvest
+    strategy.setKeeper(gov, {"from": gov})
+    daemon = make_keeper(keeper, fleet)
+    start_nonce = keeper.nonce
+
+    receipts = asyncio.run(daemon.tick())
+
+    assert receipts["strategy-0"] is None
+    assert receipts["strategy-1"]["status"] == 1
+    # the reverting call did not consume a nonce
+    assert keeper.nonce == start_nonce + 1
+    assert daemon._nonce == start_nonce + 1
+
+
+def test_stuck_transaction_resyncs_nonce(fleet, keeper):
+    daemon = make_keeper(keeper, fleet)
+    daemon.max_retries = 0
+    start_nonce = keeper.nonce
+
+    async def dropped(tx):
+        # accepted by the node, then dropped from the mempool
+        return b"\x01" * 32
+
+    async def never_mined(tx_hashes, timeout):
+        return None
+
+    daemon._send_raw = dropped
+    daemon._wait_mined = never_mined
+    with pytest.raises(TransactionFailed, match="not mined"):
+        asyncio.run(daemon.send(daemon.strategies[0], "harvest"))
+
+    assert daemon._nonce == start_nonce
+
+
+def test_bump_gas_price():
+    assert bump_gas_price(100, 1.125, 1_000) == 112
+    # at least 10% more to replace a pending transaction
+    assert bump_gas_price(100, 1.05, 1_000) == 111
+    assert bump_gas_price(900, 1.125, 1_000) == 1_000
@@ -0,0 +1,51 @@
+from brownie import accounts, project
+
+from scripts.load_test import LoadTest, percentile, summarize
+from scripts.replay import deploy_env
+
+
+def sample(op, block, gas_used, reverted=False, from_strategy=False):
+    return {"op": op, "block": block, "gas_used": gas_used, "reverted": reverted, "from_strategy": from_strategy}
+
+
+def test_summarize():
+    samples = [
+        sample("deposit", 1, 100),
+        sample("deposit", 1, 300),
+        sample("withdraw", 1, 200, from_strategy=True),
+        sample("harvest", 2, 1000),
+        sample("withdraw", 2, 150),
+        sample("withdraw", 3, 0, reverted=True),
+    ]
+    report = summarize(samples)
+
+    assert report["txs"] == 6 and report["blocks"] == 3
+    assert report["txs_per_block"] == {"mean": 2, "max": 3, "histogram": {1: 1, 2: 1, 3: 1}}
+    assert report["gas"]["deposit"] == {"count": 2, "mean": 200, "p50": 300, "p90": 300, "p99": 300, "max": 300}
+    # reverted transactions are not in the gas distribution
+    assert report["gas"]["withdraw"]["count"] == 2
+    assert report["revert_share"] == {"deposit": 0, "withdraw": 1 / 3, "harvest": 0}
+    assert report["withdrawals_from_strategy"] == 0.5
+
+
+def test_percentile():
+    assert percentile([], 0.5) == 0
+    assert percentile([5, 1, 3], 0.5) == 3
+    assert percentile(list(range(100)), 0.99) == 99
+
+
+def test_load_test():
+    gov = accounts[1]
+    env = deploy_env("base", project.get_loaded_projects()[0], gov)
+    load_test = LoadTest(env, gov, users=20, txs_per_block=6, harvest_probability=0.5, withdraw_probability=0.5)
+    load_test.setup()
+
+    report = load_test.run(12)
+
+    assert report["blocks"] == 12
+    # transactions of a block are mined together
+    assert report["txs_per_block"]["max"] > 1
+    assert report["revert_share"]["deposit"] == 0
+    assert report["gas"]["harvest"]["count"] > 0
+    assert 0 <= report["withdrawals_from_strategy"] <= 1
+    assert env.vault.totalSupply() == sum(env.vault.balanceOf(u) for u in load_test.users)
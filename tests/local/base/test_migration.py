@@ -0,0 +1,89 @@
+from brownie import ZERO_ADDRESS
+import pytest
+
+
+def deploy_new_strategy(TrancheStrategy, strategist, rewards, keeper, vault, idleCDO, gauge, healthCheck):
+    return strategist.deploy(
+        TrancheStrategy, vault, strategist, rewards, keeper, idleCDO, True, ZERO_ADDRESS, [], gauge, ZERO_ADDRESS, healthCheck
+    )
+
+
+def test_staked_migration_handoff(
+    chain, token, vault, strategy, amount, user, gov, strategist, rewards, keeper, idleCDO, gauge, tranche,
+    staking_reward, trade_factory, TrancheStrategy, healthCheck, RELATIVE_APPROX
+):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    staked = gauge.balanceOf(strategy)
+    gauge.notifyReward(strategy, 1e18)
+
+    new_strategy = deploy_new_strategy(TrancheStrategy, strategist, rewards, keeper, vault, idleCDO, gauge, healthCheck)
+    new_strategy.updateTradeFactory(trade_factory, {"from": gov})
+    new_strategy.setRewardTokens([staking_reward], {"from": gov})
+    new_strategy.enableStaking({"from": gov})
+    assert new_strategy.canReceiveStaked(gauge) is True
+
+    vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+
+    # no unstake/restake round trip: tranches never leave the gauge
+    assert tranche.balanceOf(gauge) == staked
+    assert gauge.balanceOf(new_strategy) == staked
+    assert tranche.balanceOf(new_strategy) == 0
+    # rewards are claimed and handed over
+    assert staking_reward.balanceOf(new_strategy) == 1e18
+    assert staking_reward.balanceOf(strategy) == 0
+    assert pytest.approx(new_strategy.estimatedTotalAssets(), rel=RELATIVE_APPROX) == amount
+
+
+def test_staked_migration_gas(
+    chain, token, vault, strategy, amount, user, gov, strategist, rewards, keeper, idleCDO, gauge,
+    staking_reward, trade_factory, TrancheStrategy, healthCheck
+):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    staked = gauge.balanceOf(strategy)
+
+    new_strategy = deploy_new_strategy(TrancheStrategy, strategist, rewards, keeper, vault, idleCDO, gauge, healthCheck)
+    new_strategy.updateTradeFactory(trade_factory, {"from": gov})
+    new_strategy.setRewardTokens([staking_reward], {"from": gov})
+    chain.snapshot()
+
+    # previous flow: unstake, transfer tranches, then stake again from the new strategy
+    tx_migrate = vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+    new_strategy.enableStaking({"from": gov})
+    tx_restake = new_strategy.setGauge(gauge, {"from": gov})
+    assert gauge.balanceOf(new_strategy) == staked
+    legacy_gas = tx_migrate.gas_used + tx_restake.gas_used
+
+    chain.revert()
+
+    # handoff
+    new_strategy.enableStaking({"from": gov})
+    tx_handoff = vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+    assert gauge.balanceOf(new_strategy) == staked
+
+    assert tx_handoff.gas_used < legacy_gas
+
+
+def test_migration_to_unstaked_strategy(
+    chain, token, vault, strategy, amount, user, gov, strategist, rewards, keeper, idleCDO, gauge, tranche,
+    TrancheStrategy, healthCheck, RELATIVE_APPROX
+):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    staked = gauge.balanceOf(strategy)
+
+    # staking is not enabled on the new strategy: unstake and transfer tranches
+    new_strategy = deploy_new_strategy(TrancheStrategy, strategist, rewards, keeper, vault, idleCDO, gauge, healthCheck)
+    assert new_strategy.canReceiveStaked(gauge) is False
+    vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+
+    assert gauge.balanceOf(new_strategy) == 0
+    assert tranche.balanceOf(new_strategy) == staked
+    assert pytest.approx(new_strategy.estimatedTotalAssets(), rel=RELATIVE_APPROX) == amount
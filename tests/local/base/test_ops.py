@@ -0,0 +1,66 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from brownie import web3
+
+from scripts.ops import load_abi, main
+
+
+@pytest.fixture
+def abi_path(tmp_path, strategy):
+    path = tmp_path / "TrancheStrategy.json"
+    # brownie build artifact
+    path.write_text(json.dumps({"contractName": "TrancheStrategy", "abi": strategy.abi}))
+    yield path
+
+
+def ops(abi_path, strategy, *argv, account=None):
+    options = ["--strategy", strategy.address, "--abi", str(abi_path)]
+    if account is not None:
+        options += ["--from", account.address]
+    return main(options + list(argv), w3=web3)
+
+
+def test_load_abi(tmp_path, abi_path, strategy):
+    plain = tmp_path / "abi.json"
+    plain.write_text(json.dumps(strategy.abi))
+    assert load_abi(abi_path) == load_abi(plain) == strategy.abi
+
+
+def test_invest_divest_status(chain, token, vault, strategy, user, gov, amount, abi_path, capsys):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+
+    result = ops(abi_path, strategy, "harvest", account=gov)
+    assert result["status"] == 1
+    assert strategy.totalTranches() == amount
+
+    ops(abi_path, strategy, "divest", str(amount // 4), account=gov)
+    assert strategy.totalTranches() == amount * 3 // 4
+    ops(abi_path, strategy, "invest", str(amount // 4), account=gov)
+    assert strategy.totalTranches() == amount
+
+    capsys.readouterr()
+    status = ops(abi_path, strategy, "status")
+    assert json.loads(capsys.readouterr().out)["totalTranches"] == amount
+    assert status["vault"] == vault.address
+    assert status["stakedTranches"] == amount
+    assert status["withdrawalsAllowed"]
+    assert status["vaultParams"]["totalDebt"] == amount
+
+
+def test_reverting_call_is_not_sent(strategy, user, abi_path):
+    nonce = user.nonce
+    with pytest.raises(ValueError):
+        ops(abi_path, strategy, "invest", "1", account=user)
+    assert user.nonce == nonce
+
+
+def test_no_brownie_nor_web3_at_import():
+    code = "import sys, scripts.ops; print(any(m in sys.modules for m in ('brownie', 'web3')))"
+    root = Path(__file__).resolve().parents[3]
+    assert subprocess.check_output([sys.executable, "-c", code], cwd=root).strip() == b"False"
@@ -0,0 +1,137 @@
+import pytest
+
+from scenarios import block_withdrawals
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    chain.sleep(1)
+    yield strategy
+
+
+@pytest.mark.parametrize("allow_aa,allow_bb,allowed", [(False, False, False), (False, True, False), (True, False, True)])
+def test_withdrawals_allowed(strategy, idleCDO, allow_aa, allow_bb, allowed):
+    assert strategy.withdrawalsAllowed()
+
+    block_withdrawals(idleCDO, allow_aa=allow_aa, allow_bb=allow_bb)
+    assert strategy.withdrawalsAllowed() == allowed
+
+    idleCDO.setPaused(False)
+    assert strategy.withdrawalsAllowed()
+
+
+def test_withdraw_served_from_idle_want(invested, vault, idleCDO, gauge, token, user, amount):
+    strategy = invested
+    idle = amount // 10
+    token.mint(strategy, idle)
+    staked = strategy.stakedTranches()
+    block_withdrawals(idleCDO)
+
+    assert strategy.previewLiquidate(amount // 2)[3] == idle
+
+    before = token.balanceOf(user)
+    tx = vault.withdraw(vault.balanceOf(user) // 2, user, 1, {"from": user})
+
+    # partial withdrawal, no loss
+    assert token.balanceOf(user) - before == idle
+    assert vault.strategies(strategy)["totalLoss"] == 0
+    assert token.balanceOf(strategy) == 0
+    # nothing unstaked
+    assert strategy.stakedTranches() == staked == gauge.balanceOf(strategy)
+    assert not [c for c in tx.subcalls if c["to"] == gauge.address and c["function"].startswith("withdraw")]
+
+
+def test_harvest_leaves_shortfall_outstanding(invested, vault, gov, idleCDO, token, amount):
+    strategy = invested
+    token.mint(strategy, amount // 10)
+    vault.revokeStrategy(strategy, {"from": gov})
+    block_withdrawals(idleCDO)
+
+    tx = strategy.harvest()
+
+    event = tx.events["StrategyReported"]
+    assert event["loss"] == 0 and event["gain"] == 0
+    assert event["debtPaid"] == amount // 10
+    assert vault.debtOutstanding(strategy) == amount - amount // 10
+    assert strategy.totalTranches() == amount
+
+    # withdrawals come back: the rest is paid
+    idleCDO.setAllowAAWithdraw(True)
+    tx = strategy.harvest()
+    assert tx.events["StrategyReported"]["loss"] == 0
+    assert vault.strategies(strategy)["totalDebt"] == 0
+    assert strategy.totalTranches() == 0
+
+
+def test_divest_paused(invested, gov, idleCDO, token, amount):
+    strategy = invested
+    block_withdrawals(idleCDO)
+
+    strategy.divest(amount // 2, {"from": gov})
+    assert strategy.totalTranches() == amount
+    assert token.balanceOf(strategy) == 0
+
+    # BB withdrawals do not matter to an AA strategy
+    idleCDO.setAllowBBWithdraw(True)
+    strategy.divest(amount // 2, {"from": gov})
+    assert strategy.totalTranches() == amount
+
+    idleCDO.setAllowAAWithdraw(True)
+    strategy.divest(amount // 2, {"from": gov})
+    assert strategy.totalTranches() == amount // 2
+    assert token.balanceOf(strategy) == amount // 2
+
+
+def test_deposit_while_paused(chain, invested, vault, idleCDO, gauge, token, user, amount):
+    strategy = invested
+    staked = gauge.balanceOf(strategy)
+    block_withdrawals(idleCDO)
+
+    token.mint(user, amount)
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    # the credit is taken but not deposited to the IdleCDO
+    assert tx.events["StrategyReported"]["loss"] == 0
+    assert vault.strategies(strategy)["totalDebt"] == 2 * amount
+    assert token.balanceOf(strategy) == amount
+    assert gauge.balanceOf(strategy) == staked
+
+    idleCDO.setPaused(False)
+    chain.sleep(1)
+    strategy.harvest()
+    assert token.balanceOf(strategy) == 0
+    assert gauge.balanceOf(strategy) == staked + amount
+
+
+def test_emergency_exit_paused(chain, invested, vault, gov, idleCDO, gauge, token, amount):
+    strategy = invested
+    idle = amount // 10
+    token.mint(strategy, idle)
+    staked = gauge.balanceOf(strategy)
+    block_withdrawals(idleCDO)
+
+    strategy.setEmergencyExit({"from": gov})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    tx = strategy.harvest()
+
+    # idle want freed, nothing unstaked nor redeemed: the locked tranches are reported as a loss
+    assert not [c for c in tx.subcalls if c["to"] == gauge.address and c["function"].startswith("withdraw")]
+    assert gauge.balanceOf(strategy) == strategy.stakedTranches() == staked
+    assert tx.events["StrategyReported"]["loss"] == amount - idle
+    assert token.balanceOf(vault) == idle
+
+    # withdrawals come back: the loss is recovered as a gain
+    idleCDO.setAllowAAWithdraw(True)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    chain.sleep(1)
+    tx = strategy.harvest()
+    assert strategy.totalTranches() == 0
+    assert tx.events["StrategyReported"]["gain"] == amount
+    assert token.balanceOf(vault) == amount + idle
@@ -0,0 +1,95 @@
+import pytest
+from brownie import project
+
+from scripts.replay import ReplayResult, StepResult, deploy_env, diff, load_trace, replay
+
+ALICE = "0x000000000000000000000000000000000000a11c"
+BOB = "0x0000000000000000000000000000000000000b0b"
+
+TRACE = {
+    "strategy": "base",
+    "steps": [
+        {"action": "deposit", "user": ALICE, "amount": 1000.0},
+        {"action": "harvest"},
+        {"action": "sleep", "seconds": 86400},
+        {"action": "deposit", "user": BOB, "amount": 500.0},
+        {"action": "virtual_price", "price": 1.002},
+        {"action": "harvest"},
+        {"action": "withdraw", "user": ALICE, "amount": "all"},
+        # more than deposited: capped to the shares of bob
+        {"action": "withdraw", "user": BOB, "amount": 10_000.0},
+    ],
+}
+
+
+@pytest.fixture
+def current():
+    yield project.get_loaded_projects()[0]
+
+
+def test_load_csv_trace(tmp_path):
+    path = tmp_path / "vault.csv"
+    path.write_text(
+        "timestamp,event,account,amount\n"
+        f"100,Deposit,{ALICE},10.5\n"
+        "100,StrategyReported,,\n"
+        "100,Transfer,,\n"
+        f"3700,Withdraw,{ALICE},1\n"
+    )
+
+    assert load_trace(path) == {
+        "strategy": "base",
+        "steps": [
+            {"action": "deposit", "user": ALICE, "amount": 10.5},
+            {"action": "harvest"},
+            {"action": "sleep", "seconds": 3600},
+            {"action": "withdraw", "user": ALICE, "amount": 1.0},
+        ],
+    }
+
+
+def test_replay(current, RELATIVE_APPROX):
+    result = replay(TRACE, current)
+
+    assert [s.action for s in result.steps] == [s["action"] for s in TRACE["steps"]]
+    assert not any(s.reverted for s in result.steps)
+    assert all(s.gas_used > 0 for s in result.steps if s.action != "sleep")
+    # the yield of 1000 tranches minted by the first harvest
+    assert pytest.approx(result.total_gain, rel=RELATIVE_APPROX) == 1000 * 1e18 * 0.002
+    assert result.total_loss == 0
+    assert result.deposited == 1500 * 1e18
+    # fees and locked profit stay in the vault
+    assert pytest.approx(result.pnl, rel=RELATIVE_APPROX) == result.total_gain
+
+
+def test_same_build_has_no_differences(current):
+    trace = {"strategy": "base", "steps": TRACE["steps"][:3]}
+    report = diff(replay(trace, current, "a"), replay(trace, current, "b"))
+
+    assert report["revert_differences"] == []
+    assert report["gas_differences"] == []
+    assert report["pnl"][0] == report["pnl"][1]
+
+
+def test_diff():
+    base = ReplayResult("base", [StepResult(0, "deposit", 100), StepResult(1, "harvest", 300)], deposited=10)
+    other = ReplayResult(
+        "other", [StepResult(0, "deposit", 100), StepResult(1, "harvest", 50, True, "!healthcheck")], deposited=10
+    )
+
+    report = diff(base, other)
+    assert report["gas_used"] == (400, 150)
+    assert report["revert_differences"] == [
+        {"index": 1, "action": "harvest", "gas": (300, 50), "reverted": (None, "!healthcheck")}
+    ]
+    assert report["pnl"] == (-10, -10)
+
+
+def test_steth_trace_needs_steth_mock(gov, tmp_path):
+    class OldBuild:
+        """a build without `StEthTrancheStrategyMock`"""
+
+        _path = tmp_path
+
+    with pytest.raises(ValueError, match="only base traces"):
+        deploy_env("steth", OldBuild, gov)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from scripts.risk import Params, report, simulate, waterfall
+
+
+def test_waterfall():
+    aa, bb = waterfall(np.array([60.0, 60.0, 60.0]), np.array([40.0, 40.0, 40.0]), np.array([30.0, 50.0, 120.0]))
+    # BB first, then AA. never below zero
+    assert aa.tolist() == [60, 50, 0]
+    assert bb.tolist() == [10, 0, 0]
+
+
+def test_yield_split():
+    params = Params(steps_per_year=12, apr_vol=0, loss_rate=0)
+    results = simulate(params, 1_000, workers=1)
+
+    pool_gain = (1 + params.apr_mean * 0.9 / 12) ** 12 - 1
+    # 20% of the gain (after the 10% fee) to AA, half of the pool each
+    assert pytest.approx(results["return_aa"], rel=1e-5) == np.full(1_000, 0.4 * pool_gain)
+    assert pytest.approx(results["return_bb"], rel=1e-5) == np.full(1_000, 1.6 * pool_gain)
+    assert not results["aa"].any() and not results["bb"].any()
+
+
+def test_bb_absorbs_losses_first():
+    results = simulate(Params(loss_rate=0.5), 20_000, workers=1, batch=5_000)
+    summary = report(results)
+    aa, bb = summary["aa"], summary["bb"]
+
+    assert aa["loss_probability"] < bb["loss_probability"]
+    assert aa["expected_loss"] < bb["expected_loss"]
+    assert aa["cvar_99"] <= bb["cvar_99"]
+
+
+def test_steth_depeg():
+    params = Params(steth=True, apr_mean=0, apr_vol=0, loss_rate=0, depeg_rate=50, recovery_days=1e9)
+    results = simulate(params, 5_000, workers=1)
+
+    # the depeg hits both tranches alike
+    assert np.array_equal(results["aa"], results["bb"])
+    assert results["aa"].mean() > 0
+    assert 0 < report(results)["unsafe_exit"] < 1
+
+
+def test_results_do_not_depend_on_workers():
+    params = Params(steth=True, loss_rate=0.5)
+    single = simulate(params, 4_000, workers=1, batch=1_000, seed=7)
+    multi = simulate(params, 4_000, workers=2, batch=1_000, seed=7)
+
+    for key in single:
+        assert np.array_equal(single[key], multi[key])
@@ -0,0 +1,134 @@
+import brownie
+from brownie import ZERO_ADDRESS
+
+
+def assert_ledger(strategy, gauge):
+    assert strategy.stakedTranches() == gauge.balanceOf(strategy)
+
+
+def test_ledger_matches_gauge(
+    chain, token, vault, strategy, user, gov, tranche, gauge, staking_reward, LiquidityGaugeMock, amount
+):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount / 2, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    assert strategy.stakedTranches() > 0
+    assert_ledger(strategy, gauge)
+
+    # withdraw from the vault: `liquidatePosition` unstakes
+    vault.withdraw(vault.balanceOf(user) // 4, user, 0, {"from": user})
+    assert_ledger(strategy, gauge)
+
+    # manual divest, more than unstaked
+    strategy.divest(strategy.totalTranches() / 2, {"from": gov})
+    assert_ledger(strategy, gauge)
+    strategy.invest(token.balanceOf(strategy), {"from": gov})
+    assert_ledger(strategy, gauge)
+
+    # new gauge: unstaked from the old one, staked to the new one
+    new_gauge = gov.deploy(LiquidityGaugeMock, tranche, staking_reward)
+    strategy.setGauge(new_gauge, {"from": gov})
+    assert gauge.balanceOf(strategy) == 0
+    assert_ledger(strategy, new_gauge)
+    assert strategy.stakedTranches() == strategy.totalTranches()
+
+    # staking disabled: staked tranches stay, new ones are not staked
+    strategy.disableStaking({"from": gov})
+    vault.deposit(amount / 2, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    assert_ledger(strategy, new_gauge)
+    assert tranche.balanceOf(strategy) > 0
+
+    # gauge revoked
+    strategy.setGauge(ZERO_ADDRESS, {"from": gov})
+    assert strategy.stakedTranches() == 0
+    assert tranche.balanceOf(strategy) == strategy.totalTranches()
+
+    # restake
+    strategy.setGauge(gauge, {"from": gov})
+    strategy.enableStaking({"from": gov})
+    strategy.setGauge(gauge, {"from": gov})
+    assert_ledger(strategy, gauge)
+    assert strategy.stakedTranches() == strategy.totalTranches()
+
+    # emergency exit
+    strategy.setEmergencyExit({"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+    assert strategy.stakedTranches() == 0
+    assert_ledger(strategy, gauge)
+
+
+def test_migration_hands_over_ledger(
+    chain, token, vault, strategy, user, gov, strategist, rewards, keeper, idleCDO, gauge, trade_factory,
+    TrancheStrategy, healthCheck, amount
+):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    staked = strategy.stakedTranches()
+
+    new_strategy = strategist.deploy(
+        TrancheStrategy, vault, strategist, rewards, keeper, idleCDO, True, ZERO_ADDRESS, [], gauge, ZERO_ADDRESS, healthCheck
+    )
+    new_strategy.updateTradeFactory(trade_factory, {"from": gov})
+    new_strategy.enableStaking({"from": gov})
+    tx = vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+
+    assert tx.events["ReconcileStaked"]["_gaugeBalance"] == staked
+    assert strategy.stakedTranches() == 0
+    assert new_strategy.stakedTranches() == staked
+    assert_ledger(new_strategy, gauge)
+
+
+def test_migration_moves_the_gauge_balance(
+    chain, token, vault, strategy, user, gov, strategist, rewards, keeper, idleCDO, tranche, gauge, trade_factory,
+    TrancheStrategy, healthCheck, amount
+):
+    token.approve(vault, amount / 2, {"from": user})
+    vault.deposit(amount / 2, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    staked = strategy.stakedTranches()
+
+    # tranches staked on behalf of the strategy: not in the ledger
+    token.approve(idleCDO, amount / 2, {"from": user})
+    idleCDO.depositAA(amount / 2, {"from": user})
+    tranche.approve(gauge, amount / 2, {"from": user})
+    gauge.deposit(amount / 2, strategy, False, {"from": user})
+
+    new_strategy = strategist.deploy(
+        TrancheStrategy, vault, strategist, rewards, keeper, idleCDO, True, ZERO_ADDRESS, [], gauge, ZERO_ADDRESS, healthCheck
+    )
+    new_strategy.updateTradeFactory(trade_factory, {"from": gov})
+    new_strategy.enableStaking({"from": gov})
+    vault.migrateStrategy(strategy, new_strategy, {"from": gov})
+
+    assert gauge.balanceOf(strategy) == 0
+    assert gauge.balanceOf(new_strategy) == staked + amount / 2
+    assert_ledger(new_strategy, gauge)
+
+
+def test_reconcile_staked(chain, token, vault, strategy, user, gov, idleCDO, tranche, gauge, amount):
+    token.approve(vault, amount / 2, {"from": user})
+    vault.deposit(amount / 2, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    staked = strategy.stakedTranches()
+
+    # tranches staked on behalf of the strategy
+    token.approve(idleCDO, amount / 2, {"from": user})
+    idleCDO.depositAA(amount / 2, {"from": user})
+    tranche.approve(gauge, amount / 2, {"from": user})
+    gauge.deposit(amount / 2, strategy, False, {"from": user})
+    assert gauge.balanceOf(strategy) == staked + amount / 2
+
+    with brownie.reverts("strat/not-allowed"):
+        strategy.reconcileStaked({"from": user})
+
+    tx = strategy.reconcileStaked({"from": gov})
+    assert tx.events["ReconcileStaked"]["_stakedTranches"] == staked
+    assert_ledger(strategy, gauge)
@@ -0,0 +1,73 @@
+import pytest
+
+from scenarios import bb_first_loss, block_withdrawals, full_exit, retry_exit
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    chain.sleep(1)
+    yield strategy
+
+
+def test_bb_absorbs_loss_first(invested, vault, gov, idleCDO, token, whale, amount):
+    token.mint(whale, 500 * 1e18)
+    bb_first_loss(idleCDO, token, whale, 500 * 1e18, 400 * 1e18)
+    assert idleCDO.virtualPrice(idleCDO.BBTranche()) == 0.2 * 1e18
+    assert idleCDO.virtualPrice(idleCDO.AATranche()) == 1e18
+
+    report = full_exit(invested, vault, gov)
+
+    assert report.exited
+    assert report.steps == ["revokeStrategy", "harvest"]
+    assert report.loss == 0
+    assert report.debt_paid == amount
+    assert token.balanceOf(vault) == amount
+
+
+def test_loss_beyond_bb(invested, vault, gov, idleCDO, token, whale, amount, RELATIVE_APPROX):
+    token.mint(whale, 100 * 1e18)
+    # BB is wiped out, AA loses the other 100
+    bb_first_loss(idleCDO, token, whale, 100 * 1e18, 200 * 1e18)
+    assert idleCDO.virtualPrice(idleCDO.BBTranche()) == 0
+    assert idleCDO.virtualPrice(idleCDO.AATranche()) == 0.9 * 1e18
+
+    report = full_exit(invested, vault, gov)
+
+    assert report.exited
+    # the loss fails the health check
+    assert report.txs == 4 and report.reverted == 1
+    assert report.steps[1].startswith("harvest (reverted")
+    assert pytest.approx(report.loss, rel=RELATIVE_APPROX) == 100 * 1e18
+    assert pytest.approx(token.balanceOf(vault), rel=RELATIVE_APPROX) == 900 * 1e18
+    assert invested.totalTranches() == 0
+
+
+@pytest.mark.parametrize("allow_aa,allow_bb", [(True, False), (False, True)])
+def test_withdrawals_blocked(invested, vault, gov, idleCDO, token, amount, allow_aa, allow_bb):
+    block_withdrawals(idleCDO, allow_aa=allow_aa, allow_bb=allow_bb)
+
+    report = full_exit(invested, vault, gov)
+
+    if allow_aa:
+        # AA strategy: BB withdrawals do not matter
+        assert report.exited and report.txs == 2
+        return
+
+    # harvests report no loss and pay no debt: the emergency exit would report the locked tranches as a loss
+    assert not report.exited
+    assert report.txs == 6 and report.reverted == 1
+    assert report.loss == 0 and report.debt_paid == 0
+    assert report.steps[-2:] == ["setEmergencyExit", "harvest (reverted: !healthcheck)"]
+    assert invested.totalTranches() == amount
+
+    # withdrawals come back
+    idleCDO.setAllowAAWithdraw(True)
+    retry_exit(report, invested, vault, gov)
+    assert report.exited
+    assert report.txs == 7 and report.gas_used > 0
+    assert report.loss == 0
+    assert token.balanceOf(vault) == amount
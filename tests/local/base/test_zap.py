@@ -0,0 +1,90 @@
+import brownie
+import pytest
+
+
+def test_deposit_and_invest(chain, token, vault, strategy, user, amount, gov, gauge):
+    chain.sleep(1)
+    strategy.setZapDepositor(user, True, {"from": gov})
+    token.approve(strategy, amount, {"from": user})
+
+    tx = strategy.depositAndInvest(amount, {"from": user})
+
+    assert tx.return_value == vault.balanceOf(user) == amount
+    # no harvest needed
+    assert vault.strategies(strategy)["totalDebt"] == amount
+    assert token.balanceOf(vault) == 0
+    assert gauge.balanceOf(strategy) == amount
+    assert strategy.estimatedTotalAssets() == amount
+    assert vault.totalAssets() == amount
+
+
+def test_deposit_and_invest_debt_limits(chain, token, vault, strategy, user, amount, gov, gauge):
+    vault.updateStrategyDebtRatio(strategy, 5_000, {"from": gov})
+    chain.sleep(1)
+    strategy.setZapDepositor(user, True, {"from": gov})
+    token.approve(strategy, amount, {"from": user})
+
+    strategy.depositAndInvest(amount, {"from": user})
+
+    assert vault.strategies(strategy)["totalDebt"] == amount / 2
+    assert gauge.balanceOf(strategy) == amount / 2
+    assert token.balanceOf(vault) == amount / 2
+
+
+def test_profit_is_left_to_harvest(chain, token, vault, strategy, user, amount, gov, idleCDO, tranche, RELATIVE_APPROX):
+    chain.sleep(1)
+    strategy.setZapDepositor(user, True, {"from": gov})
+    token.approve(strategy, amount, {"from": user})
+    strategy.depositAndInvest(amount // 2, {"from": user})
+
+    # yield, backed by the IdleCDO
+    idleCDO.setVirtualPrice(tranche, 1.005e18)
+    token.mint(idleCDO, amount / 2 * 0.005)
+    chain.sleep(1)
+    strategy.depositAndInvest(amount // 2, {"from": user})
+    assert vault.strategies(strategy)["totalGain"] == 0
+    assert vault.strategies(strategy)["totalDebt"] == amount
+    assert pytest.approx(strategy.estimatedTotalAssets(), rel=RELATIVE_APPROX) == amount + amount / 2 * 0.005
+
+    chain.sleep(1)
+    tx = strategy.harvest()
+    assert pytest.approx(tx.events["Harvested"]["profit"], rel=RELATIVE_APPROX) == amount / 2 * 0.005
+
+
+def test_zap_does_not_postpone_harvest(chain, token, vault, strategy, user, amount, gov, strategist):
+    strategy.setMaxReportDelay(3600, {"from": strategist})
+    strategy.setZapDepositor(user, True, {"from": gov})
+    token.approve(strategy, amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    harvested = chain.time()
+
+    chain.sleep(1800)
+    strategy.depositAndInvest(amount // 2, {"from": user})
+    chain.sleep(1800)
+    strategy.depositAndInvest(amount // 2, {"from": user})
+    assert strategy.lastHarvest() <= harvested
+    assert vault.strategies(strategy)["lastReport"] == strategy.lastZapReport()
+
+    # `maxReportDelay` after the harvest, not after the zaps
+    chain.mine()
+    assert strategy.harvestTrigger(0)
+
+    strategy.harvest()
+    assert strategy.lastHarvest() == vault.strategies(strategy)["lastReport"]
+    assert not strategy.harvestTrigger(0)
+
+
+def test_deposit_and_invest_permissions(chain, token, strategy, user, amount, gov, rewards):
+    token.approve(strategy, amount, {"from": user})
+    with brownie.reverts("strat/not-zap-depositor"):
+        strategy.depositAndInvest(amount, {"from": user})
+
+    with brownie.reverts():
+        strategy.setZapDepositor(user, True, {"from": rewards})
+    strategy.setZapDepositor(user, True, {"from": gov})
+    assert strategy.zapDepositors(user)
+
+    strategy.setEmergencyExit({"from": gov})
+    with brownie.reverts("strat/emergency-exit"):
+        strategy.depositAndInvest(amount, {"from": user})
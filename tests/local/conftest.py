@@ -0,0 +1,50 @@
+import pytest
+from brownie import config, interface
+
+# Local suite: mock protocols on a plain development chain.
+# brownie test tests/local --network development
+
+
+@pytest.fixture
+def gov(accounts):
+    yield accounts[6]
+
+
+@pytest.fixture
+def whale(accounts):
+    yield accounts[7]
+
+
+@pytest.fixture
+def healthCheck(HealthCheckMock, gov):
+    yield gov.deploy(HealthCheckMock)
+
+
+@pytest.fixture
+def trade_factory(TradeFactoryMock, gov):
+    yield gov.deploy(TradeFactoryMock)
+
+
+@pytest.fixture
+def vault(pm, gov, rewards, guardian, management, token):
+    Vault = pm(config["dependencies"][0]).Vault
+    vault = guardian.deploy(Vault)
+    vault.initialize(token, gov, rewards, "", "", guardian, management)
+    vault.setDepositLimit(2 ** 256 - 1, {"from": gov})
+    vault.setManagement(management, {"from": gov})
+    yield vault
+
+
+@pytest.fixture
+def tranche(idleCDO):
+    yield interface.ERC20(idleCDO.AATranche())
+
+
+@pytest.fixture
+def gauge(LiquidityGaugeMock, gov, tranche, staking_reward):
+    yield gov.deploy(LiquidityGaugeMock, tranche, staking_reward)
+
+
+@pytest.fixture(scope="session")
+def RELATIVE_APPROX():
+    yield 1e-5
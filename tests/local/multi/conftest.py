@@ -0,0 +1,60 @@
+import pytest
+from brownie import ZERO_ADDRESS, interface
+
+
+@pytest.fixture
+def token(ERC20Mock, gov):
+    yield gov.deploy(ERC20Mock)
+
+
+@pytest.fixture
+def idleCDO(IdleCDOMock, gov, token):
+    yield gov.deploy(IdleCDOMock, token)
+
+
+@pytest.fixture
+def idleCDO2(IdleCDOMock, gov, token):
+    yield gov.deploy(IdleCDOMock, token)
+
+
+@pytest.fixture
+def tranche2(idleCDO2):
+    yield interface.ERC20(idleCDO2.AATranche())
+
+
+@pytest.fixture
+def amount(token, user):
+    amount = 1_000 * 1e18
+    token.mint(user, amount)
+    yield amount
+
+
+@pytest.fixture
+def strategy(strategist, keeper, vault, rewards, idleCDO, idleCDO2, gov, MultiTrancheStrategy, trade_factory, staking_reward, gauge, healthCheck):
+    """60% in AA of `idleCDO` staked in `gauge`, 40% in AA of `idleCDO2` not staked"""
+    strategy = strategist.deploy(
+        MultiTrancheStrategy,
+        vault,
+        strategist,
+        rewards,
+        keeper,
+        ZERO_ADDRESS,
+        [staking_reward],
+        ZERO_ADDRESS,
+        healthCheck
+    )
+    strategy.addPosition(idleCDO, True, gauge, {"from": gov})
+    strategy.addPosition(idleCDO2, True, ZERO_ADDRESS, {"from": gov})
+    strategy.setWeights([6_000, 4_000], {"from": gov})
+    vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    strategy.updateTradeFactory(trade_factory, {"from": gov})
+    yield strategy
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    yield strategy
@@ -0,0 +1,190 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS, interface
+
+from scenarios import block_withdrawals
+
+
+@pytest.fixture
+def bb_tranche(idleCDO):
+    yield interface.ERC20(idleCDO.BBTranche())
+
+
+@pytest.fixture
+def dual(strategist, keeper, vault, rewards, idleCDO, gov, MultiTrancheStrategy, trade_factory, staking_reward, gauge, healthCheck):
+    """AA of `idleCDO` staked in `gauge` and BB of `idleCDO`, 50/50"""
+    strategy = strategist.deploy(
+        MultiTrancheStrategy,
+        vault,
+        strategist,
+        rewards,
+        keeper,
+        ZERO_ADDRESS,
+        [staking_reward],
+        ZERO_ADDRESS,
+        healthCheck
+    )
+    strategy.addPosition(idleCDO, True, gauge, {"from": gov})
+    strategy.addPosition(idleCDO, False, ZERO_ADDRESS, {"from": gov})
+    strategy.setWeights([5_000, 5_000], {"from": gov})
+    vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    strategy.updateTradeFactory(trade_factory, {"from": gov})
+    yield strategy
+
+
+@pytest.fixture
+def dual_invested(chain, token, vault, dual, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    dual.harvest()
+    yield dual
+
+
+def set_aprs(idleCDO, tranche, bb_tranche, aa_apr, bb_apr):
+    """APRs in hundredths of a percent"""
+    idleCDO.setApr(tranche, aa_apr * 10 ** 16)
+    idleCDO.setApr(bb_tranche, bb_apr * 10 ** 16)
+
+
+def test_holds_both_tranches(dual_invested, gauge, bb_tranche, amount):
+    strategy = dual_invested
+
+    assert gauge.balanceOf(strategy) == amount * 0.5
+    assert bb_tranche.balanceOf(strategy) == amount * 0.5
+    assert strategy.positionValues() == [amount * 0.5, amount * 0.5]
+    assert strategy.drift() == 0
+
+
+def test_apr_weighted_targets(dual, gov, idleCDO, tranche, bb_tranche):
+    set_aprs(idleCDO, tranche, bb_tranche, 400, 600)
+    assert dual.targetWeights() == [5_000, 5_000]
+
+    dual.setAprWeighted(True, {"from": gov})
+    assert dual.targetWeights() == [4_000, 6_000]
+
+    # zero weight: left out
+    dual.setWeights([10_000, 0], {"from": gov})
+    assert dual.targetWeights() == [10_000, 0]
+
+    # no APR: falls back to the weights
+    set_aprs(idleCDO, tranche, bb_tranche, 0, 0)
+    assert dual.targetWeights() == [10_000, 0]
+
+
+def test_rebalance_only_above_threshold(chain, dual_invested, gov, idleCDO, tranche, bb_tranche, gauge, amount):
+    strategy = dual_invested
+    strategy.setRebalanceThreshold(500, {"from": gov})
+    set_aprs(idleCDO, tranche, bb_tranche, 500, 500)
+    strategy.setAprWeighted(True, {"from": gov})
+    assert strategy.drift() == 0
+
+    # targets 48/52: drift 2% below 5%
+    set_aprs(idleCDO, tranche, bb_tranche, 480, 520)
+    assert strategy.drift() == 200
+    chain.sleep(1)
+    tx = strategy.harvest()
+    assert "Rebalance" not in tx.events
+    # no IdleCDO withdraw/deposit
+    transfers = tx.events["Transfer"] if "Transfer" in tx.events else []
+    assert not [e for e in transfers if e.address in (tranche.address, bb_tranche.address)]
+    assert strategy.positionValues() == [amount * 0.5, amount * 0.5]
+
+    # targets 30/70: drift 20% above 5%
+    set_aprs(idleCDO, tranche, bb_tranche, 300, 700)
+    chain.sleep(1)
+    tx = strategy.harvest()
+    assert tx.events["Rebalance"]["drift"] == 2_000
+    assert strategy.positionValues() == [amount * 0.3, amount * 0.7]
+    assert gauge.balanceOf(strategy) == amount * 0.3
+    assert bb_tranche.balanceOf(strategy) == amount * 0.7
+    assert strategy.drift() == 0
+
+
+def test_no_rebalance_by_default(chain, dual_invested, gov, amount):
+    strategy = dual_invested
+    strategy.setWeights([8_000, 2_000], {"from": gov})
+    assert strategy.drift() == 3_000
+
+    chain.sleep(1)
+    tx = strategy.harvest()
+    assert "Rebalance" not in tx.events
+    assert strategy.positionValues() == [amount * 0.5, amount * 0.5]
+
+
+def test_rebalance_by_keeper(dual_invested, gov, keeper, user, bb_tranche, amount):
+    strategy = dual_invested
+    strategy.setWeights([7_000, 3_000], {"from": gov})
+
+    with brownie.reverts():
+        strategy.rebalance({"from": user})
+
+    strategy.rebalance({"from": keeper})
+    assert strategy.positionValues() == [amount * 0.7, amount * 0.3]
+    assert bb_tranche.balanceOf(strategy) == amount * 0.3
+
+
+def test_rebalance_after_bb_price_move(chain, dual_invested, gov, token, idleCDO, bb_tranche, amount, RELATIVE_APPROX):
+    strategy = dual_invested
+    strategy.setRebalanceThreshold(500, {"from": gov})
+    # BB +30%, backed by the IdleCDO
+    token.mint(idleCDO, amount * 0.5 * 0.3)
+    idleCDO.setVirtualPrice(bb_tranche, 1.3e18)
+
+    chain.sleep(1)
+    strategy.harvest()
+
+    # profit returned to the vault, the rest back to 50/50
+    aa, bb = strategy.positionValues()
+    assert pytest.approx(aa, rel=RELATIVE_APPROX) == bb
+    assert strategy.drift() < 500
+
+
+def test_set_rebalance_threshold(dual, gov, user):
+    with brownie.reverts():
+        dual.setRebalanceThreshold(100, {"from": user})
+    with brownie.reverts("strat/invalid-threshold"):
+        dual.setRebalanceThreshold(10_001, {"from": gov})
+
+    tx = dual.setRebalanceThreshold(100, {"from": gov})
+    assert dual.rebalanceThreshold() == 100
+    assert tx.events["UpdateRebalanceThreshold"]["_rebalanceThreshold"] == 100
+
+
+def test_liquidate_skips_paused_tranche(dual_invested, vault, idleCDO, tranche, bb_tranche, token, user, amount):
+    strategy = dual_invested
+    # BB is redeemed first
+    set_aprs(idleCDO, tranche, bb_tranche, 600, 400)
+    block_withdrawals(idleCDO, allow_aa=True)
+
+    before = token.balanceOf(user)
+    vault.withdraw(vault.balanceOf(user), user, 1, {"from": user})
+
+    # AA redeemed, BB locked: no loss
+    assert token.balanceOf(user) - before == amount * 0.5
+    assert vault.strategies(strategy)["totalLoss"] == 0
+    assert strategy.positionValues() == [0, amount * 0.5]
+
+
+def test_emergency_exit_skips_paused_tranche(chain, dual_invested, vault, gov, idleCDO, gauge, bb_tranche, token, amount):
+    strategy = dual_invested
+    block_withdrawals(idleCDO, allow_aa=True)
+
+    strategy.setEmergencyExit({"from": gov})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    # AA redeemed, BB locked and reported as a loss
+    assert gauge.balanceOf(strategy) == 0
+    assert bb_tranche.balanceOf(strategy) == amount * 0.5
+    assert tx.events["StrategyReported"]["loss"] == amount * 0.5
+    assert token.balanceOf(vault) == amount * 0.5
+
+    # BB withdrawals come back: the loss is recovered as a profit
+    idleCDO.setAllowBBWithdraw(True)
+    strategy.setDoHealthCheck(False, {"from": gov})
+    chain.sleep(1)
+    tx = strategy.harvest()
+    assert bb_tranche.balanceOf(strategy) == 0
+    assert tx.events["StrategyReported"]["gain"] == amount * 0.5
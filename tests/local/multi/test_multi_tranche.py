@@ -0,0 +1,95 @@
+import brownie
+import pytest
+from brownie import ZERO_ADDRESS
+
+
+def test_invest_by_weights(invested, gauge, tranche2, amount, RELATIVE_APPROX):
+    strategy = invested
+
+    assert gauge.balanceOf(strategy) == amount * 0.6
+    assert tranche2.balanceOf(strategy) == amount * 0.4
+    assert strategy.positionValues() == [amount * 0.6, amount * 0.4]
+    assert pytest.approx(strategy.estimatedTotalAssets(), rel=RELATIVE_APPROX) == amount
+
+
+def test_rebalance_new_want_toward_weights(chain, invested, vault, token, user, gov, amount):
+    strategy = invested
+    strategy.setWeights([2_000, 8_000], {"from": gov})
+
+    token.mint(user, amount)
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+
+    # targets: 400 / 1600. only the second position is below its target
+    assert strategy.positionValues() == [amount * 0.6, amount * 1.4]
+
+
+def test_liquidate_lowest_apr_first(invested, vault, token, user, idleCDO, idleCDO2, tranche, tranche2, amount):
+    strategy = invested
+    idleCDO.setApr(tranche, 5e18)
+    idleCDO2.setApr(tranche2, 2e18)
+    assert strategy.liquidationOrder() == [1, 0]
+
+    vault.withdraw(amount * 0.3, user, 0, {"from": user})
+    assert token.balanceOf(user) == amount * 0.3
+    assert strategy.positionValues() == [amount * 0.6, amount * 0.1]
+
+    # empties the lowest APR position, then takes from the next one
+    vault.withdraw(amount * 0.2, user, 0, {"from": user})
+    assert strategy.positionValues() == [amount * 0.5, 0]
+
+
+def test_profit(chain, invested, vault, token, idleCDO2, tranche2, amount, RELATIVE_APPROX):
+    strategy = invested
+    # 1% yield on the second position
+    idleCDO2.setVirtualPrice(tranche2, 1.01e18)
+    token.mint(idleCDO2, amount * 0.4 * 0.01)
+
+    chain.sleep(1)
+    tx = strategy.harvest()
+    assert pytest.approx(tx.events["Harvested"]["profit"], rel=RELATIVE_APPROX) == amount * 0.004
+    assert tx.events["Harvested"]["loss"] == 0
+
+
+def test_emergency_exit(chain, invested, vault, token, gov, gauge, tranche2, amount):
+    strategy = invested
+    strategy.setEmergencyExit({"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert gauge.balanceOf(strategy) == 0
+    assert tranche2.balanceOf(strategy) == 0
+    assert strategy.estimatedTotalAssets() == 0
+    assert token.balanceOf(vault) == amount
+
+
+def test_remove_position(invested, gov, idleCDO, idleCDO2, tranche, tranche2, IdleCDOMock, token):
+    strategy = invested
+
+    with brownie.reverts("strat/position-not-empty"):
+        strategy.removePosition(1, {"from": gov})
+
+    strategy.setWeights([10_000, 0], {"from": gov})
+    strategy.divest(1, tranche2.balanceOf(strategy), {"from": gov})
+    strategy.removePosition(1, {"from": gov})
+
+    positions = strategy.getPositions()
+    assert len(positions) == 1
+    assert positions[0][1] == tranche
+
+    with brownie.reverts("strat/duplicated-position"):
+        strategy.addPosition(idleCDO, True, ZERO_ADDRESS, {"from": gov})
+    other = gov.deploy(IdleCDOMock, gov)
+    with brownie.reverts("strat/cdo-want"):
+        strategy.addPosition(other, True, ZERO_ADDRESS, {"from": gov})
+
+
+def test_set_weights(strategy, gov, user):
+    with brownie.reverts("strat/invalid-weights"):
+        strategy.setWeights([5_000, 4_000], {"from": gov})
+    with brownie.reverts("strat/invalid-length"):
+        strategy.setWeights([10_000], {"from": gov})
+    with brownie.reverts():
+        strategy.setWeights([5_000, 5_000], {"from": user})
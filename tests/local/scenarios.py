@@ -0,0 +1,128 @@
+"""Tail-risk scenarios on mock protocols.
+
+Stress helpers put the IdleCDO, the stETH price feed or the Curve pool in a
+stress state. `full_exit` then takes a strategy out the way an operator would,
+escalating one step at a time until the strategy holds no more tranches:
+
+1. `vault.revokeStrategy` + `harvest()` (`prepareReturn` path)
+2. `setDoHealthCheck(False)` + `harvest()`: the loss fails the health check
+3. `setApprovalUnsafePrice(True)` + `harvest()` (stETH)
+4. `setEmergencyExit()` + `harvest()` (`liquidateAllPositions` path)
+5. `setUnwindInKind(True)` + `harvest()` (stETH): keep stETH, skip Curve.
+   the stETH held is reported as a loss until it is swapped
+
+Every transaction sent is counted, reverted ones included: the report is the
+worst-case exit latency (transactions) and cost (gas) of a scenario.
+"""
+from dataclasses import dataclass, field
+
+from brownie import web3
+from brownie.exceptions import VirtualMachineError
+
+# explicit gas limit: reverting transactions are mined and counted
+GAS_LIMIT = 5_000_000
+
+
+@dataclass
+class ExitReport:
+    txs: int = 0
+    reverted: int = 0
+    gas_used: int = 0
+    # sum of `loss` of `StrategyReported`
+    loss: int = 0
+    # want returned to the vault
+    debt_paid: int = 0
+    exited: bool = False
+    steps: list = field(default_factory=list)
+
+
+class ExitRunner:
+    def __init__(self, strategy, vault, gov):
+        self.strategy = strategy
+        self.vault = vault
+        self.gov = gov
+        self.report = ExitReport()
+
+    def send(self, name, fn, *args):
+        self.report.txs += 1
+        try:
+            tx = fn(*args, {"from": self.gov, "gas_limit": GAS_LIMIT})
+        except VirtualMachineError as e:
+            self.report.reverted += 1
+            self.report.steps.append(f"{name} (reverted: {e.revert_msg})")
+            if getattr(e, "txid", None):
+                self.report.gas_used += web3.eth.get_transaction_receipt(e.txid)["gasUsed"]
+            return None
+
+        self.report.gas_used += tx.gas_used
+        self.report.steps.append(name)
+        for event in tx.events["StrategyReported"] if "StrategyReported" in tx.events else []:
+            self.report.loss += event["loss"]
+            self.report.debt_paid += event["debtPaid"]
+        return tx
+
+    def exited(self):
+        return self.strategy.totalTranches() == 0 and self.vault.strategies(self.strategy)["totalDebt"] == 0
+
+
+def full_exit(strategy, vault, gov):
+    """revoke `strategy` and escalate until it is out. returns an `ExitReport`"""
+    runner = ExitRunner(strategy, vault, gov)
+    remedies = [("setDoHealthCheck", strategy.setDoHealthCheck, False)]
+    if hasattr(strategy, "setApprovalUnsafePrice"):
+        remedies.append(("setApprovalUnsafePrice", strategy.setApprovalUnsafePrice, True))
+    remedies.append(("setEmergencyExit", strategy.setEmergencyExit))
+    if hasattr(strategy, "setUnwindInKind"):
+        remedies.append(("setUnwindInKind", strategy.setUnwindInKind, True))
+
+    runner.send("revokeStrategy", vault.revokeStrategy, strategy)
+    for remedy in [None] + remedies:
+        if remedy is not None:
+            runner.send(*remedy)
+        if runner.send("harvest", strategy.harvest) is not None and runner.exited():
+            runner.report.exited = True
+            break
+    return runner.report
+
+
+def retry_exit(report, strategy, vault, gov):
+    """harvest again once the stress is over, e.g. withdrawals are enabled again"""
+    runner = ExitRunner(strategy, vault, gov)
+    runner.report = report
+    runner.send("harvest", strategy.harvest)
+    report.exited = runner.exited()
+    return report
+
+
+# ---- stress ----
+
+
+def bb_first_loss(idleCDO, underlying, whale, bb_deposit, loss):
+    """`whale` holds `bb_deposit` of BB tranches, then the IdleCDO loses `loss` of underlying"""
+    underlying.approve(idleCDO, bb_deposit, {"from": whale})
+    idleCDO.depositBB(bb_deposit, {"from": whale})
+    idleCDO.realizeLoss(loss, {"from": whale})
+
+
+def block_withdrawals(idleCDO, allow_aa=False, allow_bb=False):
+    """IdleCDO paused, withdrawals allowed per tranche"""
+    idleCDO.setPaused(True)
+    idleCDO.setAllowAAWithdraw(allow_aa)
+    idleCDO.setAllowBBWithdraw(allow_bb)
+
+
+def imbalance_pool(stable_swap, steth, whale, steth_share=0.8):
+    """sell stETH on the Curve pool until stETH is `steth_share` of its balances"""
+    eth, st = stable_swap.balances(0), stable_swap.balances(1)
+
+    def share(dx):
+        return (st + dx) / (st + dx + eth - stable_swap.get_dy(1, 0, dx))
+
+    low, high = 0, 10 * eth
+    for _ in range(64):
+        mid = (low + high) // 2
+        low, high = (mid, high) if share(mid) < steth_share else (low, mid)
+
+    steth.mint(whale, high)
+    steth.approve(stable_swap, high, {"from": whale})
+    stable_swap.exchange(1, 0, high, 0, {"from": whale})
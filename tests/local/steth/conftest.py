@@ -0,0 +1,70 @@
+import pytest
+
+
+@pytest.fixture
+def token(WETHMock, gov):
+    yield gov.deploy(WETHMock)
+
+
+@pytest.fixture
+def steth(StETHMock, gov):
+    yield gov.deploy(StETHMock)
+
+
+@pytest.fixture
+def idleCDO(IdleCDOMock, gov, steth):
+    yield gov.deploy(IdleCDOMock, steth)
+
+
+@pytest.fixture
+def price_feed(StEthPriceFeedMock, gov):
+    yield gov.deploy(StEthPriceFeedMock)
+
+
+@pytest.fixture
+def stable_swap(StEthStableSwapMock, gov, steth):
+    # same A, fee and admin fee as the mainnet pool
+    stable_swap = gov.deploy(StEthStableSwapMock, steth, 50, 4_000_000, 5_000_000_000)
+    seed = 50 * 1e18
+    steth.mint(gov, seed)
+    steth.approve(stable_swap, seed, {"from": gov})
+    stable_swap.add_liquidity([seed, seed], 0, {"from": gov, "value": seed})
+    yield stable_swap
+
+
+@pytest.fixture
+def amount(token, user):
+    amount = 10 * 1e18
+    token.deposit({"from": user, "value": amount})
+    yield amount
+
+
+@pytest.fixture
+def strategy(strategist, keeper, vault, idleCDO, gov, StEthTrancheStrategyMock, trade_factory, staking_reward, gauge, healthCheck, token, steth, stable_swap, price_feed):
+    strategy = strategist.deploy(
+        StEthTrancheStrategyMock,
+        vault,
+        idleCDO,
+        True,
+        gauge,
+        healthCheck,
+        (token, steth, stable_swap, price_feed)
+    )
+    strategy.setKeeper(keeper)
+    vault.addStrategy(strategy, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    strategy.updateTradeFactory(trade_factory, {"from": gov})
+    strategy.setRewardTokens([staking_reward], {"from": gov})
+    strategy.enableStaking({"from": gov})
+    yield strategy
+
+
+@pytest.fixture
+def depeg(price_feed, stable_swap, steth, whale):
+    def depeg(steth_amount, price=0.9e18):
+        """stETH trades at a discount: the feed flags it unsafe and the pool is imbalanced"""
+        price_feed.setPrice(price, False)
+        steth.mint(whale, steth_amount)
+        steth.approve(stable_swap, steth_amount, {"from": whale})
+        stable_swap.exchange(1, 0, steth_amount, 0, {"from": whale})
+
+    yield depeg
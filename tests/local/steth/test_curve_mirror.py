@@ -0,0 +1,94 @@
+import random
+
+from brownie import web3
+
+from scripts.curve_mirror import StableSwapMirror
+
+# dx from 1000 wei to 40 ETH, through the fee and imbalance regimes
+SIZES = [10 ** 3, 10 ** 9, 10 ** 15, 10 ** 17, 10 ** 18, 3 * 10 ** 18, 10 ** 19, 4 * 10 ** 19]
+
+
+def assert_quotes_match(mirror, stable_swap):
+    assert mirror.balances == [stable_swap.balances(0), stable_swap.balances(1)]
+    for i, j in ((0, 1), (1, 0)):
+        for dx in SIZES:
+            assert mirror.get_dy(i, j, dx) == stable_swap.get_dy(i, j, dx), (i, j, dx)
+
+
+def test_seed(stable_swap):
+    mirror = StableSwapMirror.seed(web3, stable_swap.address)
+
+    assert mirror.amp == stable_swap.A_precise()
+    assert mirror.fee == stable_swap.fee()
+    assert mirror.get_D() * 10 ** 18 // stable_swap.totalSupply() == stable_swap.get_virtual_price()
+    assert_quotes_match(mirror, stable_swap)
+
+
+def test_mirror_follows_pool(stable_swap, steth, whale):
+    mirror = StableSwapMirror.seed(web3, stable_swap.address)
+    rng = random.Random(0)
+    steth.mint(whale, 1_000 * 10 ** 18)
+    steth.approve(stable_swap, 2 ** 256 - 1, {"from": whale})
+
+    for _ in range(30):
+        action = rng.choice(["eth_to_steth", "steth_to_eth", "add", "remove"])
+        dx = rng.randint(1, 5 * 10 ** 18)
+        if action == "eth_to_steth":
+            stable_swap.exchange(0, 1, dx, 0, {"from": whale, "value": dx})
+        elif action == "steth_to_eth":
+            stable_swap.exchange(1, 0, dx, 0, {"from": whale})
+        elif action == "add":
+            amounts = [rng.randint(0, dx), rng.randint(0, dx)]
+            stable_swap.add_liquidity(amounts, 0, {"from": whale, "value": amounts[0]})
+        elif stable_swap.balanceOf(whale) != 0:
+            stable_swap.remove_liquidity(stable_swap.balanceOf(whale) // 2, [0, 0], {"from": whale})
+
+        mirror.sync()
+        assert_quotes_match(mirror, stable_swap)
+
+    # incremental: the state is read once
+    assert mirror.resyncs == 0
+
+
+def test_resync_when_out_of_sync(stable_swap, steth, whale):
+    mirror = StableSwapMirror.seed(web3, stable_swap.address)
+    # e.g. a missed log
+    mirror.balances[1] += 10 ** 18
+
+    steth.mint(whale, 10 ** 18)
+    steth.approve(stable_swap, 10 ** 18, {"from": whale})
+    stable_swap.exchange(1, 0, 10 ** 18, 0, {"from": whale})
+
+    mirror.sync()
+    assert mirror.resyncs == 1
+    assert_quotes_match(mirror, stable_swap)
+
+
+def test_max_age(chain, stable_swap):
+    mirror = StableSwapMirror.seed(web3, stable_swap.address, max_age=10)
+    chain.mine(10)
+
+    mirror.sync()
+    assert mirror.resyncs == 1
+    assert mirror.seeded_at == chain.height
+
+
+def test_resync_during_a_ramp(chain, stable_swap):
+    stable_swap.setFutureATime(chain.time() + 3600)
+    mirror = StableSwapMirror.seed(web3, stable_swap.address)
+    assert mirror.ramping
+
+    # A changes every block: no log to follow
+    chain.mine()
+    mirror.sync()
+    assert mirror.resyncs == 1
+
+    chain.sleep(3600)
+    chain.mine()
+    mirror.sync()
+    assert mirror.resyncs == 2
+    assert not mirror.ramping
+
+    chain.mine()
+    mirror.sync()
+    assert mirror.resyncs == 2
@@ -0,0 +1,91 @@
+import brownie
+import pytest
+
+MAX_SLIPPAGE = 50
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    yield strategy
+
+
+def sell_steth(stable_swap, steth, whale, amount):
+    """stETH at a discount on the pool"""
+    steth.mint(whale, amount)
+    steth.approve(stable_swap, amount, {"from": whale})
+    stable_swap.exchange(1, 0, amount, 0, {"from": whale})
+
+
+def buy_steth(stable_swap, whale, amount):
+    """stETH at a premium on the pool"""
+    stable_swap.exchange(0, 1, amount, 0, {"from": whale, "value": amount})
+
+
+@pytest.mark.parametrize("steth_sold", [0, 10, 20, 30])
+def test_fair_fill_at_discount(invested, token, gov, stable_swap, steth, price_feed, whale, steth_sold):
+    strategy = invested
+    if steth_sold:
+        sell_steth(stable_swap, steth, whale, steth_sold * 1e18)
+    # the price feed follows the pool
+    price = stable_swap.get_dy(1, 0, 1e18)
+    price_feed.setPrice(price, True)
+
+    steth_out = 1e18
+    quote = stable_swap.get_dy(1, 0, steth_out)
+    static_min = steth_out * (10_000 - MAX_SLIPPAGE) // 10_000
+    if steth_sold >= 20:
+        # below the static 1:1 bound: reverted before
+        assert quote < static_min
+
+    tx = strategy.divest(steth_out, {"from": gov})
+    assert token.balanceOf(strategy) == quote
+    assert tx.events["TokenExchange"]["tokens_bought"] >= steth_out * price // 1e18 * (10_000 - MAX_SLIPPAGE) // 10_000
+
+
+def test_reject_unfair_fill_at_premium(invested, gov, stable_swap, price_feed, whale, amount):
+    strategy = invested
+    buy_steth(stable_swap, whale, 20 * 1e18)
+    price = stable_swap.get_dy(1, 0, 1e18)
+    assert price > 1e18
+
+    # the price feed says stETH is worth 2% more than on the pool
+    price_feed.setPrice(price + 0.02e18, True)
+    steth_out = amount // 2
+    quote = stable_swap.get_dy(1, 0, steth_out)
+    # accepted by the static 1:1 bound
+    assert quote >= steth_out * (10_000 - MAX_SLIPPAGE) // 10_000
+    assert quote < steth_out * (price + 0.02e18) // 1e18 * (10_000 - MAX_SLIPPAGE) // 10_000
+    with brownie.reverts("strat/slippage"):
+        strategy.divest(steth_out, {"from": gov})
+
+    # the price feed follows the pool: the fill is fair
+    price_feed.setPrice(price, True)
+    strategy.divest(steth_out, {"from": gov})
+
+
+def test_unsafe_price_feed(invested, gov, price_feed, amount):
+    strategy = invested
+    price_feed.setPrice(0.98e18, False)
+
+    with brownie.reverts("strat/price-unsafe"):
+        strategy.divest(amount // 2, {"from": gov})
+
+    strategy.setApprovalUnsafePrice(True, {"from": gov})
+    strategy.divest(amount // 2, {"from": gov})
+
+
+def test_emergency_exit_skips_price_feed(chain, invested, vault, token, gov, price_feed, amount):
+    strategy = invested
+    # no price: the static 1:1 bound applies
+    price_feed.setPrice(0, False)
+    strategy.setEmergencyExit({"from": gov})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert strategy.totalTranches() == 0
+    assert token.balanceOf(vault) >= amount * (10_000 - MAX_SLIPPAGE) // 10_000
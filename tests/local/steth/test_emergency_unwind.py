@@ -0,0 +1,84 @@
+import brownie
+import pytest
+
+
+def test_emergency_exit_skips_unsafe_price_feed(
+    chain, token, vault, strategy, user, amount, gov, price_feed, RELATIVE_APPROX
+):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    assert pytest.approx(strategy.estimatedTotalAssets(), rel=RELATIVE_APPROX) == amount
+
+    # price feed flags the price unsafe but the pool is still balanced
+    price_feed.setPrice(1e18, False)
+    with brownie.reverts("strat/price-unsafe"):
+        strategy.estimatedTotalAssets()
+
+    # no need to call `setApprovalUnsafePrice`
+    strategy.setEmergencyExit({"from": gov})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    chain.sleep(1)
+    strategy.harvest()
+
+    assert strategy.isAllowedUnsafePrice() is False
+    assert strategy.totalTranches() == 0
+    assert strategy.estimatedTotalAssets() <= 2
+    assert token.balanceOf(vault) >= amount * 0.995  # 0.5% max slippage
+
+
+def test_unwind_in_kind(
+    chain, token, vault, strategy, user, amount, gov, gauge, tranche, steth, stable_swap, price_feed, whale, depeg
+):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    staked = gauge.balanceOf(strategy)
+    assert staked > 0
+
+    # 80/20 pool and unsafe price
+    eth = stable_swap.balances(0)
+    depeg(30 * 1e18)
+    strategy.setApprovalUnsafePrice(True, {"from": gov})
+    strategy.setDoHealthCheck(False, {"from": gov})
+    vault.revokeStrategy(strategy, {"from": gov})
+
+    # keep stETH instead of swapping it
+    strategy.setUnwindInKind(True, {"from": gov})
+    chain.sleep(1)
+    tx = strategy.harvest()
+
+    assert gauge.balanceOf(strategy) == 0
+    assert tranche.balanceOf(strategy) == 0
+    assert steth.balanceOf(strategy) == staked  # mock tranche and steth prices are 1:1
+    assert "TokenExchange" not in tx.events
+    # valued by the price feed: only the discount is a loss, the rest of the debt stays outstanding
+    held = staked * 9 // 10
+    assert strategy.estimatedTotalAssets() == held
+    assert tx.events["StrategyReported"]["loss"] == amount - held
+    assert vault.strategies(strategy)["totalDebt"] == held
+
+    # stETH recovers: the stETH held is swapped and the debt paid
+    dx = eth - stable_swap.balances(0)
+    stable_swap.exchange(0, 1, dx, 0, {"from": whale, "value": dx})
+    price_feed.setPrice(1e18, True)
+    strategy.setUnwindInKind(False, {"from": gov})
+    tx = strategy.harvest()
+
+    assert steth.balanceOf(strategy) <= 2
+    assert vault.strategies(strategy)["totalDebt"] == 0
+    # the discount comes back as a gain
+    assert tx.events["StrategyReported"]["gain"] > 0
+    assert token.balanceOf(vault) >= amount * 0.995  # 0.5% max slippage
+
+
+def test_set_unwind_in_kind(strategy, gov, user):
+    assert strategy.unwindInKind() is False
+
+    with brownie.reverts():
+        strategy.setUnwindInKind(True, {"from": user})
+
+    strategy.setUnwindInKind(True, {"from": gov})
+    assert strategy.unwindInKind() is True
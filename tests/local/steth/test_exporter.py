@@ -0,0 +1,108 @@
+import pytest
+from brownie import web3
+
+from scripts.exporter import FIELDS, StateExporter
+from scripts.keeper import StrategyConfig
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    yield strategy
+
+
+@pytest.fixture
+def exporter(strategy):
+    yield StateExporter(web3, [StrategyConfig(name="steth-AA", address=strategy.address)], max_age={"total_assets": 10})
+
+
+def metrics(exporter):
+    return {line.split(" ")[0]: float(line.split(" ")[1]) for line in exporter.render().splitlines() if not line.startswith("#")}
+
+
+def test_refresh_reads_invalidated_fields_only(chain, invested, exporter, vault, gauge, staking_reward, token, user, amount):
+    strategy = invested
+    gauge.notifyReward(strategy, 1e18)
+
+    assert exporter.refresh() == {"steth-AA": list(FIELDS)}
+    state = exporter.states[0]
+    assert state.values["total_assets"] == strategy.estimatedTotalAssets()
+    assert state.values["staked"] == gauge.balanceOf(strategy) > 0
+    assert state.values["unstaked"] == 0
+    assert state.values["pending_rewards"] == {staking_reward.address: 1e18}
+    assert state.values["price_feed"] == (1e18, True)
+    assert state.total_debt == vault.strategies(strategy)["totalDebt"]
+
+    # same block: served from the cache
+    calls = exporter.calls
+    assert exporter.refresh() == {}
+    assert exporter.calls == calls
+    # nothing happened: the price feed only
+    chain.mine()
+    assert exporter.refresh() == {"steth-AA": ["price_feed"]}
+
+    # StrategyReported, tranche mint and gauge Deposit
+    token.deposit({"from": user, "value": amount})
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    assert exporter.refresh() == {"steth-AA": ["price_feed", "staked", "unstaked", "pending_rewards", "total_assets"]}
+    assert state.values["total_assets"] == strategy.estimatedTotalAssets()
+    assert state.values["staked"] == gauge.balanceOf(strategy)
+    # from the log
+    assert state.total_debt == vault.strategies(strategy)["totalDebt"]
+
+
+def test_unrelated_logs_are_ignored(chain, invested, exporter, token, user, whale, vault):
+    exporter.refresh()
+    token.deposit({"from": whale, "value": 1e18})
+    token.transfer(user, 1e18, {"from": whale})
+    assert exporter.refresh() == {"steth-AA": ["price_feed"]}
+
+    # want sent to the strategy
+    token.transfer(invested, 1e18, {"from": user})
+    assert exporter.refresh() == {"steth-AA": ["price_feed", "total_assets"]}
+    assert exporter.states[0].values["total_assets"] == invested.estimatedTotalAssets()
+
+
+def test_interest_is_read_after_max_age(chain, invested, exporter, idleCDO, tranche):
+    exporter.refresh()
+    before = exporter.states[0].values["total_assets"]
+    # no log
+    idleCDO.setVirtualPrice(tranche, 1.01e18)
+    exporter.refresh()
+    assert exporter.states[0].values["total_assets"] == before
+
+    chain.mine(10)
+    assert "total_assets" in exporter.refresh()["steth-AA"]
+    assert exporter.states[0].values["total_assets"] == invested.estimatedTotalAssets() > before
+
+
+def test_unsafe_price(chain, invested, exporter, price_feed, gov):
+    exporter.refresh()
+    price_feed.setPrice(0.95e18, False)
+
+    # total assets revert with `strat/price-unsafe`
+    assert exporter.refresh() == {"steth-AA": ["price_feed", "total_assets"]}
+    state = exporter.states[0]
+    assert state.values["price_feed"] == (0.95e18, False)
+    assert "total_assets" not in state.values
+
+    m = metrics(exporter)
+    labels = f'{{strategy="steth-AA",address="{invested.address}"}}'
+    assert m[f"tranche_strategy_price_feed_safe{labels}"] == 0
+    assert m[f"tranche_strategy_steth_price{labels}"] == 0.95
+    assert m[f"tranche_strategy_read_errors_total{labels}"] == 1
+    assert f"tranche_strategy_total_assets{labels}" not in m
+
+    # retried every block
+    chain.mine()
+    assert exporter.refresh() == {"steth-AA": ["price_feed", "total_assets"]}
+    invested.setApprovalUnsafePrice(True, {"from": gov})
+    chain.mine()
+    exporter.refresh()
+    assert metrics(exporter)[f"tranche_strategy_total_assets{labels}"] == invested.estimatedTotalAssets() / 1e18
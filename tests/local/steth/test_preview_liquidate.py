@@ -0,0 +1,65 @@
+import brownie
+import pytest
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    yield strategy
+
+
+def test_preview_matches_withdraw(invested, vault, token, user, amount, idleCDO, stable_swap):
+    strategy = invested
+    to_withdraw = amount // 2
+
+    tranche_redeemed, steth_out, quote, liquidated = strategy.previewLiquidate(to_withdraw)
+    assert tranche_redeemed > 0
+    assert steth_out == idleCDO.virtualPrice(strategy.tranche()) * tranche_redeemed // 1e18
+    assert quote == stable_swap.get_dy(1, 0, steth_out)
+    # curve fee
+    assert quote < steth_out
+    assert liquidated == quote
+
+    before = token.balanceOf(user)
+    vault.withdraw(to_withdraw, user, 10_000, {"from": user})
+    assert token.balanceOf(user) - before == liquidated
+
+
+def test_preview_idle_want(invested, token, user, amount):
+    strategy = invested
+    token.deposit({"from": user, "value": 1e18})
+    token.transfer(strategy, 1e18, {"from": user})
+
+    assert strategy.previewLiquidate(1e18) == (0, 0, 0, 1e18)
+    tranche_redeemed, _, quote, liquidated = strategy.previewLiquidate(2e18)
+    assert tranche_redeemed > 0
+    assert liquidated == 1e18 + quote
+
+
+def test_preview_depeg(invested, vault, token, user, amount, gov, price_feed, depeg):
+    strategy = invested
+    depeg(30 * 1e18)
+
+    # the withdrawal would revert on the price check
+    with brownie.reverts("strat/price-unsafe"):
+        strategy.previewLiquidate(amount // 2)
+
+    strategy.setApprovalUnsafePrice(True, {"from": gov})
+    _, steth_out, quote, liquidated = strategy.previewLiquidate(amount // 2)
+
+    # below 1:1 by more than `maximumSlippage` but within `maximumSlippage` of the price feed (0.9)
+    assert quote < steth_out * (10_000 - strategy.maximumSlippage()) // 10_000
+    assert quote >= steth_out * 0.9 * (10_000 - strategy.maximumSlippage()) // 10_000
+    before = token.balanceOf(user)
+    vault.withdraw(amount // 2, user, 10_000, {"from": user})
+    assert token.balanceOf(user) - before == liquidated
+
+    # the price feed above the pool: the withdrawal reverts
+    price_feed.setPrice(1e18, False)
+    with brownie.reverts("strat/slippage"):
+        strategy.previewLiquidate(amount // 4)
+    with brownie.reverts("strat/slippage"):
+        vault.withdraw(amount // 4, user, 10_000, {"from": user})
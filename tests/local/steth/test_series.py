@@ -0,0 +1,82 @@
+import pytest
+from brownie import web3
+
+from scripts.series import Fetcher, consolidate, load_series, resolve
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    yield strategy
+
+
+@pytest.fixture
+def history(chain, invested, idleCDO, tranche, price_feed, stable_swap, steth, whale):
+    """blocks [start, end] with moving tranche prices, stETH price and pool balances"""
+    start = chain.height
+    for i in range(1, 6):
+        idleCDO.setVirtualPrice(tranche, 1e18 + i * 1e15)
+        price_feed.setPrice(1e18 - i * 1e15, i % 2 == 0)
+        steth.mint(whale, 1e18)
+        steth.approve(stable_swap, 1e18, {"from": whale})
+        stable_swap.exchange(1, 0, 1e18, 0, {"from": whale})
+    yield start, chain.height
+
+
+def test_resolve(invested, idleCDO, gauge, price_feed, stable_swap):
+    target = resolve(web3, invested.address)
+
+    assert target.idle_cdo == idleCDO
+    assert target.aa_tranche == idleCDO.AATranche()
+    assert target.bb_tranche == idleCDO.BBTranche()
+    assert target.gauge == gauge
+    assert target.price_feed == price_feed
+    assert target.pool == stable_swap
+
+
+def test_series_match_chain_state(history, invested, idleCDO, tranche, price_feed, stable_swap, gauge, tmp_path):
+    start, end = history
+    fetcher = Fetcher(web3.provider.endpoint_uri, resolve(web3, invested.address), tmp_path, chunk=4, workers=2)
+    fetcher.run(start, end)
+    # one batch per chunk
+    assert fetcher.batches == len(fetcher.plan(start, end))
+
+    series = load_series(tmp_path)
+    assert list(series["block"]) == list(range(start, end + 1))
+    for i, block in enumerate(int(b) for b in series["block"]):
+        assert series["timestamp"][i] == web3.eth.get_block(block)["timestamp"]
+        assert series["virtual_price_aa"][i] == idleCDO.virtualPrice(tranche, block_identifier=block)
+        price, is_safe = price_feed.current_price(block_identifier=block)
+        assert series["steth_price"][i] == price
+        assert series["steth_price_safe"][i] == is_safe
+        assert series["curve_balance_steth"][i] == stable_swap.balances(1, block_identifier=block) / 1e18
+        assert series["gauge_balance"][i] == gauge.balanceOf(invested, block_identifier=block) / 1e18
+
+    columns = consolidate(tmp_path)
+    assert list(columns["virtual_price_aa"]) == list(series["virtual_price_aa"])
+
+
+def test_resume(history, invested, tmp_path):
+    start, end = history
+    target = resolve(web3, invested.address)
+    middle = start + (end - start) // 2
+
+    fetcher = Fetcher(web3.provider.endpoint_uri, target, tmp_path, step=2, chunk=2)
+    fetcher.run(start, middle)
+    done = fetcher.batches
+
+    # the same range again: nothing to fetch
+    fetcher.run(start, middle)
+    assert fetcher.batches == done
+
+    # extended: the new chunks and the last, shorter, one only
+    pending = fetcher.pending(start, end)
+    assert len(pending) < len(fetcher.plan(start, end))
+    fetcher.run(start, end)
+    assert fetcher.batches == done + len(pending)
+
+    series = load_series(tmp_path)
+    assert list(series["block"]) == list(range(start, end + 1, 2))
@@ -0,0 +1,48 @@
+import pytest
+
+
+def balance_reads(tx, strategy):
+    """tokens whose `balanceOf` is called by `strategy` in `tx`"""
+    return [c["to"] for c in tx.subcalls if c["from"] == strategy.address and "balanceOf" in c.get("function", "")]
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    yield strategy
+
+
+def test_invest_reads_steth_once(token, strategy, gov, user, gauge, steth, amount):
+    token.transfer(strategy, amount, {"from": user})
+    tx = strategy.invest(amount, {"from": gov})
+
+    # minted 1:1 by `submit`, capped at the stETH held
+    assert balance_reads(tx, strategy) == [steth.address]
+    assert gauge.balanceOf(strategy) == amount
+
+
+def test_invest_through_curve(token, strategy, gov, user, gauge, steth, stable_swap, whale, amount):
+    # stETH at a discount on Curve: bought instead of minted
+    steth.mint(whale, amount)
+    steth.approve(stable_swap, amount, {"from": whale})
+    stable_swap.exchange(1, 0, amount, 0, {"from": whale})
+    dy = stable_swap.get_dy(0, 1, amount)
+    assert dy > amount
+
+    token.transfer(strategy, amount, {"from": user})
+    tx = strategy.invest(amount, {"from": gov})
+
+    assert balance_reads(tx, strategy) == [steth.address]
+    assert gauge.balanceOf(strategy) == dy
+
+
+def test_divest_reads_held_balances_only(invested, token, gov, gauge, tranche, steth, amount, RELATIVE_APPROX):
+    strategy = invested
+    tx = strategy.divest(amount / 2, {"from": gov})
+
+    assert balance_reads(tx, strategy) == [tranche.address, gauge.address, steth.address]
+    assert pytest.approx(token.balanceOf(strategy), rel=1e-2) == amount / 2
+    assert steth.balanceOf(strategy) == 0
@@ -0,0 +1,35 @@
+import pytest
+from brownie import ZERO_ADDRESS
+
+
+def test_clone(
+    chain, token, vault, strategy, user, amount, gov, strategist, keeper, idleCDO, gauge, healthCheck,
+    steth, stable_swap, trade_factory, StEthTrancheStrategyMock, RELATIVE_APPROX
+):
+    tx = strategy.cloneTrancheStrategy(
+        vault, strategist, strategist, keeper, idleCDO, True, ZERO_ADDRESS, [], gauge, ZERO_ADDRESS, healthCheck,
+        {"from": strategist}
+    )
+    clone = StEthTrancheStrategyMock.at(tx.events["Cloned"]["clone"])
+
+    # protocol addresses are shared with the original
+    assert clone.stETH() == steth
+    assert clone.stableSwapSTETH() == stable_swap
+    assert clone.maximumSlippage() == 50
+    assert steth.allowance(clone, idleCDO) == 2 ** 256 - 1
+    assert steth.allowance(clone, stable_swap) == 2 ** 256 - 1
+
+    vault.updateStrategyDebtRatio(strategy, 0, {"from": gov})
+    vault.addStrategy(clone, 10_000, 0, 2 ** 256 - 1, 1_000, {"from": gov})
+    clone.updateTradeFactory(trade_factory, {"from": gov})
+    clone.enableStaking({"from": gov})
+
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    clone.harvest({"from": keeper})
+    assert pytest.approx(clone.estimatedTotalAssets(), rel=RELATIVE_APPROX) == amount
+
+    # withdraw through curve: eth is received by the clone
+    vault.withdraw(amount // 2, user, 10_000, {"from": user})
+    assert token.balanceOf(user) > amount // 2 * 0.99
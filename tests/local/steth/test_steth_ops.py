@@ -0,0 +1,19 @@
+import json
+
+from brownie import web3
+
+from scripts.ops import main
+
+
+def test_set_slippage_and_unsafe_price(tmp_path, strategy, gov):
+    abi_path = tmp_path / "StEthTrancheStrategy.json"
+    abi_path.write_text(json.dumps({"abi": strategy.abi}))
+    options = ["--strategy", strategy.address, "--abi", str(abi_path), "--from", gov.address]
+
+    main(options + ["set-slippage", "30"], w3=web3)
+    main(options + ["set-unsafe-price", "true"], w3=web3)
+
+    assert strategy.maximumSlippage() == 30
+    assert strategy.isAllowedUnsafePrice()
+    status = main(options + ["status"], w3=web3)
+    assert status["maximumSlippage"] == 30 and status["isAllowedUnsafePrice"]
@@ -0,0 +1,69 @@
+import pytest
+
+from scenarios import bb_first_loss, full_exit, imbalance_pool
+
+
+@pytest.fixture
+def invested(chain, token, vault, strategy, user, amount):
+    token.approve(vault, amount, {"from": user})
+    vault.deposit(amount, {"from": user})
+    chain.sleep(1)
+    strategy.harvest()
+    chain.sleep(1)
+    yield strategy
+
+
+def test_unsafe_price(invested, vault, gov, token, price_feed, amount):
+    price_feed.setPrice(1e18, False)
+
+    report = full_exit(invested, vault, gov)
+
+    assert report.exited
+    assert report.txs == 6 and report.reverted == 2
+    assert report.steps[-2:] == ["setApprovalUnsafePrice", "harvest"]
+    # curve fee and slippage
+    assert 0 < report.loss < amount * 0.005
+    assert token.balanceOf(vault) == amount - report.loss
+
+
+def test_curve_pool_imbalanced(invested, vault, gov, token, steth, stable_swap, gauge, whale, amount):
+    staked = gauge.balanceOf(invested)
+    eth = stable_swap.balances(0)
+    imbalance_pool(stable_swap, steth, whale, 0.8)
+    assert stable_swap.balances(1) / (stable_swap.balances(0) + stable_swap.balances(1)) >= 0.8
+
+    report = full_exit(invested, vault, gov)
+
+    # swapping exceeds `maximumSlippage`, emergency exit included: the strategy unwinds in kind
+    assert report.exited
+    assert report.txs == 10 and report.reverted == 4
+    assert report.steps[-4:] == ["setEmergencyExit", "harvest (reverted: strat/slippage)", "setUnwindInKind", "harvest"]
+    # the stETH held is reported as a loss
+    assert report.loss == amount
+    assert invested.totalTranches() == 0
+    assert steth.balanceOf(invested) == staked
+
+    # the pool recovers: the stETH held is swapped, the loss comes back as a gain
+    dx = eth - stable_swap.balances(0)
+    stable_swap.exchange(0, 1, dx, 0, {"from": whale, "value": dx})
+    invested.setUnwindInKind(False, {"from": gov})
+    invested.setDoHealthCheck(False, {"from": gov})
+    tx = invested.harvest({"from": gov})
+
+    assert steth.balanceOf(invested) <= 2
+    # curve fee and slippage
+    assert tx.events["StrategyReported"]["gain"] >= amount * 0.995
+    assert token.balanceOf(vault) >= amount * 0.995
+
+
+def test_loss_beyond_bb(invested, vault, gov, token, steth, idleCDO, whale, amount, RELATIVE_APPROX):
+    steth.mint(whale, 5 * 1e18)
+    bb_first_loss(idleCDO, steth, whale, 5 * 1e18, 7 * 1e18)
+    assert idleCDO.virtualPrice(idleCDO.AATranche()) == 0.8 * 1e18
+
+    report = full_exit(invested, vault, gov)
+
+    assert report.exited
+    assert report.txs == 4 and report.reverted == 1
+    # 2 ETH of the IdleCDO loss and the curve fee
+    assert 2 * 1e18 < report.loss < 2 * 1e18 + amount * 0.005